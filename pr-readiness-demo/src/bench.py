@@ -0,0 +1,360 @@
+"""
+Benchmarks for the CI history and scoring pipeline
+Runs against synthetic in-memory data, no GitHub token or network needed
+
+Usage: python bench.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from github.confidence import generate_confidence_report
+from github.history import build_ci_history, stream_confidence_report
+from github.matrix import OutcomeMatrix
+from github.payload_store import PayloadStore
+from github.scoring import DEFAULT_ENGINE, ScoringEngine
+from github.snapshot import Snapshot, write_snapshot
+
+
+class SyntheticClient:
+    """
+    Generates a PR with `commits` commits and `checks` check runs per commit
+
+    Payloads are produced on demand, page by page, like the real API.
+    """
+
+    def __init__(self, commits, checks, per_page=100):
+        self.commits = commits
+        self.checks = checks
+        self.per_page = per_page
+
+    def _commit(self, i):
+        return {
+            "sha": f"{i:040x}",
+            "commit": {"committer": {"date": f"2026-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}Z"}}
+        }
+
+    def _check_runs(self, sha):
+        i = int(sha, 16)
+        return [
+            {
+                "name": f"matrix-job-{j}",
+                "status": "completed",
+                "conclusion": "failure" if (i * 31 + j) % 17 == 0 else "success",
+                "output": {"title": "Tests", "summary": "x" * 200}
+            }
+            for j in range(self.checks)
+        ]
+
+    # Materializing API (used by build_ci_history)
+    def get_pr_commits(self, owner, repo, number):
+        return [self._commit(i) for i in range(self.commits)]
+
+    def get_check_runs(self, owner, repo, sha):
+        return self._check_runs(sha)
+
+    def get_commit_statuses(self, owner, repo, sha):
+        return []
+
+    # Streaming API (used by stream_confidence_report)
+    def iter_pr_commits(self, owner, repo, number):
+        for start in range(0, self.commits, self.per_page):
+            page = [self._commit(i) for i in range(start, min(start + self.per_page, self.commits))]
+            yield from page
+
+    def iter_check_runs(self, owner, repo, sha):
+        return iter(self._check_runs(sha))
+
+    def iter_commit_statuses(self, owner, repo, sha):
+        return iter([])
+
+
+def measure_peak(func):
+    """Run func and return (result, peak traced memory in KiB)"""
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak / 1024
+
+
+def bench_streaming_memory(commit_counts=(100, 1000, 5000), checks=50):
+    """
+    Compare peak memory of the materializing and streaming pipelines
+
+    Returns:
+        List of (commits, materialized_kib, streaming_kib) rows
+    """
+    rows = []
+    for commits in commit_counts:
+        client = SyntheticClient(commits, checks)
+
+        materialized, materialized_kib = measure_peak(lambda: generate_confidence_report(
+            build_ci_history(client, "o", "r", 1, max_commits=commits)
+        ))
+        streamed, streaming_kib = measure_peak(lambda: stream_confidence_report(client, "o", "r", 1))
+
+        if materialized != streamed:
+            raise AssertionError("Streaming report differs from materialized report")
+        rows.append((commits, materialized_kib, streaming_kib))
+    return rows
+
+
+def bench_snapshot_load(commits=2000, checks=200):
+    """
+    Compare loading a large history from JSON and from a mmap snapshot
+
+    Returns:
+        Dict of timings in milliseconds and file sizes in bytes
+    """
+    history = build_ci_history(SyntheticClient(commits, checks), "o", "r", 1, max_commits=commits)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "history.json")
+        snapshot_path = os.path.join(tmp, "history.snap")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(history, f)
+        snapshot_size = write_snapshot(snapshot_path, history)
+
+        start = time.perf_counter()
+        with open(json_path, "r", encoding="utf-8") as f:
+            loaded = json.load(f)
+        json_report = generate_confidence_report(loaded)
+        json_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        snapshot = Snapshot(snapshot_path)
+        open_ms = (time.perf_counter() - start) * 1000
+        snapshot_report = snapshot.confidence_report()
+        snapshot_ms = (time.perf_counter() - start) * 1000
+        snapshot.close()
+
+        if json_report != snapshot_report:
+            raise AssertionError("Snapshot report differs from JSON report")
+
+        return {
+            "json_bytes": os.path.getsize(json_path),
+            "snapshot_bytes": snapshot_size,
+            "json_load_and_score_ms": json_ms,
+            "snapshot_open_ms": open_ms,
+            "snapshot_open_and_score_ms": snapshot_ms
+        }
+
+
+def _recorded_payloads(i, checks):
+    """Check-runs and statuses payloads for commit i, shaped like the real API's"""
+    sha = f"{i:040x}"
+    app = {
+        "id": 15368, "slug": "github-actions", "node_id": "MDM6QXBwMTUzNjg=",
+        "name": "GitHub Actions", "description": "Automate your workflow from idea to production",
+        "external_url": "https://help.github.com/en/actions", "html_url": "https://github.com/apps/github-actions",
+        "owner": {"login": "github", "id": 9919, "type": "Organization",
+                  "avatar_url": "https://avatars.githubusercontent.com/u/9919?v=4"},
+        "permissions": {"actions": "write", "checks": "write", "contents": "write", "statuses": "write"},
+        "events": ["check_run", "check_suite", "pull_request", "push", "workflow_dispatch"]
+    }
+    suite = {"id": 9000000 + i, "head_sha": sha, "head_branch": "feature", "status": "completed"}
+    check_runs = {"total_count": checks, "check_runs": [
+        {
+            "id": i * checks + j, "name": f"matrix-job-{j}", "head_sha": sha,
+            "status": "completed", "conclusion": "failure" if (i * 31 + j) % 17 == 0 else "success",
+            "started_at": "2026-01-01T00:00:00Z", "completed_at": "2026-01-01T00:05:00Z",
+            "html_url": f"https://github.com/o/r/runs/{i * checks + j}",
+            "output": {"title": "Tests", "summary": "All 1,204 tests passed in 3m 12s. " * 4,
+                       "text": None, "annotations_count": 0},
+            "app": app, "check_suite": suite, "pull_requests": []
+        }
+        for j in range(checks)
+    ]}
+    statuses = [
+        {"id": i * 10 + k, "state": "success", "context": f"ci/external-{k}", "description": "Build passed",
+         "target_url": f"https://ci.example.com/builds/{i * 10 + k}",
+         "creator": {"login": "ci-bot", "id": 424242, "type": "Bot",
+                     "avatar_url": "https://avatars.githubusercontent.com/in/424242?v=4"}}
+        for k in range(3)
+    ]
+    return sha, check_runs, statuses
+
+
+def bench_payload_store(commits=500, checks=50):
+    """
+    Record check-run and status payloads into a PayloadStore
+
+    Returns:
+        Dict with the store's size statistics, store load throughput next
+        to plain json.loads of the same payloads, and a compaction result
+        after every commit's check runs were re-recorded once
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PayloadStore(os.path.join(tmp, "payloads.sqlite3"))
+        raw = []
+        start = time.perf_counter()
+        for i in range(commits):
+            sha, check_runs, statuses = _recorded_payloads(i, checks)
+            store.put(f"/repos/o/r/commits/{sha}/check-runs", check_runs, etag=f'"{i}"')
+            store.put(f"/repos/o/r/commits/{sha}/statuses", statuses, etag=f'"{i}"')
+            raw.append(json.dumps(check_runs))
+            raw.append(json.dumps(statuses))
+        record_ms = (time.perf_counter() - start) * 1000
+
+        result = store.stats()
+        load = store.measure_load()
+
+        start = time.perf_counter()
+        for payload in raw:
+            json.loads(payload)
+        json_seconds = time.perf_counter() - start
+
+        # A re-run changes each suite, orphaning the old run blobs
+        for i in range(commits):
+            sha, check_runs, _ = _recorded_payloads(i, checks)
+            for run in check_runs["check_runs"]:
+                run["check_suite"] = dict(run["check_suite"], status="rerun")
+            store.put(f"/repos/o/r/commits/{sha}/check-runs", check_runs)
+        compaction = store.compact()
+        store.close()
+
+    result.update({
+        "record_ms": record_ms,
+        "load_mb_per_sec": load["mb_per_sec"],
+        "load_payloads_per_sec": load["payloads_per_sec"],
+        "json_mb_per_sec": sum(len(p) for p in raw) / 1e6 / json_seconds,
+        "compaction": compaction
+    })
+    return result
+
+
+def bench_outcome_matrix(commits=2000, checks=2000, outage_every=100):
+    """
+    Time building a sha x check matrix and flagging infrastructure failures
+
+    Every `outage_every`-th commit fails on every check; other failures are
+    sparse. Records are shared per (sha, outcome) so the input history
+    itself stays small.
+
+    Returns:
+        Dict with build and reduction timings in milliseconds
+    """
+    records = [
+        {outcome: {"sha": f"{i:040x}", "outcome": outcome, "commit_date": f"2026-01-01T{i:08d}"}
+         for outcome in ("PASS", "FAIL")}
+        for i in range(commits)
+    ]
+    history = {
+        f"check-{j}": [
+            records[i]["FAIL" if i % outage_every == 0 or (i * 31 + j) % 97 == 0 else "PASS"]
+            for i in range(commits)
+        ]
+        for j in range(checks)
+    }
+
+    start = time.perf_counter()
+    matrix = OutcomeMatrix.from_history(history)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    flagged = matrix.infrastructure_failures()
+    matrix.failures_per_check(matrix.sha_mask(flagged))
+    reduce_ms = (time.perf_counter() - start) * 1000
+
+    if len(flagged) != len(range(0, commits, outage_every)):
+        raise AssertionError("Unexpected infrastructure failure count")
+
+    return {"cells": commits * checks, "flagged": len(flagged),
+            "build_ms": build_ms, "reduce_ms": reduce_ms}
+
+
+def bench_scoring(checks=5000, runs=30, repeat=5):
+    """
+    Time scoring many checks with the default and a per-repo rule table
+
+    Pass probabilities vary per check so every rule in the table is hit.
+
+    Returns:
+        Dict with milliseconds per pass over all checks and checks per second
+    """
+    records = {outcome: {"outcome": outcome} for outcome in ("PASS", "FAIL", "PENDING")}
+    histories = [
+        [records["PENDING" if (i * 7 + j) % 29 == 0 else
+                 "PASS" if (i * 31 + j * 17) % 100 < (j * 13) % 100 else "FAIL"]
+         for i in range(runs)]
+        for j in range(checks)
+    ]
+    custom = ScoringEngine({"reliable_min_runs": 20, "flaky_transition_rate": 0.25})
+
+    result = {"checks": checks, "runs": runs}
+    for name, engine in (("default", DEFAULT_ENGINE), ("custom", custom)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for outcomes in histories:
+                engine.score(outcomes)
+        elapsed = (time.perf_counter() - start) / repeat
+        result[f"{name}_ms"] = elapsed * 1000
+        result[f"{name}_checks_per_sec"] = checks / elapsed
+    return result
+
+
+def main():
+    print("="*70)
+    print("STREAMING HISTORY PIPELINE - PEAK MEMORY (50 checks per commit)")
+    print("="*70)
+    print(f"{'Commits':>8} {'Materialized':>15} {'Streaming':>12}")
+    for commits, materialized_kib, streaming_kib in bench_streaming_memory():
+        print(f"{commits:>8} {materialized_kib:>12.0f} KiB {streaming_kib:>8.0f} KiB")
+    print("="*70)
+    print()
+
+    print("="*70)
+    print("COLUMNAR SNAPSHOT - LOAD TIME (2000 commits x 200 checks)")
+    print("="*70)
+    result = bench_snapshot_load()
+    print(f"JSON:     {result['json_bytes'] / 1e6:6.1f} MB, load + score {result['json_load_and_score_ms']:7.1f} ms")
+    print(f"Snapshot: {result['snapshot_bytes'] / 1e6:6.1f} MB, open {result['snapshot_open_ms']:.2f} ms, "
+          f"open + score {result['snapshot_open_and_score_ms']:7.1f} ms")
+    print("="*70)
+    print()
+
+    print("="*70)
+    print("OUTCOME MATRIX - INFRASTRUCTURE FAILURES (2000 commits x 2000 checks)")
+    print("="*70)
+    result = bench_outcome_matrix()
+    print(f"Build:  {result['build_ms']:8.1f} ms for {result['cells']:,} cells")
+    print(f"Reduce: {result['reduce_ms']:8.1f} ms, {result['flagged']} commits flagged")
+    print("="*70)
+    print()
+
+    print("="*70)
+    print("PAYLOAD STORE (500 commits x 50 check runs + 3 statuses)")
+    print("="*70)
+    result = bench_payload_store()
+    compaction = result["compaction"]
+    print(f"Raw JSON: {result['raw_bytes'] / 1e6:7.1f} MB in {result['payloads']} payloads " +
+          f"(recorded in {result['record_ms']:.0f} ms)")
+    print(f"Stored:   {result['stored_bytes'] / 1e6:7.2f} MB in {result['blobs']} blobs, " +
+          f"dedup {result['dedup_ratio']:.1f}x, compression {result['compression_ratio']:.1f}x")
+    print(f"Load:     {result['load_mb_per_sec']:7.1f} MB/s ({result['load_payloads_per_sec']:,.0f} payloads/s), " +
+          f"json.loads {result['json_mb_per_sec']:.1f} MB/s")
+    print(f"Compact:  {compaction['blobs_removed']} orphaned blobs, " +
+          f"{compaction['bytes_before'] / 1e6:.1f} MB -> {compaction['bytes_after'] / 1e6:.1f} MB")
+    print("="*70)
+    print()
+
+    print("="*70)
+    print("RULE-TABLE SCORING (5000 checks x 30 runs)")
+    print("="*70)
+    result = bench_scoring()
+    print(f"Default thresholds: {result['default_ms']:7.1f} ms, {result['default_checks_per_sec']:,.0f} checks/s")
+    print(f"Custom thresholds:  {result['custom_ms']:7.1f} ms, {result['custom_checks_per_sec']:,.0f} checks/s")
+    print("="*70)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
+import os
 import sys
-from parser import parse_pr_url
-from github.client import GitHubClient
-from github.ci import aggregate_ci
-from github.history import analyze_ci_reliability
 
 VERSION = "0.1.0"
 
+# Commits fetched concurrently during history analysis (one pooled connection each)
+HISTORY_WORKERS = 4
+
 def print_help():
     """Display comprehensive help information"""
     print("="*70)
@@ -21,6 +21,42 @@ def print_help():
     print("  python cli.py <github_pr_url>")
     print("  python cli.py --help")
     print("  python cli.py --examples")
+    print("  python cli.py <command> [options]")
+    print()
+    print("COMMANDS")
+    print("  batch <file>       Analyze every PR URL listed in <file> across worker")
+    print("                     processes, checkpointing to SQLite so reruns resume")
+    print("                     (--workers N, --db PATH, --output JSON_PATH)")
+    print("                     --plan fits the batch to the live rate-limit budget by")
+    print("                     lowering --max-commits, then skipping low-priority PRs")
+    print("                     (optional integer after each URL); --dry-run prints")
+    print("                     the plan only; --graphql fetches every PR's history up")
+    print("                     front in a few multiplexed GraphQL requests;")
+    print("                     --metrics-port N serves /metrics while it runs")
+    print("  refresh <owner/repo>...")
+    print("                     Poll each repo's events feed (ETag-conditional, at the")
+    print("                     server's poll interval) and re-analyze only PRs with")
+    print("                     new pushes into the batch database")
+    print("                     (--state PATH, --db PATH, --workers N, --watch,")
+    print("                     --metrics-port N to serve /metrics on localhost)")
+    print("  scan <owner/repo>...")
+    print("                     Re-analyze only open PRs updated since the last scan")
+    print("                     whose head sha moved or whose CI was still pending;")
+    print("                     other results are reused (--state PATH, --output PATH)")
+    print('  triage "<search query>"')
+    print("                     Classify every matching open PR's head-commit CI from")
+    print("                     a few GraphQL search pages (e.g. \"org:acme\"), then run")
+    print("                     the full analysis only for failing or pending PRs")
+    print("                     (--max-prs N, --no-analyze, --output PATH)")
+    print("  payloads stats|compact")
+    print("                     Report the payload store's compression ratio and load")
+    print("                     throughput, or drop blobs no payload references")
+    print("                     (--db PATH, default $CI_PAYLOAD_STORE)")
+    print("  backfill <owner/repo>")
+    print("                     Walk a branch's history and store every commit's CI")
+    print("                     outcomes in SQLite within the rate budget; resumable")
+    print("                     (--branch NAME, --since DATE, --max-commits N,")
+    print("                     --db PATH, --workers N, --reserve N)")
     print()
     print("ARGUMENTS")
     print("  <github_pr_url>    Full GitHub Pull Request URL")
@@ -35,6 +71,20 @@ def print_help():
     print("  1. Install dependencies: pip install -r requirements.txt")
     print("  2. Set GITHUB_TOKEN in .env file")
     print("  3. Get token from: https://github.com/settings/tokens")
+    print("  4. Optional: set GITHUB_TOKENS=tok1,tok2,... to spread requests")
+    print("     across several tokens (or GitHub App installation tokens)")
+    print("  5. Optional: set CI_INDEX_PATH to a JSON file to keep a repo-wide")
+    print("     flakiness index across analyzed PRs; checks are then also scored")
+    print("     with recent runs from the PR's base branch (mined incrementally)")
+    print("  6. Optional: set CI_TRACE_PATH to write a Chrome-trace JSON of API")
+    print("     calls and analysis stages (open in chrome://tracing)")
+    print("  7. Optional: set CI_DEADLINE_SECONDS to bound the history analysis;")
+    print("     checks are then scored from whatever history arrived in time")
+    print("  8. Optional: set CI_SCORING_CONFIG to a JSON file of classification")
+    print('     thresholds: {"defaults": {...}, "repos": {"owner/repo": {...}}}')
+    print("  9. Optional: set CI_PAYLOAD_STORE to a SQLite file to record check-run")
+    print("     and status payloads compressed and de-duplicated; re-fetches are")
+    print("     ETag-conditional and served from disk when unchanged")
     print()
     print("OUTPUT")
     print("  • PR metadata (title, author, commits, files)")
@@ -42,6 +92,7 @@ def print_help():
     print("  • Per-check confidence scores (0-100)")
     print("  • Flakiness detection and stability classification")
     print("  • Historical pattern analysis with explanations")
+    print("  • The commit where a check regressed or recovered, if any")
     print()
     print("For more information, visit: https://github.com/yourusername/PR_tracker")
     print("="*70)
@@ -90,7 +141,381 @@ def print_version():
     print(f"CI Reliability Analytics v{VERSION}")
     print("Pre-GSoC feasibility prototype for BLT GSoC 2026")
 
+def print_plan(plan):
+    """Display a batch budget plan from github.planner"""
+    print("="*70)
+    print("BATCH BUDGET PLAN")
+    print("="*70)
+    print(f"Rate-limit budget: {plan['budget']} requests ({plan['reserve']} reserved)")
+    print(f"Planning cost:     {plan.get('planning_cost', 0)} requests")
+    print(f"History depth:     {plan['max_commits']} commits per PR")
+    print(f"Estimated cost:    {plan['estimated_cost']} requests")
+    for label, key in (("Run", "run"), ("Skip", "skipped"), ("Cached", "cached")):
+        for job in plan[key]:
+            print(f"  {label:<7} {job['owner']}/{job['repo']}#{job['number']:<8} "
+                  f"{job['commits']:>4} commits  ~{job['cost']} requests")
+    print("="*70)
+
+def start_metrics_server(port):
+    """Serve the process-wide metrics registry on localhost for the rest of the run"""
+    from github.metrics import REGISTRY
+
+    server = REGISTRY.serve(port=port)
+    print(f"📈 Serving metrics on http://127.0.0.1:{server.server_address[1]}/metrics")
+    return server
+
+
+def run_batch_command(args):
+    """Analyze a list of PRs with the sharded multi-process work queue"""
+    import argparse
+    import functools
+    import json
+    from parser import parse_pr_url
+    from github.batch import analyze_pr, run_batch
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py batch")
+    arg_parser.add_argument("file", help="Text file with one PR URL per line")
+    arg_parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    arg_parser.add_argument("--db", default="batch.sqlite3", help="Checkpoint database")
+    arg_parser.add_argument("--output", help="Write the merged report as JSON")
+    arg_parser.add_argument("--max-commits", type=int, default=20, help="History depth per PR")
+    arg_parser.add_argument("--plan", action="store_true",
+                            help="Fit the batch to the live rate-limit budget")
+    arg_parser.add_argument("--dry-run", action="store_true",
+                            help="Print the budget plan and exit without analyzing")
+    arg_parser.add_argument("--reserve", type=int, default=100,
+                            help="Requests to leave unspent when planning")
+    arg_parser.add_argument("--graphql", action="store_true",
+                            help="Fetch every PR's history up front in multiplexed GraphQL queries")
+    arg_parser.add_argument("--metrics-port", type=int,
+                            help="Serve Prometheus metrics on this local port while running")
+    options = arg_parser.parse_args(args)
+
+    # One PR URL per line, optionally followed by an integer priority
+    jobs = []
+    bad_lines = 0
+    with open(options.file, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            try:
+                job = parse_pr_url(fields[0])
+                if len(fields) > 1:
+                    if not fields[1].lstrip("-").isdigit():
+                        raise ValueError(f"Priority must be an integer, got {fields[1]!r}")
+                    job["priority"] = int(fields[1])
+            except ValueError as e:
+                print(f"❌ {options.file}:{line_number}: {e}")
+                bad_lines += 1
+                continue
+            jobs.append(job)
+
+    if options.metrics_port is not None and not options.dry_run:
+        start_metrics_server(options.metrics_port)
+
+    analyze = analyze_pr
+    max_commits = options.max_commits
+    if options.plan or options.dry_run:
+        from github.client import GitHubClient
+        from github.batch import JobStore
+        from github.planner import plan_for_client
+
+        store = JobStore(options.db)
+        try:
+            plan = plan_for_client(GitHubClient(), jobs, store=store,
+                                   max_commits=options.max_commits, reserve=options.reserve)
+        finally:
+            store.close()
+        print_plan(plan)
+        if options.dry_run:
+            return 0
+        jobs = [
+            {"owner": job["owner"], "repo": job["repo"], "number": job["number"]}
+            for job in plan["run"] + plan["cached"]
+        ]
+        max_commits = plan["max_commits"]
+        analyze = functools.partial(analyze_pr, max_commits=max_commits)
+    elif options.max_commits != 20:
+        analyze = functools.partial(analyze_pr, max_commits=options.max_commits)
+
+    workers = options.workers
+    if options.graphql:
+        from github.batch import JobStore, score_prefetched
+        from github.client import GitHubClient
+        from github.multiplex import fetch_check_histories
+
+        store = JobStore(options.db)
+        try:
+            todo = [job for job in jobs if not store.is_done(job)]
+        finally:
+            store.close()
+        fetched = fetch_check_histories(GitHubClient(), todo, max_commits=max_commits)
+        print(f"📡 Fetched {len(fetched['histories'])} PR history(ies) in " +
+              f"{fetched['stats']['requests']} GraphQL request(s)")
+        # Scoring prefetched histories is cheap; no need for worker processes
+        analyze = functools.partial(score_prefetched, fetched)
+        workers = 1
+
+    print(f"📥 Analyzing {len(jobs)} PR(s) with {workers} worker(s)...")
+
+    def progress(job, error):
+        status = f"❌ {error}" if error else "✅"
+        print(f"   {status} {job['owner']}/{job['repo']}#{job['number']}")
+
+    merged = run_batch(jobs, options.db, workers=workers, analyze=analyze, progress=progress)
+
+    print()
+    print("="*70)
+    print("BATCH SUMMARY")
+    print("="*70)
+    print(f"PRs Analyzed: {len(merged['reports'])}")
+    print(f"PRs Failed:   {len(merged['errors'])}")
+    for classification, count in sorted(merged["summary"].items()):
+        print(f"  {classification:<9} {count} check(s)")
+    print("="*70)
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(merged, f, indent=2)
+        print(f"Report written to {options.output}")
+
+    return 1 if merged["errors"] or bad_lines else 0
+
+
+def run_refresh_command(args):
+    """Re-analyze only PRs with new activity in the repositories' event feeds"""
+    import argparse
+    import time
+    from github.batch import JobStore, run_batch
+    from github.client import GitHubClient
+    from github.refresher import EventsRefresher
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py refresh")
+    arg_parser.add_argument("repos", nargs="+", help="Repositories as owner/repo")
+    arg_parser.add_argument("--state", default="refresh.json", help="ETag and poll state file")
+    arg_parser.add_argument("--db", default="batch.sqlite3", help="Checkpoint database for results")
+    arg_parser.add_argument("--workers", type=int, default=4, help="Worker processes")
+    arg_parser.add_argument("--watch", action="store_true",
+                            help="Keep polling at the server's poll interval")
+    arg_parser.add_argument("--metrics-port", type=int,
+                            help="Serve Prometheus metrics on this local port while running")
+    options = arg_parser.parse_args(args)
+
+    if options.metrics_port is not None:
+        start_metrics_server(options.metrics_port)
+
+    refresher = EventsRefresher(GitHubClient(), options.repos, state_path=options.state)
+    failed = False
+    while True:
+        jobs = refresher.poll()
+        refresher.save()
+        print(f"🔄 {len(jobs)} PR(s) with new activity across {len(options.repos)} repo(s)")
+
+        if jobs:
+            store = JobStore(options.db)
+            try:
+                store.requeue(jobs)
+            finally:
+                store.close()
+
+            def progress(job, error):
+                status = f"❌ {error}" if error else "✅"
+                print(f"   {status} {job['owner']}/{job['repo']}#{job['number']}")
+
+            merged = run_batch(jobs, options.db, workers=options.workers, progress=progress)
+            failed = bool(merged["errors"])
+
+        if not options.watch:
+            return 1 if failed else 0
+        time.sleep(refresher.next_poll_in())
+
+
+def run_scan_command(args):
+    """Incrementally re-analyze the open PRs of one or more repositories"""
+    import argparse
+    import json
+    from github.client import GitHubClient
+    from github.scan import RepoScanner
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py scan")
+    arg_parser.add_argument("repos", nargs="+", help="Repositories as owner/repo")
+    arg_parser.add_argument("--state", default="scan.json", help="Watermark and results file")
+    arg_parser.add_argument("--output", help="Write every repository's current results as JSON")
+    options = arg_parser.parse_args(args)
+
+    scanner = RepoScanner(GitHubClient(), state_path=options.state)
+    results = {}
+    for full_name in options.repos:
+        owner, repo = full_name.split("/", 1)
+        try:
+            scan = scanner.scan(owner, repo)
+        finally:
+            # Keep finished analyses even if a later PR fails
+            scanner.save()
+        stats = scan["stats"]
+        print(f"🔎 {full_name}: {stats['analyzed']} analyzed, {stats['reused']} reused, " +
+              f"{stats['closed']} closed ({stats['listed']} listed in {stats['pages']} page(s))")
+        results[full_name] = scan["results"]
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {options.output}")
+    return 0
+
+
+def run_triage_command(args):
+    """Find PRs with failing or pending CI across a search and analyze only those"""
+    import argparse
+    import json
+    from github.client import GitHubClient
+    from github.triage import triage
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py triage")
+    arg_parser.add_argument("query", help='GitHub search query, e.g. "org:acme"')
+    arg_parser.add_argument("--max-prs", type=int, help="Stop after this many PRs")
+    arg_parser.add_argument("--no-analyze", action="store_true",
+                            help="Only classify; skip the per-PR history analysis")
+    arg_parser.add_argument("--output", help="Write the triage result as JSON")
+    options = arg_parser.parse_args(args)
+
+    result = triage(GitHubClient(), options.query, max_prs=options.max_prs,
+                    analyze_statuses=() if options.no_analyze else ("FAIL", "PENDING"))
+    counts = result["counts"]
+    print(f"🔎 {len(result['prs'])} open PR(s) in {result['search_requests']} search request(s): " +
+          f"{counts['FAIL']} failing, {counts['PENDING']} pending, {counts['PASS']} passing, " +
+          f"{counts['NO_CI']} without CI")
+
+    for pr in result["prs"]:
+        if pr["ci_status"] not in ("FAIL", "PENDING"):
+            continue
+        key = f"{pr['owner']}/{pr['repo']}#{pr['number']}"
+        icon = "❌" if pr["ci_status"] == "FAIL" else "⏳"
+        line = f"   {icon} {key}"
+        report = result["reports"].get(key)
+        if report:
+            flaky = sum(1 for check in report.values() if check["classification"] == "FLAKY")
+            unstable = sum(1 for check in report.values() if check["classification"] == "UNSTABLE")
+            line += f"  ({flaky} flaky, {unstable} unstable check(s))"
+        elif key in result["errors"]:
+            line += f"  (analysis failed: {result['errors'][key]})"
+        print(line)
+
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"💾 Triage written to {options.output}")
+    return 1 if result["errors"] else 0
+
+
+def run_payloads_command(args):
+    """Inspect or compact the on-disk payload store"""
+    import argparse
+    from github.payload_store import PayloadStore
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py payloads")
+    arg_parser.add_argument("action", choices=("stats", "compact"))
+    arg_parser.add_argument("--db", default=os.getenv("CI_PAYLOAD_STORE"),
+                            help="Payload store file (default: $CI_PAYLOAD_STORE)")
+    options = arg_parser.parse_args(args)
+    if not options.db:
+        arg_parser.error("no payload store given (--db or CI_PAYLOAD_STORE)")
+    if not os.path.exists(options.db):
+        print(f"❌ Error: No payload store at {options.db}")
+        return 1
+
+    store = PayloadStore(options.db)
+    try:
+        if options.action == "compact":
+            result = store.compact()
+            print(f"🧹 Removed {result['blobs_removed']} unreferenced blob(s): " +
+                  f"{result['bytes_before'] / 1e6:.2f} MB -> {result['bytes_after'] / 1e6:.2f} MB")
+            return 0
+
+        stats = store.stats()
+        load = store.measure_load()
+    finally:
+        store.close()
+
+    print("="*70)
+    print("PAYLOAD STORE")
+    print("="*70)
+    print(f"Payloads:    {stats['payloads']} in {stats['blobs']} blob(s)")
+    print(f"Raw JSON:    {stats['raw_bytes'] / 1e6:.2f} MB")
+    print(f"Stored:      {stats['stored_bytes'] / 1e6:.2f} MB " +
+          f"(dedup {stats['dedup_ratio']:.1f}x, compression {stats['compression_ratio']:.1f}x)")
+    print(f"Load:        {load['mb_per_sec']:.1f} MB/s, {load['payloads_per_sec']:,.0f} payloads/s")
+    print("="*70)
+    return 0
+
+
+def run_backfill_command(args):
+    """Backfill a branch's historical CI outcomes into a local SQLite store"""
+    import argparse
+    from github.backfill import BackfillStore, backfill_branch, DEFAULT_RESERVE
+    from github.client import GitHubClient
+
+    arg_parser = argparse.ArgumentParser(prog="cli.py backfill")
+    arg_parser.add_argument("repo", help="Repository as owner/repo")
+    arg_parser.add_argument("--branch", default="main", help="Branch to walk")
+    arg_parser.add_argument("--since", help="Oldest commit date to backfill (ISO 8601)")
+    arg_parser.add_argument("--max-commits", type=int, help="Stop after this many commits")
+    arg_parser.add_argument("--db", default="backfill.sqlite3", help="Outcome store and checkpoint")
+    arg_parser.add_argument("--workers", type=int, default=8, help="Concurrent commit fetches")
+    arg_parser.add_argument("--reserve", type=int, default=DEFAULT_RESERVE,
+                            help="Requests to leave unspent")
+    options = arg_parser.parse_args(args)
+
+    owner, repo = options.repo.split("/", 1)
+    client = GitHubClient(max_workers=options.workers, lean_json=True)
+    budget = client.get_rate_limit()["remaining"] - options.reserve
+    print(f"📥 Backfilling {owner}/{repo}@{options.branch} (budget {budget} requests)...")
+
+    def progress(stats):
+        print(f"   {stats['commits']} commits, {stats['outcomes']} outcomes, " +
+              f"{stats['commits_per_minute']:.0f} commits/min")
+
+    store = BackfillStore(options.db)
+    try:
+        stats = backfill_branch(client, store, owner, repo, options.branch, since=options.since,
+                                max_commits=options.max_commits, budget=budget,
+                                workers=options.workers, progress=progress)
+        totals = store.counts(owner, repo)
+    finally:
+        store.close()
+
+    print()
+    print("="*70)
+    print("BACKFILL SUMMARY")
+    print("="*70)
+    print(f"This run:    {stats['commits']} commits ({stats['failed_commits']} failed, " +
+          f"{stats['retried']} earlier failures recovered), " +
+          f"{stats['requests']} requests in {stats['elapsed']:.1f}s")
+    print(f"Throughput:  {stats['commits_per_minute']:.1f} commits/min")
+    print(f"Store total: {totals['commits']} commits, {totals['outcomes']} outcomes")
+    if stats["finished"]:
+        print("Status:      complete")
+    else:
+        print(f"Status:      paused at {(stats['next_sha'] or '')[:7]}; rerun to resume")
+    print("="*70)
+    return 0
+
+
+# Subcommands dispatched from main(); each takes the remaining argv
+COMMANDS = {
+    "batch": run_batch_command,
+    "refresh": run_refresh_command,
+    "scan": run_scan_command,
+    "triage": run_triage_command,
+    "payloads": run_payloads_command,
+    "backfill": run_backfill_command,
+}
+
 def main():
+    if len(sys.argv) >= 2 and sys.argv[1] in COMMANDS:
+        sys.exit(COMMANDS[sys.argv[1]](sys.argv[2:]))
+
     if len(sys.argv) != 2:
         print("Error: Invalid arguments")
         print()
@@ -115,6 +540,13 @@ def main():
         print_version()
         sys.exit(0)
 
+    # Deferred imports: help/version output never pays for requests/dotenv
+    from parser import parse_pr_url
+    from github.client import GitHubClient
+    from github.ci import aggregate_ci
+    from github.history import analyze_ci_reliability
+    from github.index import FlakinessIndex
+
     # Print header
     print()
     print("="*70)
@@ -129,7 +561,7 @@ def main():
         pr_info = parse_pr_url(pr_url)
         
         print("🔍 Fetching PR metadata...")
-        client = GitHubClient()
+        client = GitHubClient(max_workers=HISTORY_WORKERS, lean_json=True)
         pr = client.get_pull_request(
             pr_info["owner"],
             pr_info["repo"],
@@ -199,12 +631,42 @@ def main():
         print("="*70)
         print()
         
+        index_path = os.getenv("CI_INDEX_PATH")
+        index = FlakinessIndex.load(index_path) if index_path else None
+        
+        trace_path = os.getenv("CI_TRACE_PATH")
+        if trace_path:
+            from github.tracing import ChromeTraceExporter, add_hook
+            exporter = ChromeTraceExporter(trace_path)
+            add_hook(exporter)
+        
+        deadline = os.getenv("CI_DEADLINE_SECONDS")
+        
+        scoring_path = os.getenv("CI_SCORING_CONFIG")
+        if scoring_path:
+            from github.scoring import ScoringConfig
+            scoring = ScoringConfig.load(scoring_path)
+        else:
+            scoring = None
+        
         reliability_report = analyze_ci_reliability(
             client,
             pr_info["owner"],
             pr_info["repo"],
-            pr_info["number"]
+            pr_info["number"],
+            index=index,
+            workers=HISTORY_WORKERS,
+            include_base=index is not None,
+            deadline=float(deadline) if deadline else None,
+            change_points=True,
+            scoring=scoring
         )
+        
+        if index is not None:
+            index.save()
+        
+        if trace_path:
+            exporter.write()
 
         if not reliability_report:
             print("⚠️  No CI history data available for analysis")
@@ -245,6 +707,27 @@ def main():
                 elif metrics['consecutive_failures'] > 0:
                     print(f"   Recent Trend: {metrics['consecutive_failures']} consecutive failures")
                 
+                repo_reliability = report.get('repo_reliability')
+                if repo_reliability:
+                    print(f"   Repo-wide: {repo_reliability['classification']} " +
+                          f"({repo_reliability['confidence_score']}/100, " +
+                          f"{repo_reliability['window_pass_rate']:.1f}% pass rate over " +
+                          f"last {repo_reliability['window_runs']} runs)")
+                
+                for change in report.get('change_points', [])[-1:]:
+                    label = "Regressed" if change['direction'] == "regression" else "Recovered"
+                    print(f"   {label}: {change['pass_rate_before']:.0f}% -> " +
+                          f"{change['pass_rate_after']:.0f}% pass rate starting at " +
+                          f"{(change['sha'] or '')[:7]} ({change['commit_date']})")
+                
+                completeness = report.get('completeness')
+                if completeness and not completeness['complete']:
+                    print(f"   Partial Data: {completeness['runs_fetched']} run(s) fetched, " +
+                          f"{completeness['runs_missing']} commit(s) unknown " +
+                          f"({completeness['ratio']:.0%} complete; " +
+                          f"{completeness['commits_cancelled']} past deadline, " +
+                          f"{completeness['commits_failed']} failed)")
+                
                 print(f"   Analysis: {report['reason']}")
                 print()
             
@@ -0,0 +1,268 @@
+"""
+Bulk CI Backfill
+Resumable walk of a branch's history into a local SQLite store of CI outcomes
+"""
+
+import sqlite3
+import time
+
+from .history import _commit_outcomes, _fetch_commit_ci
+
+# Per commit: one check-runs and one statuses request
+REQUESTS_PER_COMMIT = 2
+# Requests held back for everything else the process does
+DEFAULT_RESERVE = 100
+
+
+class BackfillStore:
+    """
+    SQLite store of backfilled CI outcomes and per-branch walk checkpoints
+
+    The checkpoint is the sha the next listing starts from, so stopping at
+    any point (budget exhausted, interrupted) resumes at the first commit
+    not yet listed. Commits whose CI could not be fetched are kept as
+    "failed" and retried by later walks.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS outcomes (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                check_name TEXT NOT NULL,
+                outcome TEXT NOT NULL,
+                commit_date TEXT,
+                PRIMARY KEY (owner, repo, sha, check_name)
+            );
+            CREATE TABLE IF NOT EXISTS commits (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                sha TEXT NOT NULL,
+                status TEXT NOT NULL,
+                commit_date TEXT,
+                PRIMARY KEY (owner, repo, sha)
+            );
+            CREATE TABLE IF NOT EXISTS progress (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                branch TEXT NOT NULL,
+                next_sha TEXT,
+                finished INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (owner, repo, branch)
+            );
+            """
+        )
+        # Stores created before failed commits were retried lack their dates
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(commits)")]
+        if "commit_date" not in columns:
+            self.conn.execute("ALTER TABLE commits ADD COLUMN commit_date TEXT")
+        self.conn.commit()
+
+    def get_progress(self, owner, repo, branch):
+        """Return (next_sha, finished) for a branch walk; (None, False) if never started"""
+        row = self.conn.execute(
+            "SELECT next_sha, finished FROM progress WHERE owner = ? AND repo = ? AND branch = ?",
+            (owner, repo, branch)
+        ).fetchone()
+        return (row[0], bool(row[1])) if row else (None, False)
+
+    def has_commit(self, owner, repo, sha):
+        """Whether a walk already reached this commit (its CI stored or failed)"""
+        row = self.conn.execute(
+            "SELECT 1 FROM commits WHERE owner = ? AND repo = ? AND sha = ?", (owner, repo, sha)
+        ).fetchone()
+        return row is not None
+
+    def failed_commits(self, owner, repo, limit=None):
+        """Commits whose CI fetch failed, shaped like listing entries, oldest first"""
+        rows = self.conn.execute(
+            "SELECT sha, commit_date FROM commits WHERE owner = ? AND repo = ? AND status = 'failed' "
+            "ORDER BY commit_date, sha LIMIT ?",
+            (owner, repo, -1 if limit is None else limit)
+        )
+        return [{"sha": sha, "commit": {"committer": {"date": commit_date}}} for sha, commit_date in rows]
+
+    def save_commits(self, owner, repo, commits, ci_data):
+        """Store fetched commits (None data marks a failed fetch) in one transaction"""
+        with self.conn:
+            self._store_commits(owner, repo, commits, ci_data)
+
+    def save_chunk(self, owner, repo, branch, commits, ci_data, next_sha, finished):
+        """Store one chunk of commits and advance the checkpoint in one transaction"""
+        with self.conn:
+            self._store_commits(owner, repo, commits, ci_data)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO progress (owner, repo, branch, next_sha, finished) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (owner, repo, branch, next_sha, 1 if finished else 0)
+            )
+
+    def _store_commits(self, owner, repo, commits, ci_data):
+        for commit, data in zip(commits, ci_data):
+            status = "failed" if data is None else "done"
+            commit_date = commit.get("commit", {}).get("committer", {}).get("date", "")
+            self.conn.execute(
+                "INSERT OR REPLACE INTO commits (owner, repo, sha, status, commit_date) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (owner, repo, commit["sha"], status, commit_date)
+            )
+            if data is None:
+                continue
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO outcomes "
+                "(owner, repo, sha, check_name, outcome, commit_date) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (owner, repo, record["sha"], name, record["outcome"], record["commit_date"])
+                    for name, record in _commit_outcomes(commit, *data)
+                ]
+            )
+
+    def check_history(self, owner, repo):
+        """Stored outcomes as a check_history dict, oldest commit first"""
+        rows = self.conn.execute(
+            "SELECT check_name, sha, outcome, commit_date FROM outcomes "
+            "WHERE owner = ? AND repo = ? ORDER BY commit_date, sha",
+            (owner, repo)
+        )
+        history = {}
+        for name, sha, outcome, commit_date in rows:
+            history.setdefault(name, []).append(
+                {"sha": sha, "outcome": outcome, "commit_date": commit_date}
+            )
+        return history
+
+    def counts(self, owner, repo):
+        """Number of stored commits and outcomes for a repository"""
+        commits = self.conn.execute(
+            "SELECT COUNT(*) FROM commits WHERE owner = ? AND repo = ?", (owner, repo)
+        ).fetchone()[0]
+        outcomes = self.conn.execute(
+            "SELECT COUNT(*) FROM outcomes WHERE owner = ? AND repo = ?", (owner, repo)
+        ).fetchone()[0]
+        return {"commits": commits, "outcomes": outcomes}
+
+    def close(self):
+        self.conn.close()
+
+
+def backfill_branch(client, store, owner, repo, branch, since=None, max_commits=None,
+                    budget=None, workers=8, per_page=100, progress=None):
+    """
+    Walk a branch newest-first and store the CI outcomes of every commit
+
+    Commits whose fetch failed in earlier walks are retried first. Then
+    commits are listed a page at a time from the checkpointed sha and each
+    page's check runs and statuses are fetched concurrently; the next page
+    starts at the last listed commit's first parent. A walk ends at the
+    first commit an earlier walk already reached, so once the branch has
+    been walked to the end (or `since`), later calls start again at the
+    branch head and only store commits pushed since. The walk also stops
+    after max_commits, or before a chunk that would overspend the request
+    budget; the checkpoint makes the next call resume where this one stopped.
+
+    Args:
+        since: Optional ISO 8601 date; older commits are not backfilled
+        budget: Requests this call may spend; defaults to the live
+                /rate_limit remaining minus DEFAULT_RESERVE
+        workers: Concurrent commit fetches (size the client's pool to match)
+        progress: Optional callback(stats) after each stored chunk
+
+    Returns:
+        Stats dict with commits, retried, failed_commits, outcomes,
+        requests, elapsed seconds, commits_per_minute, finished and next_sha
+    """
+    if budget is None:
+        budget = client.get_rate_limit()["remaining"] - DEFAULT_RESERVE
+
+    next_sha, finished = store.get_progress(owner, repo, branch)
+    if finished:
+        # The branch was walked to the end; start over at its head for new commits
+        next_sha, finished = None, False
+    stats = {"commits": 0, "retried": 0, "failed_commits": 0, "outcomes": 0, "requests": 0,
+             "elapsed": 0.0, "commits_per_minute": 0.0, "finished": finished, "next_sha": next_sha}
+    start = time.perf_counter()
+
+    executor = None
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        executor = ThreadPoolExecutor(max_workers=workers)
+
+    def fetch(chunk):
+        if executor is not None:
+            ci_data = list(executor.map(
+                lambda commit: _fetch_commit_ci(client, owner, repo, commit["sha"]), chunk
+            ))
+        else:
+            ci_data = [_fetch_commit_ci(client, owner, repo, commit["sha"]) for commit in chunk]
+        stats["requests"] += REQUESTS_PER_COMMIT * len(chunk)
+        stats["failed_commits"] += sum(1 for data in ci_data if data is None)
+        stats["outcomes"] += sum(
+            len(data[0]) + len(data[1]) for data in ci_data if data is not None
+        )
+        return ci_data
+
+    try:
+        retry = store.failed_commits(owner, repo, limit=max(budget // REQUESTS_PER_COMMIT, 0))
+        if retry:
+            ci_data = fetch(retry)
+            store.save_commits(owner, repo, retry, ci_data)
+            stats["retried"] = sum(1 for data in ci_data if data is not None)
+
+        while not finished:
+            if max_commits is not None and stats["commits"] >= max_commits:
+                break
+            if stats["requests"] + 1 + REQUESTS_PER_COMMIT > budget:
+                break
+
+            listing = client.get_branch_commits(owner, repo, next_sha or branch,
+                                                per_page=per_page, since=since)
+            stats["requests"] += 1
+
+            # Everything from the first commit an earlier walk reached is stored
+            fresh = []
+            for commit in listing:
+                if store.has_commit(owner, repo, commit["sha"]):
+                    break
+                fresh.append(commit)
+            room = (budget - stats["requests"]) // REQUESTS_PER_COMMIT
+            if max_commits is not None:
+                room = min(room, max_commits - stats["commits"])
+            chunk = fresh[:room]
+
+            if len(chunk) < len(fresh):
+                # Stopped mid-page: resume at the first commit not stored
+                next_sha = fresh[len(chunk)]["sha"]
+            elif len(fresh) < len(listing) or len(listing) < per_page or not listing[-1].get("parents"):
+                finished = True
+                next_sha = None
+            else:
+                # Continue below this page so every listing makes progress
+                next_sha = listing[-1]["parents"][0]["sha"]
+
+            ci_data = fetch(chunk)
+            store.save_chunk(owner, repo, branch, chunk, ci_data, next_sha, finished)
+
+            stats["commits"] += len(chunk)
+            stats["next_sha"] = next_sha
+            stats["finished"] = finished
+            _update_throughput(stats, start)
+            if progress:
+                progress(dict(stats))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    stats["finished"] = finished
+    _update_throughput(stats, start)
+    return stats
+
+
+def _update_throughput(stats, start):
+    stats["elapsed"] = time.perf_counter() - start
+    stats["commits_per_minute"] = (
+        round(stats["commits"] / stats["elapsed"] * 60, 1) if stats["elapsed"] > 0 else 0.0
+    )
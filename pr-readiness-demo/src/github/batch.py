@@ -0,0 +1,235 @@
+"""
+Sharded Batch Analysis
+Multi-process work queue for analyzing many PRs with SQLite checkpointing
+"""
+
+import json
+import multiprocessing
+import os
+import sqlite3
+
+from .metrics import BATCH_JOB_RESULTS, REGISTRY
+
+_worker_client = None
+_worker_scoring = None
+
+
+class JobStore:
+    """
+    SQLite-backed checkpoint of (owner, repo, number) analysis jobs
+
+    Only the parent process writes to the store, so completed jobs are
+    durable as soon as they are reported and an interrupted run resumes
+    with just the jobs that never finished.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                owner TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                number TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                result TEXT,
+                error TEXT,
+                PRIMARY KEY (owner, repo, number)
+            )
+            """
+        )
+        self.conn.commit()
+
+    def add_jobs(self, jobs):
+        """Queue jobs, ignoring any that are already known"""
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO jobs (owner, repo, number) VALUES (?, ?, ?)",
+            [(j["owner"], j["repo"], str(j["number"])) for j in jobs]
+        )
+        self.conn.commit()
+
+    def requeue(self, jobs):
+        """Queue jobs again, including ones that already completed"""
+        self.add_jobs(jobs)
+        self.conn.executemany(
+            "UPDATE jobs SET status = 'pending' WHERE owner = ? AND repo = ? AND number = ?",
+            [(j["owner"], j["repo"], str(j["number"])) for j in jobs]
+        )
+        self.conn.commit()
+
+    def is_done(self, job):
+        row = self.conn.execute(
+            "SELECT 1 FROM jobs WHERE owner = ? AND repo = ? AND number = ? AND status = 'done'",
+            (job["owner"], job["repo"], str(job["number"]))
+        ).fetchone()
+        return row is not None
+
+    def complete(self, job, result):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, error = NULL "
+            "WHERE owner = ? AND repo = ? AND number = ?",
+            (json.dumps(result), job["owner"], job["repo"], str(job["number"]))
+        )
+        self.conn.commit()
+
+    def fail(self, job, error):
+        self.conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ? "
+            "WHERE owner = ? AND repo = ? AND number = ?",
+            (error, job["owner"], job["repo"], str(job["number"]))
+        )
+        self.conn.commit()
+
+    def results(self):
+        """Completed reports keyed by 'owner/repo#number'"""
+        rows = self.conn.execute(
+            "SELECT owner, repo, number, result FROM jobs WHERE status = 'done' ORDER BY rowid"
+        ).fetchall()
+        return {f"{o}/{r}#{n}": json.loads(result) for o, r, n, result in rows}
+
+    def errors(self):
+        """Failed jobs keyed by 'owner/repo#number'"""
+        rows = self.conn.execute(
+            "SELECT owner, repo, number, error FROM jobs WHERE status = 'failed' ORDER BY rowid"
+        ).fetchall()
+        return {f"{o}/{r}#{n}": error for o, r, n, error in rows}
+
+    def close(self):
+        self.conn.close()
+
+
+def analyze_pr(owner, repo, number, max_commits=20):
+    """Default job function: analyze one PR with this process's client"""
+    global _worker_client, _worker_scoring
+    if _worker_client is None:
+        from .client import GitHubClient
+        _worker_client = GitHubClient(lean_json=True)
+        scoring_path = os.getenv("CI_SCORING_CONFIG")
+        if scoring_path:
+            from .scoring import ScoringConfig
+            _worker_scoring = ScoringConfig.load(scoring_path)
+
+    from .history import analyze_ci_reliability
+    return analyze_ci_reliability(_worker_client, owner, repo, number, max_commits=max_commits,
+                                  scoring=_worker_scoring)
+
+
+def score_prefetched(fetched, owner, repo, number):
+    """
+    Job function scoring a history fetched up front by multiplex.fetch_check_histories
+
+    Gives the same report as analyze_pr without any per-PR requests.
+    """
+    global _worker_scoring
+    if _worker_scoring is None and os.getenv("CI_SCORING_CONFIG"):
+        from .scoring import ScoringConfig
+        _worker_scoring = ScoringConfig.load(os.getenv("CI_SCORING_CONFIG"))
+
+    key = f"{owner}/{repo}#{number}"
+    if key not in fetched["histories"]:
+        raise ValueError(fetched["errors"].get(key, f"No history fetched for {key}"))
+
+    from .confidence import generate_confidence_report
+    engine = _worker_scoring.engine(owner, repo) if _worker_scoring is not None else None
+    return generate_confidence_report(fetched["histories"][key], engine=engine)
+
+
+def _run_job(args):
+    """Worker entry point; exceptions are returned rather than raised"""
+    analyze, job = args
+    try:
+        return job, analyze(job["owner"], job["repo"], job["number"]), None
+    except Exception as e:
+        return job, None, f"{type(e).__name__}: {e}"
+
+
+def _init_worker():
+    """Drop metrics a forked worker inherited so the parent does not count them twice"""
+    REGISTRY.drain()
+
+
+def _run_job_in_worker(args):
+    """_run_job in a pool process, also handing back the metrics it recorded"""
+    return _run_job(args) + (REGISTRY.drain(),)
+
+
+def run_batch(jobs, db_path, workers=4, analyze=analyze_pr, progress=None):
+    """
+    Analyze many PRs across worker processes, checkpointing each result
+
+    Args:
+        jobs: Iterable of {"owner", "repo", "number"} dicts; only these are
+              analyzed and reported, whatever else the database holds
+        db_path: SQLite checkpoint file; rerunning with the same file resumes
+        workers: Number of worker processes
+        analyze: Picklable function (owner, repo, number) -> report
+        progress: Optional callback(job, error) called as each job finishes
+
+    Returns:
+        Merged report from merge_reports()
+    """
+    # De-duplicated, with numbers as the store keeps them
+    jobs = {
+        _job_key(job): {"owner": job["owner"], "repo": job["repo"], "number": str(job["number"])}
+        for job in jobs
+    }
+    store = JobStore(db_path)
+    try:
+        store.add_jobs(jobs.values())
+        pending = [job for job in jobs.values() if not store.is_done(job)]
+
+        if pending:
+            work = [(analyze, job) for job in pending]
+            if workers > 1:
+                with multiprocessing.Pool(processes=workers, initializer=_init_worker) as pool:
+                    # chunksize=1 keeps shards balanced when PR sizes vary
+                    for job, result, error, drained in pool.imap_unordered(
+                            _run_job_in_worker, work, chunksize=1):
+                        REGISTRY.merge(drained)
+                        _checkpoint(store, job, result, error, progress)
+            else:
+                for item in work:
+                    _checkpoint(store, *_run_job(item), progress)
+
+        return merge_reports(
+            {key: report for key, report in store.results().items() if key in jobs},
+            {key: error for key, error in store.errors().items() if key in jobs}
+        )
+    finally:
+        store.close()
+
+
+def _job_key(job):
+    return f"{job['owner']}/{job['repo']}#{job['number']}"
+
+
+def _checkpoint(store, job, result, error, progress):
+    if error is None:
+        store.complete(job, result)
+    else:
+        store.fail(job, error)
+    BATCH_JOB_RESULTS.inc(outcome="done" if error is None else "failed")
+    if progress:
+        progress(job, error)
+
+
+def merge_reports(results, errors=None):
+    """
+    Merge per-PR reliability reports into one batch report
+
+    Returns:
+        Dict with per-PR "reports", "errors" and a classification "summary"
+        counting checks across every analyzed PR
+    """
+    summary = {}
+    for report in results.values():
+        for check in report.values():
+            classification = check["classification"]
+            summary[classification] = summary.get(classification, 0) + 1
+
+    return {
+        "reports": results,
+        "errors": errors or {},
+        "summary": summary
+    }
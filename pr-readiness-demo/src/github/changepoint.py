@@ -0,0 +1,121 @@
+"""
+Change-Point Detection
+Online CUSUM detector that finds the commit where a check's pass rate shifted
+"""
+
+# Half the smallest pass-rate shift worth reporting (detects shifts >= 0.5)
+DEFAULT_SLACK = 0.25
+# Cumulative evidence needed to report a shift
+DEFAULT_THRESHOLD = 2.5
+# Completed runs needed to establish a baseline pass rate
+DEFAULT_MIN_RUNS = 5
+
+
+class _Side:
+    """One-sided CUSUM: cumulative sum, and counts since it last left zero"""
+
+    __slots__ = ("total", "runs", "passes", "sha", "commit_date", "index")
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.total = 0.0
+        self.runs = 0
+        self.passes = 0
+        self.sha = None
+        self.commit_date = None
+        self.index = None
+
+
+class ChangePointDetector:
+    """
+    Two-sided Bernoulli CUSUM over one check's outcome stream
+
+    Each completed outcome is compared against the pass rate of the current
+    segment before the suspected change. Drops accumulate on the regression
+    side and rises on the recovery side. A side that crosses the threshold
+    reports a change at the outcome where it last left zero, which is the
+    CUSUM estimate of where the shift began. The segment then restarts
+    there. Steady flakiness around a stable rate keeps both sums near zero.
+    The update is O(1) time and memory per outcome.
+    """
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD, slack=DEFAULT_SLACK, min_runs=DEFAULT_MIN_RUNS):
+        self.threshold = threshold
+        self.slack = slack
+        self.min_runs = min_runs
+        self.runs = 0
+        self.segment_runs = 0
+        self.segment_passes = 0
+        self._down = _Side()
+        self._up = _Side()
+        self.changes = []
+
+    def update(self, outcome, sha=None, commit_date=None):
+        """
+        Feed one outcome (PASS/FAIL; anything else is ignored)
+
+        Returns:
+            The change dict if this outcome confirmed a shift, else None
+        """
+        if outcome != "PASS" and outcome != "FAIL":
+            return None
+        passed = 1 if outcome == "PASS" else 0
+        index = self.runs
+        self.runs += 1
+
+        change = None
+        for side, sign, direction in ((self._down, 1, "regression"), (self._up, -1, "recovery")):
+            baseline_runs = self.segment_runs - side.runs
+            if baseline_runs < self.min_runs:
+                continue
+            baseline = (self.segment_passes - side.passes) / baseline_runs
+
+            step = sign * (baseline - passed) - self.slack
+            if side.total + step <= 0:
+                side.reset()
+                continue
+            if side.total == 0:
+                side.sha, side.commit_date, side.index = sha, commit_date, index
+            side.total += step
+            side.runs += 1
+            side.passes += passed
+
+            if side.total > self.threshold and change is None:
+                change = {
+                    "direction": direction,
+                    "sha": side.sha,
+                    "commit_date": side.commit_date,
+                    "index": side.index,
+                    "pass_rate_before": round(baseline * 100, 1),
+                    "pass_rate_after": round(side.passes / side.runs * 100, 1),
+                    "detected_at": sha
+                }
+                changed = side
+
+        self.segment_runs += 1
+        self.segment_passes += passed
+
+        if change is not None:
+            # The new segment starts where the shift began
+            self.segment_runs = changed.runs
+            self.segment_passes = changed.passes
+            self._down.reset()
+            self._up.reset()
+            self.changes.append(change)
+        return change
+
+
+def detect_change_points(outcomes, **kwargs):
+    """
+    Run a ChangePointDetector over a check's outcome list (oldest first)
+
+    Returns:
+        List of change dicts with direction, sha, commit_date and the pass
+        rates before and after the shift
+    """
+    detector = ChangePointDetector(**kwargs)
+    for outcome in outcomes:
+        detector.update(outcome["outcome"], outcome.get("sha"), outcome.get("commit_date"))
+    return detector.changes
@@ -1,23 +1,148 @@
 import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote
+
 import requests
-from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
 
-load_dotenv()
+from . import metrics, tracing
+from .payloads import (
+    CHECK_RUN_FIELDS, STATUS_FIELDS, project_check_runs, project_records, project_statuses
+)
+from .tokens import TokenPool
 
 GITHUB_API = "https://api.github.com"
 
+# Default keep-alive pool size per host (matches requests' own default)
+DEFAULT_POOL_SIZE = 10
+
+# Per-request timeout in seconds (lowered to fit a deadline when one is set)
+REQUEST_TIMEOUT = 10
+
+# Rate-limit resource each endpoint is metered against; everything else is core
+ENDPOINT_RESOURCES = {"graphql": "graphql"}
+
+# Seconds between events-feed polls when GitHub sends no X-Poll-Interval
+DEFAULT_POLL_INTERVAL = 60
+
+_request_state = threading.local()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    """HTTPS pool that records when a request had to open a new connection"""
+
+    def _new_conn(self):
+        _request_state.new_connections = getattr(_request_state, "new_connections", 0) + 1
+        return super()._new_conn()
+
+
+class _PooledAdapter(HTTPAdapter):
+    """Adapter whose pools report connection creation to the client stats"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": HTTPConnectionPool,
+            "https": _CountingHTTPSConnectionPool
+        }
+
+
+def _url_attributes(url):
+    """owner, repo and (for commit endpoints) sha parsed from an API URL, for tracing"""
+    parts = url.split("?")[0].split("/")
+    try:
+        i = parts.index("repos")
+    except ValueError:
+        return {}
+    attributes = {"owner": parts[i + 1], "repo": parts[i + 2]} if len(parts) > i + 2 else {}
+    if len(parts) > i + 4 and parts[i + 3] == "commits":
+        attributes["sha"] = parts[i + 4]
+    return attributes
+
+
 class GitHubClient:
-    def __init__(self):
-        token = os.getenv("GITHUB_TOKEN")
-        if not token:
-            raise PermissionError("GITHUB_TOKEN not set in .env file")
+    def __init__(self, pool_size=DEFAULT_POOL_SIZE, max_workers=None, lean_json=False, tokens=None,
+                 payload_store=None):
+        """
+        Args:
+            pool_size: Keep-alive connections kept open to the API host
+            max_workers: Number of threads that will share this client; the
+                         pool grows to match so workers never open throwaway
+                         connections
+            lean_json: Decode check runs and statuses into compact records
+                       holding only the fields used for CI analysis
+            tokens: Personal access or App installation tokens to spread
+                    requests across; defaults to GITHUB_TOKENS/GITHUB_TOKEN
+            payload_store: PayloadStore recording check-run and status
+                           payloads; defaults to one at CI_PAYLOAD_STORE when
+                           that is set. Recorded payloads are revalidated
+                           with their ETag and served from disk on 304;
+                           objects repeated within a served payload are
+                           shared, so treat it as read-only.
+        """
+        # Load .env on construction rather than import so importing is cheap
+        from dotenv import load_dotenv
+        load_dotenv()
+
+        self.token_pool = TokenPool(tokens) if tokens else TokenPool.from_env()
+
+        if payload_store is None and os.getenv("CI_PAYLOAD_STORE"):
+            from .payload_store import PayloadStore
+            payload_store = PayloadStore(os.getenv("CI_PAYLOAD_STORE"))
+        self.payload_store = payload_store
+
+        self.pool_size = max(pool_size, max_workers or 0)
+        self.lean_json = lean_json
 
         self.session = requests.Session()
+        # pool_block makes extra threads wait for a pooled connection
+        # instead of opening one that is discarded after the request
+        adapter = _PooledAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            pool_block=True
+        )
+        self.session.mount("https://", adapter)
         self.session.headers.update({
-            "Authorization": f"token {token}",
-            "Accept": "application/vnd.github+json"
+            "Accept": "application/vnd.github+json",
+            "Connection": "keep-alive"
         })
-    
+
+        # Per-thread time.monotonic() deadlines; see deadline_scope()
+        self._local = threading.local()
+
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "requests": 0,
+            "new_connections": 0,
+            "reused_connections": 0,
+            "compressed_responses": 0,
+            "endpoints": {}
+        }
+
+    @property
+    def deadline(self):
+        """time.monotonic() deadline bounding this thread's requests, or None"""
+        return getattr(self._local, "deadline", None)
+
+    @contextmanager
+    def deadline_scope(self, deadline_at):
+        """
+        Bound every request the calling thread sends inside the block
+
+        Deadlines are per thread, so a worker abandoned at the deadline keeps
+        it after the caller's block exits and cannot send at full timeout.
+        """
+        previous = self.deadline
+        self._local.deadline = deadline_at
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+
     def _handle_rate_limit(self, response):
         """Check and handle rate limit responses"""
         if response.status_code == 403:
@@ -31,72 +156,404 @@ class GitHubClient:
                 )
             else:
                 raise PermissionError("Access denied. Check your token permissions or if the repository is private.")
-        
+
     def _check_response(self, response, error_context="GitHub API request"):
         """Centralized response checking with detailed error messages"""
         if response.status_code == 404:
             raise ValueError(f"{error_context} failed: Resource not found (404). Check if PR/repository exists and is public.")
-        
+
         self._handle_rate_limit(response)
-        
+
         if response.status_code >= 500:
             raise ConnectionError(f"{error_context} failed: GitHub server error ({response.status_code}). Try again later.")
-        
+
         if not response.ok:
             raise RuntimeError(f"{error_context} failed with status {response.status_code}: {response.text[:200]}")
 
+    def _get(self, url, endpoint, error_context, timeout_message, network_message, headers=None,
+             body=None):
+        """
+        Issue a GET on the shared pooled session and record reuse statistics
+
+        The request is sent with the pooled token that has the most budget
+        left; if that token turns out to be exhausted it is retried with the
+        next one until the pool runs dry. A JSON body turns it into a POST
+        (GraphQL queries).
+        """
+        with tracing.span("github.request", endpoint=endpoint) as span:
+            if span:
+                span.update(_url_attributes(url))
+            r = self._send(url, endpoint, timeout_message, network_message, span, headers, body)
+            self._check_response(r, error_context)
+        return r
+
+    def _send(self, url, endpoint, timeout_message, network_message, span, headers=None, body=None):
+        """
+        Send the request, rotating tokens past exhausted ones
+
+        Each token is tried at most once, so a rate limit whose reset time
+        has already passed locally cannot make the loop re-send forever.
+        Tokens are picked by their budget for the endpoint's rate-limit
+        resource (GraphQL is metered apart from the core REST budget).
+        """
+        resource = ENDPOINT_RESOURCES.get(endpoint, "core")
+        for _ in range(len(self.token_pool)):
+            token = self.token_pool.acquire(resource=resource)
+            if token is None:
+                raise ConnectionError(
+                    f"GitHub API {resource} rate limit exceeded on all tokens. Resets at Unix timestamp: "
+                    f"{self.token_pool.earliest_reset(resource)}. "
+                    "Consider adding tokens to GITHUB_TOKENS or waiting before retrying."
+                )
+
+            timeout = REQUEST_TIMEOUT
+            deadline = self.deadline
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    metrics.API_REQUESTS.inc(endpoint=endpoint, outcome="deadline")
+                    raise ConnectionError("Analysis deadline expired before the request was sent.")
+
+            _request_state.new_connections = 0
+            start = time.perf_counter()
+            try:
+                r = self.session.request(
+                    "GET" if body is None else "POST", url, json=body,
+                    headers=dict(headers or {}, Authorization=f"token {token}"), timeout=timeout
+                )
+            except requests.exceptions.Timeout:
+                metrics.API_REQUESTS.inc(endpoint=endpoint, outcome="timeout")
+                raise ConnectionError(timeout_message)
+            except requests.exceptions.ConnectionError:
+                metrics.API_REQUESTS.inc(endpoint=endpoint, outcome="network_error")
+                raise ConnectionError(network_message)
+
+            self._record_request(endpoint, r, _request_state.new_connections)
+            self.token_pool.update(token, r.headers, resource)
+            self._record_metrics(endpoint, token, r, time.perf_counter() - start)
+            span.set("status", r.status_code)
+
+            rate_limited = r.status_code in (403, 429) and r.headers.get('X-RateLimit-Remaining') == '0'
+            if not rate_limited:
+                return r
+            if not self.token_pool.has_available(resource=resource):
+                break
+
+        raise ConnectionError(
+            f"GitHub API {resource} rate limit exceeded on every token. Resets at Unix timestamp: "
+            f"{r.headers.get('X-RateLimit-Reset', 'unknown')}. "
+            "Consider adding tokens to GITHUB_TOKENS or waiting before retrying."
+        )
+
+    def get_rate_limit(self):
+        """
+        Live core API budget summed across every token in the pool
+
+        /rate_limit requests do not count against the limit, so each token
+        is queried directly and its state in the pool refreshed.
+
+        Returns:
+            Dict with total "remaining" and "limit" and the earliest "reset"
+        """
+        budget = {"remaining": 0, "limit": 0, "reset": None}
+        for token in self.token_pool.tokens():
+            try:
+                r = self.session.get(
+                    f"{GITHUB_API}/rate_limit",
+                    headers={"Authorization": f"token {token}"}, timeout=REQUEST_TIMEOUT
+                )
+            except requests.exceptions.Timeout:
+                raise ConnectionError("Request timed out while fetching rate limit.")
+            except requests.exceptions.ConnectionError:
+                raise ConnectionError("Network connection failed while fetching rate limit.")
+            self._check_response(r, "Fetching rate limit")
+
+            core = r.json()["resources"]["core"]
+            self.token_pool.update(token, {
+                "X-RateLimit-Remaining": core["remaining"],
+                "X-RateLimit-Limit": core["limit"],
+                "X-RateLimit-Reset": core["reset"]
+            })
+            budget["remaining"] += core["remaining"]
+            budget["limit"] += core["limit"]
+            if budget["reset"] is None or core["reset"] < budget["reset"]:
+                budget["reset"] = core["reset"]
+        return budget
+
+    def token_usage(self):
+        """Return per-token request counts and rate-limit headroom"""
+        return self.token_pool.usage()
+
+    def _record_request(self, endpoint, response, new_connections):
+        """Update per-client and per-endpoint connection reuse statistics"""
+        reused = 1 if new_connections == 0 else 0
+        compressed = 1 if response.headers.get("Content-Encoding") in ("gzip", "deflate") else 0
+
+        with self._stats_lock:
+            endpoint_stats = self.stats["endpoints"].setdefault(endpoint, {
+                "requests": 0,
+                "new_connections": 0,
+                "reused_connections": 0
+            })
+            for stats in (self.stats, endpoint_stats):
+                stats["requests"] += 1
+                stats["new_connections"] += new_connections
+                stats["reused_connections"] += reused
+            self.stats["compressed_responses"] += compressed
+
+    def _record_metrics(self, endpoint, token, response, elapsed):
+        """Export one request to the process-wide metrics registry"""
+        outcome = metrics.response_outcome(response)
+        metrics.API_REQUESTS.inc(endpoint=endpoint, outcome=outcome)
+        metrics.API_LATENCY.observe(elapsed, endpoint=endpoint, outcome=outcome)
+        if _request_state.new_connections:
+            metrics.CONNECTIONS_OPENED.inc(_request_state.new_connections, endpoint=endpoint)
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            metrics.RATE_LIMIT_REMAINING.set(int(remaining), token=self.token_pool.label(token))
+
+    def connection_stats(self):
+        """Return a snapshot of connection reuse statistics"""
+        with self._stats_lock:
+            total = self.stats["requests"]
+            snapshot = dict(self.stats)
+            snapshot["endpoints"] = {k: dict(v) for k, v in self.stats["endpoints"].items()}
+        snapshot["reuse_ratio"] = round(snapshot["reused_connections"] / total, 3) if total else 0
+        return snapshot
+
+    def _iter_pages(self, url, endpoint, what, extract, per_page=100):
+        """Yield items page by page, holding only one page in memory"""
+        separator = "&" if "?" in url else "?"
+        page = 1
+        while True:
+            r = self._get(
+                f"{url}{separator}per_page={per_page}&page={page}", endpoint,
+                f"Fetching {what}",
+                f"Request timed out while fetching {what}.",
+                f"Network connection failed while fetching {what}."
+            )
+            items = extract(r)
+            yield from items
+            if len(items) < per_page:
+                return
+            page += 1
+
+    def graphql(self, query, variables=None, allow_partial=False):
+        """
+        Run a GraphQL query
+
+        Args:
+            allow_partial: Return the data even when some fields errored
+                           (e.g. one aliased PR not found); those fields
+                           are null
+
+        Returns:
+            The response's "data" dict
+        """
+        r = self._get(
+            f"{GITHUB_API}/graphql", "graphql",
+            "GraphQL query",
+            "Request timed out while running a GraphQL query.",
+            "Network connection failed while running a GraphQL query.",
+            body={"query": query, "variables": variables or {}}
+        )
+        payload = r.json()
+        errors = payload.get("errors")
+        if errors and (not allow_partial or not payload.get("data")):
+            messages = "; ".join(error.get("message", "unknown error") for error in errors[:3])
+            if all(error.get("type") == "NOT_FOUND" for error in errors):
+                raise ValueError(f"GraphQL query failed: {messages}")
+            if any(error.get("type") == "RATE_LIMITED" for error in errors):
+                raise ConnectionError(f"GitHub GraphQL rate limit exceeded: {messages}")
+            raise RuntimeError(f"GraphQL query failed: {messages}")
+        return payload.get("data") or {}
+
+    def _get_stored(self, url, endpoint, what):
+        """
+        GET a JSON payload through the payload store
+
+        A recorded payload is revalidated with its ETag; a 304 (which does
+        not count against the rate limit) is answered from disk, anything
+        else is recorded.
+        """
+        key = url[len(GITHUB_API):]
+        etag = self.payload_store.etag(key)
+        r = self._get(
+            url, endpoint,
+            f"Fetching {what}",
+            f"Request timed out while fetching {what}.",
+            f"Network connection failed while fetching {what}.",
+            headers={"If-None-Match": etag} if etag else None
+        )
+        if r.status_code == 304:
+            stored = self.payload_store.get(key)
+            if stored is not None:
+                return stored[0]
+            # Recorded entry vanished (e.g. store replaced): fetch it fresh
+            r = self._get(
+                url, endpoint,
+                f"Fetching {what}",
+                f"Request timed out while fetching {what}.",
+                f"Network connection failed while fetching {what}."
+            )
+        payload = r.json()
+        self.payload_store.put(key, payload, r.headers.get("ETag"))
+        return payload
+
     def get_pull_request(self, owner: str, repo: str, number: str):
         url = f"{GITHUB_API}/repos/{owner}/{repo}/pulls/{number}"
-        try:
-            r = self.session.get(url, timeout=10)
-        except requests.exceptions.Timeout:
-            raise ConnectionError("Request timed out. Check your internet connection.")
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError("Network connection failed. Check your internet connection.")
-        
-        self._check_response(r, f"Fetching PR #{number}")
+        r = self._get(
+            url, "pulls",
+            f"Fetching PR #{number}",
+            "Request timed out. Check your internet connection.",
+            "Network connection failed. Check your internet connection."
+        )
         return r.json()
 
+    def get_repo_events(self, owner, repo, etag=None):
+        """
+        Fetch a repository's recent events, conditional on a previous ETag
+
+        Unchanged feeds answer 304, which does not count against the rate
+        limit.
+
+        Returns:
+            (events, etag, poll_interval) where events is None when the feed
+            is unchanged and poll_interval is the server's X-Poll-Interval
+        """
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/events?per_page=100"
+        r = self._get(
+            url, "events",
+            "Fetching repository events",
+            "Request timed out while fetching repository events.",
+            "Network connection failed while fetching repository events.",
+            headers={"If-None-Match": etag} if etag else None
+        )
+        poll_interval = int(r.headers.get("X-Poll-Interval", DEFAULT_POLL_INTERVAL))
+        if r.status_code == 304:
+            return None, etag, poll_interval
+        return r.json(), r.headers.get("ETag", etag), poll_interval
+
     def get_pr_head_sha(self, owner, repo, number):
         pr = self.get_pull_request(owner, repo, number)
         return pr["head"]["sha"]
-    
+
     def get_check_runs(self, owner, repo, sha):
         url = f"{GITHUB_API}/repos/{owner}/{repo}/commits/{sha}/check-runs"
-        try:
-            r = self.session.get(url, timeout=10)
-        except requests.exceptions.Timeout:
-            raise ConnectionError("Request timed out while fetching check runs.")
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError("Network connection failed while fetching check runs.")
-        
-        self._check_response(r, "Fetching check runs")
+        if self.payload_store is not None:
+            check_runs = self._get_stored(url, "check-runs", "check runs").get("check_runs", [])
+            return project_records(check_runs, CHECK_RUN_FIELDS) if self.lean_json else check_runs
+        r = self._get(
+            url, "check-runs",
+            "Fetching check runs",
+            "Request timed out while fetching check runs.",
+            "Network connection failed while fetching check runs."
+        )
+        if self.lean_json:
+            return project_check_runs(r.content)
         return r.json().get("check_runs", [])
-    
+
     def get_commit_statuses(self, owner, repo, sha):
         url = f"{GITHUB_API}/repos/{owner}/{repo}/commits/{sha}/statuses"
-        try:
-            r = self.session.get(url, timeout=10)
-        except requests.exceptions.Timeout:
-            raise ConnectionError("Request timed out while fetching commit statuses.")
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError("Network connection failed while fetching commit statuses.")
-        
-        self._check_response(r, "Fetching commit statuses")
+        if self.payload_store is not None:
+            statuses = self._get_stored(url, "statuses", "commit statuses")
+            return project_records(statuses, STATUS_FIELDS) if self.lean_json else statuses
+        r = self._get(
+            url, "statuses",
+            "Fetching commit statuses",
+            "Request timed out while fetching commit statuses.",
+            "Network connection failed while fetching commit statuses."
+        )
+        if self.lean_json:
+            return project_statuses(r.content)
         return r.json()
-    
+
     def get_pr_commits(self, owner, repo, number):
         """Fetch all commits from the PR"""
         url = f"{GITHUB_API}/repos/{owner}/{repo}/pulls/{number}/commits"
-        try:
-            r = self.session.get(url, timeout=10)
-        except requests.exceptions.Timeout:
-            raise ConnectionError("Request timed out while fetching PR commits.")
-        except requests.exceptions.ConnectionError:
-            raise ConnectionError("Network connection failed while fetching PR commits.")
-        
-        self._check_response(r, "Fetching PR commits")
+        r = self._get(
+            url, "pr-commits",
+            "Fetching PR commits",
+            "Request timed out while fetching PR commits.",
+            "Network connection failed while fetching PR commits."
+        )
+        return r.json()
+
+    def iter_pr_commits(self, owner, repo, number, per_page=100):
+        """Stream all commits of a PR, oldest first, one page at a time"""
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/pulls/{number}/commits"
+        return self._iter_pages(url, "pr-commits", "PR commits", lambda r: r.json(), per_page)
+
+    def iter_check_runs(self, owner, repo, sha, per_page=100):
+        """Stream all check runs of a commit, one page at a time"""
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/commits/{sha}/check-runs"
+        if self.lean_json:
+            extract = lambda r: project_check_runs(r.content)
+        else:
+            extract = lambda r: r.json().get("check_runs", [])
+        return self._iter_pages(url, "check-runs", "check runs", extract, per_page)
+
+    def iter_commit_statuses(self, owner, repo, sha, per_page=100):
+        """Stream all statuses of a commit, one page at a time"""
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/commits/{sha}/statuses"
+        if self.lean_json:
+            extract = lambda r: project_statuses(r.content)
+        else:
+            extract = lambda r: r.json()
+        return self._iter_pages(url, "statuses", "commit statuses", extract, per_page)
+
+    def get_branch_commits(self, owner, repo, branch, per_page=100, page=1, since=None):
+        """
+        Fetch one page of a branch's commits, newest first
+
+        branch may also be a commit sha (listing that commit and its
+        ancestors); since is an ISO 8601 date bounding the oldest commit.
+        """
+        url = (f"{GITHUB_API}/repos/{owner}/{repo}/commits"
+               f"?sha={quote(branch, safe='')}&per_page={per_page}&page={page}")
+        if since:
+            url += f"&since={quote(since, safe='')}"
+        r = self._get(
+            url, "branch-commits",
+            f"Fetching commits for branch {branch}",
+            "Request timed out while fetching branch commits.",
+            "Network connection failed while fetching branch commits."
+        )
+        return r.json()
+
+    def get_pull_requests(self, owner, repo, state="open", sort="updated", direction="desc",
+                          per_page=100, page=1):
+        """Fetch one page of the repository's pull requests (default: most recently updated first)"""
+        url = (f"{GITHUB_API}/repos/{owner}/{repo}/pulls?state={state}&sort={sort}"
+               f"&direction={direction}&per_page={per_page}&page={page}")
+        r = self._get(
+            url, "pulls",
+            "Fetching pull requests",
+            "Request timed out while fetching pull requests.",
+            "Network connection failed while fetching pull requests."
+        )
         return r.json()
 
-    
-    
\ No newline at end of file
+    def get_workflow_runs(self, owner, repo, branch=None, per_page=100, page=1):
+        """Fetch one page of the repository's GitHub Actions workflow runs, newest first"""
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/actions/runs?per_page={per_page}&page={page}"
+        if branch:
+            url += f"&branch={quote(branch, safe='')}"
+        r = self._get(
+            url, "workflow-runs",
+            "Fetching workflow runs",
+            "Request timed out while fetching workflow runs.",
+            "Network connection failed while fetching workflow runs."
+        )
+        return r.json().get("workflow_runs", [])
+
+    def get_workflow_run_attempt(self, owner, repo, run_id, attempt):
+        """Fetch one earlier attempt of a re-run workflow run"""
+        url = f"{GITHUB_API}/repos/{owner}/{repo}/actions/runs/{run_id}/attempts/{attempt}"
+        r = self._get(
+            url, "workflow-run-attempts",
+            f"Fetching attempt {attempt} of workflow run {run_id}",
+            "Request timed out while fetching workflow run attempts.",
+            "Network connection failed while fetching workflow run attempts."
+        )
+        return r.json()
@@ -3,6 +3,13 @@ CI Confidence Scoring Engine
 Deterministic scoring system for CI reliability with transparent explanations
 """
 
+import time
+
+from . import tracing
+from .metrics import CHECKS_SCORED, REPORT_LATENCY
+from .scoring import DEFAULT_ENGINE
+
+
 def calculate_confidence_score(outcomes):
     """
     Calculate a deterministic confidence score (0-100) for a CI check
@@ -14,252 +21,138 @@ def calculate_confidence_score(outcomes):
     - UNSTABLE (10-30): Consistent failures or poor pass rate
     - UNKNOWN (40-60): Insufficient data
     
+    The rules themselves live in scoring.CONFIDENCE_RULES; this scores with
+    the default thresholds.
+    
     Args:
         outcomes: List of outcome dicts with 'outcome' field (PASS/FAIL/PENDING)
     
     Returns:
         dict with confidence_score, classification, reason, and metrics
     """
-    if not outcomes:
-        return {
-            "confidence_score": 40,
-            "classification": "UNKNOWN",
-            "reason": "No historical data available for this check",
-            "metrics": {
-                "total_runs": 0,
-                "passes": 0,
-                "failures": 0,
-                "pass_rate": 0,
-                "consecutive_passes": 0,
-                "consecutive_failures": 0,
-                "flaky_transitions": 0
-            }
-        }
-    
-    # Filter out PENDING status for analysis
-    completed_outcomes = [o for o in outcomes if o["outcome"] in ("PASS", "FAIL")]
-    
-    if not completed_outcomes:
-        return {
-            "confidence_score": 50,
-            "classification": "UNKNOWN",
-            "reason": "All runs are pending or incomplete",
-            "metrics": {
-                "total_runs": len(outcomes),
-                "passes": 0,
-                "failures": 0,
-                "pass_rate": 0,
-                "consecutive_passes": 0,
-                "consecutive_failures": 0,
-                "flaky_transitions": 0
-            }
-        }
-    
-    total_runs = len(completed_outcomes)
-    passes = sum(1 for o in completed_outcomes if o["outcome"] == "PASS")
-    failures = sum(1 for o in completed_outcomes if o["outcome"] == "FAIL")
-    pass_rate = (passes / total_runs) * 100 if total_runs > 0 else 0
-    
-    # Detect flakiness (alternating pass/fail patterns)
-    is_flaky, flaky_transitions = _detect_flakiness(completed_outcomes)
-    
-    # Calculate consecutive passes at the end (recent stability)
-    consecutive_passes = _count_consecutive_passes(completed_outcomes)
-    
-    # Calculate consecutive failures at the end (recent instability)
-    consecutive_failures = _count_consecutive_failures(completed_outcomes)
-    
-    metrics = {
-        "total_runs": total_runs,
-        "passes": passes,
-        "failures": failures,
-        "pass_rate": round(pass_rate, 1),
-        "consecutive_passes": consecutive_passes,
-        "consecutive_failures": consecutive_failures,
-        "flaky_transitions": flaky_transitions
-    }
-    
-    # --- Classification Logic (Deterministic & Explainable) ---
-    
-    # RELIABLE: No failures in substantial history
-    if total_runs >= 10 and failures == 0:
-        return {
-            "confidence_score": 100,
-            "classification": "RELIABLE",
-            "reason": f"Perfect track record: {total_runs} consecutive passes with no failures",
-            "metrics": metrics
-        }
-    
-    # RELIABLE: Very high pass rate with sufficient history (even with 1 failure at end)
-    if total_runs >= 15 and pass_rate >= 93:
-        score = 90 + min(10, int((pass_rate - 90)))  # 90-100
-        return {
-            "confidence_score": int(score),
-            "classification": "RELIABLE",
-            "reason": f"Highly stable: {pass_rate:.1f}% pass rate over {total_runs} runs ({failures} failure{'s' if failures > 1 else ''})",
-            "metrics": metrics
-        }
-    
-    # STABLE: Recent consecutive passes with good history (Check BEFORE flakiness)
-    if consecutive_passes >= 5 and pass_rate >= 70:
-        score = 70 + min(15, consecutive_passes * 2)  # 70-85
-        return {
-            "confidence_score": int(score),
-            "classification": "STABLE",
-            "reason": f"Recently stable: {consecutive_passes} consecutive passes (overall {pass_rate:.1f}% pass rate)",
-            "metrics": metrics
-        }
-    
-    # STABLE: Moderate consecutive passes (Check BEFORE flakiness)
-    if consecutive_passes >= 3 and pass_rate >= 60 and not is_flaky:
-        score = 70 + (consecutive_passes * 3)  # 79-85 range
-        return {
-            "confidence_score": min(85, int(score)),
-            "classification": "STABLE",
-            "reason": f"Stabilizing: {consecutive_passes} recent passes out of {total_runs} total runs",
-            "metrics": metrics
-        }
-    
-    # FLAKY: Alternating pass/fail patterns detected
-    if is_flaky:
-        # Score based on pass rate but cap at 50
-        score = max(20, min(50, int(pass_rate / 2)))
-        return {
-            "confidence_score": score,
-            "classification": "FLAKY",
-            "reason": f"Inconsistent behavior: {flaky_transitions} pass/fail transitions detected across {total_runs} runs",
-            "metrics": metrics
-        }
-    
-    # UNSTABLE: Consistent failures
-    if consecutive_failures >= 3:
-        score = max(10, 30 - (consecutive_failures * 3))  # Lower score for more failures
-        return {
-            "confidence_score": int(score),
-            "classification": "UNSTABLE",
-            "reason": f"Failing consistently: {consecutive_failures} consecutive failures",
-            "metrics": metrics
-        }
-    
-    # UNSTABLE: All runs failed
-    if failures == total_runs and total_runs >= 3:
-        return {
-            "confidence_score": 10,
-            "classification": "UNSTABLE",
-            "reason": f"Complete failure: All {total_runs} runs failed",
-            "metrics": metrics
-        }
-    
-    # UNSTABLE: Poor pass rate
-    if pass_rate < 50 and total_runs >= 5:
-        score = max(15, int(pass_rate / 2))  # 15-25 range
-        return {
-            "confidence_score": score,
-            "classification": "UNSTABLE",
-            "reason": f"Low reliability: {pass_rate:.1f}% pass rate ({passes}/{total_runs} runs)",
-            "metrics": metrics
-        }
-    
-    # UNKNOWN: Insufficient data
-    if total_runs < 3:
-        score = 40 + (total_runs * 5)  # 45-50 range
-        return {
-            "confidence_score": score,
-            "classification": "UNKNOWN",
-            "reason": f"Insufficient data: Only {total_runs} run(s) available",
-            "metrics": metrics
-        }
-    
-    # DEFAULT: Moderate pass rate, no clear pattern
-    score = int(pass_rate * 0.7)  # Scale down to 0-70 range
-    if pass_rate >= 60:
-        classification = "STABLE"
-        reason = f"Moderate stability: {pass_rate:.1f}% pass rate over {total_runs} runs"
-    else:
-        classification = "UNSTABLE"
-        reason = f"Unreliable: {pass_rate:.1f}% pass rate ({passes}/{total_runs} runs passed)"
+    return DEFAULT_ENGINE.score(outcomes)
+
+
+def _classify(metrics, is_flaky):
+    """
+    Apply the default rule table to precomputed metrics
     
-    return {
-        "confidence_score": max(30, min(70, score)),
-        "classification": classification,
-        "reason": reason,
-        "metrics": metrics
-    }
+    Shared by the streaming accumulator below and the constant-memory
+    summaries in decay.py, so every mode classifies identically.
+    """
+    return DEFAULT_ENGINE.classify(metrics, is_flaky)
 
 
-def _detect_flakiness(outcomes):
+class ConfidenceAccumulator:
     """
-    Detect if a check is flaky based on alternating pass/fail patterns
+    Streaming equivalent of calculate_confidence_score for one check
     
-    Returns:
-        (is_flaky: bool, transition_count: int)
+    Outcomes are fed one at a time, oldest first, and only running counters
+    are kept, so memory does not depend on history length. score() returns
+    exactly what calculate_confidence_score would for the same outcomes.
     """
-    if len(outcomes) < 4:
-        return False, 0
     
-    # Count transitions from PASS to FAIL or FAIL to PASS
-    transitions = 0
-    for i in range(1, len(outcomes)):
-        prev = outcomes[i-1]["outcome"]
-        curr = outcomes[i]["outcome"]
+    __slots__ = ("seen", "passes", "failures", "transitions", "last_completed",
+                 "consecutive_passes", "consecutive_failures", "current_status")
+    
+    def __init__(self):
+        self.seen = 0
+        self.passes = 0
+        self.failures = 0
+        self.transitions = 0
+        self.last_completed = None
+        self.consecutive_passes = 0
+        self.consecutive_failures = 0
+        self.current_status = "UNKNOWN"
+    
+    def add(self, outcome):
+        """Feed the next outcome string (PASS/FAIL/PENDING/UNKNOWN)"""
+        self.seen += 1
+        self.current_status = outcome
+        if outcome not in ("PASS", "FAIL"):
+            return
         
-        if prev in ("PASS", "FAIL") and curr in ("PASS", "FAIL") and prev != curr:
-            transitions += 1
-    
-    # Flaky if we have multiple transitions AND high transition rate
-    # At least 3 transitions AND 40%+ of runs are transitions (more strict)
-    transition_rate = transitions / len(outcomes) if len(outcomes) > 0 else 0
-    is_flaky = transitions >= 3 and transition_rate >= 0.35
-    
-    return is_flaky, transitions
-
-
-def _count_consecutive_passes(outcomes):
-    """Count consecutive passes at the end of the history"""
-    count = 0
-    for outcome in reversed(outcomes):
-        if outcome["outcome"] == "PASS":
-            count += 1
-        else:
-            break
-    return count
-
-
-def _count_consecutive_failures(outcomes):
-    """Count consecutive failures at the end of the history"""
-    count = 0
-    for outcome in reversed(outcomes):
-        if outcome["outcome"] == "FAIL":
-            count += 1
+        if self.last_completed is not None and self.last_completed != outcome:
+            self.transitions += 1
+        self.last_completed = outcome
+        
+        if outcome == "PASS":
+            self.passes += 1
+            self.consecutive_passes += 1
+            self.consecutive_failures = 0
         else:
-            break
-    return count
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.consecutive_passes = 0
+    
+    def score(self):
+        """Confidence data identical to calculate_confidence_score"""
+        total_runs = self.passes + self.failures
+        
+        if self.seen == 0:
+            return calculate_confidence_score([])
+        
+        if total_runs == 0:
+            result = calculate_confidence_score([{"outcome": "PENDING"}])
+            result["metrics"]["total_runs"] = self.seen
+            return result
+        
+        metrics = {
+            "total_runs": total_runs,
+            "passes": self.passes,
+            "failures": self.failures,
+            "pass_rate": round((self.passes / total_runs) * 100, 1),
+            "consecutive_passes": self.consecutive_passes,
+            "consecutive_failures": self.consecutive_failures,
+            "flaky_transitions": (self.transitions
+                                  if total_runs >= DEFAULT_ENGINE.thresholds["flaky_min_runs"] else 0)
+        }
+        return _classify(metrics, DEFAULT_ENGINE.is_flaky(total_runs, self.transitions))
 
 
-def generate_confidence_report(check_history):
+def generate_confidence_report(check_history, half_life_days=None, window_days=None, engine=None):
     """
     Generate a confidence report for all checks in a PR
     
     Args:
         check_history: Dict mapping check names to list of outcomes
+        half_life_days: Optional; score with exponential time decay instead
+        window_days: Optional; score only runs from the last N days instead
+        engine: Optional ScoringEngine with repository-specific thresholds
     
     Returns:
         Dict with per-check confidence scores and classifications
     """
+    if half_life_days is not None or window_days is not None:
+        from .decay import calculate_decayed_confidence_score
+        
+        def score(outcomes):
+            return calculate_decayed_confidence_score(
+                outcomes, half_life_days=half_life_days, window_days=window_days, engine=engine
+            )
+    elif engine is not None:
+        score = engine.score
+    else:
+        score = calculate_confidence_score
+    
+    start = time.perf_counter()
     report = {}
     
-    for check_name, outcomes in check_history.items():
-        confidence_data = calculate_confidence_score(outcomes)
-        
-        current_status = outcomes[-1]["outcome"] if outcomes else "UNKNOWN"
-        
-        report[check_name] = {
-            "check_name": check_name,
-            "current_status": current_status,
-            "confidence_score": confidence_data["confidence_score"],
-            "classification": confidence_data["classification"],
-            "reason": confidence_data["reason"],
-            "metrics": confidence_data["metrics"]
-        }
+    with tracing.span("ci.confidence_report", checks=len(check_history)):
+        for check_name, outcomes in check_history.items():
+            confidence_data = score(outcomes)
+            
+            current_status = outcomes[-1]["outcome"] if outcomes else "UNKNOWN"
+            
+            report[check_name] = {
+                "check_name": check_name,
+                "current_status": current_status,
+                "confidence_score": confidence_data["confidence_score"],
+                "classification": confidence_data["classification"],
+                "reason": confidence_data["reason"],
+                "metrics": confidence_data["metrics"]
+            }
+            CHECKS_SCORED.inc(classification=confidence_data["classification"])
     
+    REPORT_LATENCY.observe(time.perf_counter() - start)
     return report
@@ -0,0 +1,207 @@
+"""
+Time-Decayed Confidence Scoring
+Constant-memory per-check summaries that weight recent CI runs more heavily
+"""
+
+from datetime import datetime
+
+from .scoring import DEFAULT_ENGINE
+
+SECONDS_PER_DAY = 86400
+
+
+def parse_commit_date(commit_date):
+    """Convert a GitHub ISO-8601 timestamp into Unix seconds (None if missing)"""
+    if not commit_date:
+        return None
+    return datetime.fromisoformat(commit_date.replace("Z", "+00:00")).timestamp()
+
+
+class DecayedCheckSummary:
+    """
+    Fixed-size running summary of one check's outcome stream
+
+    Two modes are supported:
+    - half_life_days: exponential decay, a run's weight halves every half-life
+    - window_days: fixed time window, kept as one counter bucket per day
+
+    Memory use is constant in the number of outcomes fed in (a handful of
+    floats for decay mode, window_days buckets for window mode), so a
+    long-lived service can keep one summary per check indefinitely.
+    """
+
+    def __init__(self, half_life_days=None, window_days=None):
+        if (half_life_days is None) == (window_days is None):
+            raise ValueError("Specify exactly one of half_life_days or window_days")
+        if half_life_days is not None and not half_life_days > 0:
+            raise ValueError(f"half_life_days must be positive, got {half_life_days!r}")
+        if window_days is not None and (int(window_days) != window_days or window_days < 1):
+            raise ValueError(f"window_days must be a positive whole number of days, got {window_days!r}")
+
+        self.half_life = half_life_days * SECONDS_PER_DAY if half_life_days else None
+        self.window_days = int(window_days) if window_days else None
+
+        self.passes = 0.0
+        self.failures = 0.0
+        self.transitions = 0.0
+        self.buckets = [[0, 0, 0] for _ in range(self.window_days)] if window_days else None
+        self.bucket_days = [None] * self.window_days if window_days else None
+
+        self.last_time = None
+        self.last_outcome = None
+        self.consecutive_passes = 0
+        self.consecutive_failures = 0
+        self.total_seen = 0
+
+    def update(self, outcome, commit_date=None):
+        """Feed one outcome dict (or PASS/FAIL/PENDING string) into the summary"""
+        if isinstance(outcome, dict):
+            commit_date = outcome.get("commit_date", commit_date)
+            outcome = outcome["outcome"]
+
+        self.total_seen += 1
+        if outcome not in ("PASS", "FAIL"):
+            return
+
+        timestamp = parse_commit_date(commit_date)
+        if timestamp is None:
+            timestamp = self.last_time or 0.0
+
+        # Out-of-order runs only add weight; they cannot extend the recent trend
+        in_order = self.last_time is None or timestamp >= self.last_time
+        transition = in_order and self.last_outcome not in (None, outcome)
+
+        if self.half_life:
+            self._update_decayed(outcome, timestamp, in_order, transition)
+        else:
+            self._update_windowed(outcome, timestamp, transition)
+
+        if in_order:
+            if outcome == "PASS":
+                self.consecutive_passes += 1
+                self.consecutive_failures = 0
+            else:
+                self.consecutive_failures += 1
+                self.consecutive_passes = 0
+            self.last_outcome = outcome
+            self.last_time = timestamp
+
+    def _update_decayed(self, outcome, timestamp, in_order, transition):
+        if in_order:
+            if self.last_time is not None:
+                factor = 0.5 ** ((timestamp - self.last_time) / self.half_life)
+                self.passes *= factor
+                self.failures *= factor
+                self.transitions *= factor
+            weight = 1.0
+        else:
+            weight = 0.5 ** ((self.last_time - timestamp) / self.half_life)
+
+        if outcome == "PASS":
+            self.passes += weight
+        else:
+            self.failures += weight
+        if transition:
+            self.transitions += weight
+
+    def _update_windowed(self, outcome, timestamp, transition):
+        day = int(timestamp // SECONDS_PER_DAY)
+        newest_day = int(max(timestamp, self.last_time or timestamp) // SECONDS_PER_DAY)
+        if day <= newest_day - self.window_days:
+            return
+
+        slot = day % self.window_days
+        if self.bucket_days[slot] != day:
+            self.buckets[slot] = [0, 0, 0]
+            self.bucket_days[slot] = day
+
+        bucket = self.buckets[slot]
+        bucket[0 if outcome == "PASS" else 1] += 1
+        if transition:
+            bucket[2] += 1
+
+    def metrics(self, now=None):
+        """
+        Effective metrics for the summary as of `now` (Unix seconds)
+
+        Defaults to the time of the newest run so results are reproducible.
+        """
+        if now is None:
+            now = self.last_time
+
+        if self.half_life:
+            factor = 1.0
+            if now is not None and self.last_time is not None and now > self.last_time:
+                factor = 0.5 ** ((now - self.last_time) / self.half_life)
+            passes = self.passes * factor
+            failures = self.failures * factor
+            transitions = self.transitions * factor
+        else:
+            passes = failures = transitions = 0
+            if now is not None:
+                today = int(now // SECONDS_PER_DAY)
+                for day, bucket in zip(self.bucket_days, self.buckets):
+                    if day is not None and today - self.window_days < day <= today:
+                        passes += bucket[0]
+                        failures += bucket[1]
+                        transitions += bucket[2]
+
+        passes = round(passes, 2)
+        failures = round(failures, 2)
+        total_runs = round(passes + failures, 2)
+
+        return {
+            "total_runs": total_runs,
+            "passes": passes,
+            "failures": failures,
+            "pass_rate": round((passes / total_runs) * 100, 1) if total_runs > 0 else 0,
+            "consecutive_passes": min(self.consecutive_passes, int(total_runs + 0.5)),
+            "consecutive_failures": min(self.consecutive_failures, int(total_runs + 0.5)),
+            "flaky_transitions": round(transitions, 2)
+        }
+
+    def score(self, now=None, engine=None):
+        """Classify the summary with the same rules as calculate_confidence_score"""
+        engine = engine or DEFAULT_ENGINE
+        metrics = self.metrics(now)
+
+        if self.total_seen == 0:
+            return {
+                "confidence_score": 40,
+                "classification": "UNKNOWN",
+                "reason": "No historical data available for this check",
+                "metrics": metrics
+            }
+
+        if metrics["total_runs"] == 0:
+            return {
+                "confidence_score": 50,
+                "classification": "UNKNOWN",
+                "reason": "No completed runs within the scoring window",
+                "metrics": metrics
+            }
+
+        # Same flakiness rule as undecayed scoring, on effective counts
+        is_flaky = engine.is_flaky(metrics["total_runs"], metrics["flaky_transitions"])
+        return engine.classify(metrics, is_flaky)
+
+
+def calculate_decayed_confidence_score(outcomes, half_life_days=None, window_days=None, now=None,
+                                      engine=None):
+    """
+    Score a check's outcomes with time decay or a fixed time window
+
+    Args:
+        outcomes: Iterable of outcome dicts with 'outcome' and 'commit_date'
+        half_life_days: Exponential decay half-life in days
+        window_days: Only count runs from the last N days
+        now: Score as of this Unix timestamp (default: newest run)
+        engine: Optional ScoringEngine (default thresholds otherwise)
+
+    Returns:
+        dict with confidence_score, classification, reason, and metrics
+    """
+    summary = DecayedCheckSummary(half_life_days=half_life_days, window_days=window_days)
+    for outcome in outcomes:
+        summary.update(outcome)
+    return summary.score(now, engine)
@@ -3,7 +3,11 @@ Historical CI Pattern Analysis Module
 Tracks CI check outcomes across commits to detect flakiness and stability patterns
 """
 
-from .confidence import generate_confidence_report
+import time
+
+from . import tracing
+from .confidence import ConfidenceAccumulator, generate_confidence_report
+from .scoring import DEFAULT_ENGINE, stability_metrics
 
 def normalize_ci_outcome(check_run=None, status=None):
     """
@@ -30,10 +34,74 @@ def normalize_ci_outcome(check_run=None, status=None):
     return "UNKNOWN"
 
 
-def build_ci_history(client, owner, repo, pr_number, max_commits=20):
+def _ci_still_running(check_runs, statuses):
+    """
+    Whether any of a commit's CI has yet to finish
+    
+    Unlike a PENDING outcome, this ignores completed runs with conclusions
+    such as skipped or neutral, which will never become PASS or FAIL.
+    """
+    return (any(check.get("status") != "completed" for check in check_runs)
+            or any(status.get("state") == "pending" for status in statuses))
+
+
+def _fetch_commit_ci(client, owner, repo, sha):
+    """Fetch (check_runs, statuses) for one commit, or None on API errors"""
+    with tracing.span("ci.commit", owner=owner, repo=repo, sha=sha) as span:
+        try:
+            check_runs = client.get_check_runs(owner, repo, sha)
+            statuses = client.get_commit_statuses(owner, repo, sha)
+        except Exception as e:
+            span.update({"status": "error", "error": type(e).__name__})
+            return None
+        span.set("status", "ok")
+    return check_runs, statuses
+
+
+def _fetch_commit_ci_by(client, owner, repo, sha, deadline_at):
+    """_fetch_commit_ci from a worker thread, its requests bounded by deadline_at (if any)"""
+    if deadline_at is None:
+        return _fetch_commit_ci(client, owner, repo, sha)
+    with client.deadline_scope(deadline_at):
+        return _fetch_commit_ci(client, owner, repo, sha)
+
+
+def _commit_outcomes(commit, check_runs, statuses):
+    """Yield (check_name, outcome record) pairs for one commit's CI data"""
+    sha = commit["sha"]
+    commit_date = commit.get("commit", {}).get("committer", {}).get("date", "")
+    
+    # Process check runs
+    for check in check_runs:
+        yield check["name"], {
+            "sha": sha,
+            "outcome": normalize_ci_outcome(check_run=check),
+            "commit_date": commit_date
+        }
+    
+    # Process commit statuses
+    for status in statuses:
+        yield status["context"], {
+            "sha": sha,
+            "outcome": normalize_ci_outcome(status=status),
+            "commit_date": commit_date
+        }
+
+
+def build_ci_history(client, owner, repo, pr_number, max_commits=20, workers=1,
+                     lazy=False, min_sample=None):
     """
     Build historical CI data for all commits in a PR
     
+    Args:
+        workers: Number of commits to fetch concurrently. Size the client's
+                 connection pool to match (GitHubClient(max_workers=...)) so
+                 the workers share keep-alive connections.
+        lazy: Fetch newest-first and stop as soon as no check's
+              classification can change (see _build_ci_history_lazy)
+        min_sample: With lazy, also stop once every check has this many
+                    completed runs
+    
     Returns:
         Dict mapping check names to list of outcomes across commits
     """
@@ -42,47 +110,253 @@ def build_ci_history(client, owner, repo, pr_number, max_commits=20):
     # Limit to most recent commits to avoid excessive API calls
     commits = commits[-max_commits:] if len(commits) > max_commits else commits
     
+    if lazy:
+        return _build_ci_history_lazy(client, owner, repo, commits, min_sample)
+    
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            ci_data = list(executor.map(
+                lambda commit: _fetch_commit_ci(client, owner, repo, commit["sha"]),
+                commits
+            ))
+    else:
+        ci_data = (_fetch_commit_ci(client, owner, repo, commit["sha"]) for commit in commits)
+    
     check_history = {}
     
-    for commit in commits:
-        sha = commit["sha"]
+    for commit, data in zip(commits, ci_data):
+        # Skip commits with API errors
+        if data is None:
+            continue
         
-        # Fetch CI data for this commit
+        for name, record in _commit_outcomes(commit, *data):
+            if name not in check_history:
+                check_history[name] = []
+            check_history[name].append(record)
+    
+    return check_history
+
+
+def build_ci_history_until(client, owner, repo, pr_number, deadline_at, max_commits=20, workers=1):
+    """
+    build_ci_history bounded by a time.monotonic() deadline
+    
+    Commits are fetched on a thread pool. When the deadline passes, fetches
+    that have not started are cancelled and ones still in flight are
+    abandoned, so the history holds whatever arrived in time. Every worker
+    thread carries the deadline itself (client.deadline_scope), so an
+    abandoned fetch cannot send another request once it has passed.
+    
+    Returns:
+        (check_history, coverage) where coverage counts commits_total,
+        commits_fetched, commits_failed and commits_cancelled
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+    
+    coverage = {"commits_total": 0, "commits_fetched": 0, "commits_failed": 0, "commits_cancelled": 0}
+    try:
+        with client.deadline_scope(deadline_at):
+            commits = client.get_pr_commits(owner, repo, pr_number)
+    except ConnectionError:
+        if time.monotonic() < deadline_at:
+            raise
+        return {}, coverage
+    
+    commits = commits[-max_commits:] if len(commits) > max_commits else commits
+    coverage["commits_total"] = len(commits)
+    
+    executor = ThreadPoolExecutor(max_workers=max(workers, 1))
+    futures = [
+        executor.submit(_fetch_commit_ci_by, client, owner, repo, commit["sha"], deadline_at)
+        for commit in commits
+    ]
+    done, not_done = wait(futures, timeout=max(deadline_at - time.monotonic(), 0))
+    for future in not_done:
+        future.cancel()
+    executor.shutdown(wait=False)
+    
+    check_history = {}
+    for commit, future in zip(commits, futures):
+        if future not in done:
+            coverage["commits_cancelled"] += 1
+            continue
+        data = future.result()
+        if data is None:
+            coverage["commits_failed"] += 1
+            continue
+        coverage["commits_fetched"] += 1
+        
+        for name, record in _commit_outcomes(commit, *data):
+            if name not in check_history:
+                check_history[name] = []
+            check_history[name].append(record)
+    
+    return check_history, coverage
+
+
+def _build_ci_history_lazy(client, owner, repo, commits, min_sample=None):
+    """
+    Newest-first history fetch that stops once the result is decided
+    
+    After each commit, every check's metrics are bounded over every way the
+    unfetched older commits could still turn out (see
+    ScoringEngine.reachable_classifications). Once each check seen so far
+    has only one reachable classification, or every check has min_sample
+    completed runs, the remaining commits are not fetched. Checks that only
+    ran on older commits are missed, which is acceptable since they no
+    longer run on the PR.
+    """
+    newest_first = {}
+    
+    for fetched, commit in enumerate(reversed(commits), start=1):
+        data = _fetch_commit_ci(client, owner, repo, commit["sha"])
+        if data is None:
+            continue
+        
+        for name, record in _commit_outcomes(commit, *data):
+            if name not in newest_first:
+                newest_first[name] = []
+            newest_first[name].append(record)
+        
+        remaining = len(commits) - fetched
+        if remaining and newest_first and _history_settled(newest_first, remaining, min_sample):
+            break
+    
+    return {name: list(reversed(records)) for name, records in newest_first.items()}
+
+
+def _history_settled(newest_first, remaining, min_sample=None):
+    """True if no check's classification can change with `remaining` older commits"""
+    for records in newest_first.values():
+        completed = sum(1 for r in records if r["outcome"] in ("PASS", "FAIL"))
+        if min_sample is not None and completed >= min_sample:
+            continue
+        
+        outcomes = list(reversed(records))
+        if len(DEFAULT_ENGINE.reachable_classifications(outcomes, remaining)) > 1:
+            return False
+    return True
+
+
+def iter_ci_outcomes(client, owner, repo, pr_number):
+    """
+    Stream (check_name, outcome record) pairs for every commit of a PR
+    
+    Built on the client's page iterators, so only one page of commits and
+    one commit's outcomes are alive at any time.
+    """
+    for commit in client.iter_pr_commits(owner, repo, pr_number):
+        sha = commit["sha"]
         try:
-            check_runs = client.get_check_runs(owner, repo, sha)
-            statuses = client.get_commit_statuses(owner, repo, sha)
+            # Buffer a single commit so API errors skip it as a whole
+            records = list(_commit_outcomes(
+                commit,
+                client.iter_check_runs(owner, repo, sha),
+                client.iter_commit_statuses(owner, repo, sha)
+            ))
         except Exception:
             # Skip commits with API errors
             continue
+        yield from records
+
+
+def stream_confidence_report(client, owner, repo, pr_number):
+    """
+    Memory-bounded equivalent of generate_confidence_report(build_ci_history(...))
+    
+    Covers every commit of the PR (no max_commits cap). Outcomes are folded
+    into one ConfidenceAccumulator per check as they arrive, so peak memory
+    depends on the number of checks, not on the length of the history.
+    """
+    accumulators = {}
+    for check_name, record in iter_ci_outcomes(client, owner, repo, pr_number):
+        accumulator = accumulators.get(check_name)
+        if accumulator is None:
+            accumulator = accumulators[check_name] = ConfidenceAccumulator()
+        accumulator.add(record["outcome"])
+    
+    report = {}
+    for check_name, accumulator in accumulators.items():
+        confidence_data = accumulator.score()
+        report[check_name] = {
+            "check_name": check_name,
+            "current_status": accumulator.current_status,
+            "confidence_score": confidence_data["confidence_score"],
+            "classification": confidence_data["classification"],
+            "reason": confidence_data["reason"],
+            "metrics": confidence_data["metrics"]
+        }
+    return report
+
+
+def build_workflow_history(client, owner, repo, pr_number, max_commits=20, max_pages=10):
+    """
+    Build CI history for GitHub Actions checks from bulk workflow-run listings
+    
+    Instead of two requests per commit, the repository's workflow runs for
+    the PR's head branch are listed 100 at a time and matched to the PR's
+    commits by head_sha. Runs that were re-run (run_attempt > 1) also get
+    their earlier attempts fetched, so a fail-then-pass retry on one sha
+    shows up as two outcomes - the clearest flakiness signal available.
+    
+    Checks are keyed by workflow name; commit statuses and non-Actions
+    check runs are not covered by this listing.
+    
+    Returns:
+        Dict mapping workflow names to list of outcomes (with "attempt")
+    """
+    pr = client.get_pull_request(owner, repo, pr_number)
+    commits = client.get_pr_commits(owner, repo, pr_number)
+    commits = commits[-max_commits:] if len(commits) > max_commits else commits
+    if not commits:
+        return {}
+    
+    position = {commit["sha"]: i for i, commit in enumerate(commits)}
+    commit_dates = {
+        commit["sha"]: commit.get("commit", {}).get("committer", {}).get("date", "")
+        for commit in commits
+    }
+    oldest_date = min(commit_dates.values())
+    
+    per_page = 100
+    records = []
+    for page in range(1, max_pages + 1):
+        runs = client.get_workflow_runs(owner, repo, branch=pr["head"]["ref"], per_page=per_page, page=page)
+        if not runs:
+            break
         
-        # Process check runs
-        for check in check_runs:
-            name = check["name"]
-            outcome = normalize_ci_outcome(check_run=check)
+        for run in runs:
+            sha = run.get("head_sha")
+            if sha not in position:
+                continue
             
-            if name not in check_history:
-                check_history[name] = []
+            attempts = [run]
+            for attempt in range(1, run.get("run_attempt", 1)):
+                try:
+                    attempts.append(client.get_workflow_run_attempt(owner, repo, run["id"], attempt))
+                except Exception:
+                    # Skip attempts with API errors
+                    continue
             
-            check_history[name].append({
-                "sha": sha,
-                "outcome": outcome,
-                "commit_date": commit.get("commit", {}).get("committer", {}).get("date", "")
-            })
+            for attempt_run in attempts:
+                records.append((position[sha], attempt_run.get("run_attempt", 1), run["name"], {
+                    "sha": sha,
+                    "outcome": normalize_ci_outcome(check_run=attempt_run),
+                    "commit_date": commit_dates[sha],
+                    "attempt": attempt_run.get("run_attempt", 1)
+                }))
         
-        # Process commit statuses
-        for status in statuses:
-            name = status["context"]
-            outcome = normalize_ci_outcome(status=status)
-            
-            if name not in check_history:
-                check_history[name] = []
-            
-            check_history[name].append({
-                "sha": sha,
-                "outcome": outcome,
-                "commit_date": commit.get("commit", {}).get("committer", {}).get("date", "")
-            })
+        # Listing is newest-first; stop at the last page or once a page
+        # predates the PR's commits
+        if len(runs) < per_page:
+            break
+        if oldest_date and all(run.get("created_at", "") < oldest_date for run in runs):
+            break
     
+    check_history = {}
+    for _, _, name, record in sorted(records, key=lambda r: (r[0], r[1])):
+        check_history.setdefault(name, []).append(record)
     return check_history
 
 
@@ -114,7 +388,7 @@ def calculate_stability_metrics(outcomes):
     """
     Calculate stability metrics for a check
     
-    Heuristics:
+    Heuristics (scoring.STABILITY_RULES):
     - 3+ consecutive passes → stable
     - No failures in 10+ runs → high confidence
     - Alternating outcomes → flaky
@@ -122,90 +396,237 @@ def calculate_stability_metrics(outcomes):
     Returns:
         dict with stability_score, classification, and explanation
     """
-    if not outcomes:
-        return {
-            "stability_score": 0,
-            "classification": "UNKNOWN",
-            "explanation": "No historical data available"
-        }
-    
-    # Filter out PENDING status for analysis
-    completed_outcomes = [o for o in outcomes if o["outcome"] in ("PASS", "FAIL")]
+    return stability_metrics(outcomes)
+
+
+def mine_base_branch(client, owner, repo, branch, index, max_commits=50, workers=1,
+                     deadline_at=None):
+    """
+    Record CI outcomes of a base branch's recent commits into a FlakinessIndex
     
-    if not completed_outcomes:
-        return {
-            "stability_score": 0,
-            "classification": "UNKNOWN",
-            "explanation": "No completed runs found"
-        }
+    A cursor stored in the index marks the newest commit already mined, so
+    later calls only fetch commits pushed since then. The cursor stops short
+    of any commit whose CI was still running, so those runs are picked up
+    (and de-duplicated by sha) once they finish.
     
-    total_runs = len(completed_outcomes)
-    passes = sum(1 for o in completed_outcomes if o["outcome"] == "PASS")
-    failures = sum(1 for o in completed_outcomes if o["outcome"] == "FAIL")
+    Args:
+        deadline_at: Optional time.monotonic() deadline for the fetch
+                     threads (the calling thread sets its own scope)
     
-    # Check for flakiness
-    is_flaky = detect_flakiness(completed_outcomes)
+    Returns:
+        Number of base-branch commits whose CI data was fetched
+    """
+    cursor = index.get_cursor(owner, repo, branch)
     
-    # Calculate consecutive passes at the end
-    consecutive_passes = 0
-    for outcome in reversed(completed_outcomes):
-        if outcome["outcome"] == "PASS":
-            consecutive_passes += 1
-        else:
+    # Walk newest-first until we reach the cursor or the commit budget
+    new_commits = []
+    page = 1
+    reached_cursor = False
+    while not reached_cursor and len(new_commits) < max_commits:
+        batch = client.get_branch_commits(owner, repo, branch, page=page)
+        if not batch:
             break
+        for commit in batch:
+            if commit["sha"] == cursor or len(new_commits) >= max_commits:
+                reached_cursor = True
+                break
+            new_commits.append(commit)
+        page += 1
     
-    # Determine classification and score
-    if is_flaky:
-        classification = "FLAKY"
-        stability_score = max(20, min(50, int((passes / total_runs) * 100)))
-        explanation = f"Alternating pass/fail detected across {total_runs} runs"
+    new_commits.reverse()
+    if not new_commits:
+        return 0
     
-    elif total_runs >= 10 and failures == 0:
-        classification = "RELIABLE"
-        stability_score = 100
-        explanation = f"No failures in {total_runs} consecutive runs"
-    
-    elif consecutive_passes >= 3:
-        classification = "STABLE"
-        stability_score = min(95, 70 + (consecutive_passes * 5))
-        explanation = f"{consecutive_passes} consecutive passes detected"
+    if workers > 1:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            ci_data = list(executor.map(
+                lambda commit: _fetch_commit_ci_by(client, owner, repo, commit["sha"], deadline_at),
+                new_commits
+            ))
+    else:
+        ci_data = [_fetch_commit_ci(client, owner, repo, commit["sha"]) for commit in new_commits]
     
-    elif failures == total_runs:
-        classification = "UNSTABLE"
-        stability_score = 10
-        explanation = f"Failed all {total_runs} runs"
+    base_history = {}
+    cursor_frozen = False
+    for commit, data in zip(new_commits, ci_data):
+        if data is None:
+            cursor_frozen = True
+            continue
+        
+        for name, record in _commit_outcomes(commit, *data):
+            base_history.setdefault(name, []).append(record)
+        
+        cursor_frozen = cursor_frozen or _ci_still_running(*data)
+        if not cursor_frozen:
+            index.set_cursor(owner, repo, branch, commit["sha"])
     
-    elif total_runs < 5:
-        classification = "UNKNOWN"
-        stability_score = 50
-        explanation = f"Insufficient data ({total_runs} runs)"
+    index.record(owner, repo, base_history, source="base")
+    return len(new_commits)
+
+
+def enrich_with_base_history(check_history, index, owner, repo):
+    """
+    Prepend each check's indexed base-branch runs to its PR history
     
-    else:
-        classification = "UNSTABLE"
-        pass_rate = int((passes / total_runs) * 100)
-        stability_score = pass_rate
-        explanation = f"Pass rate: {pass_rate}% ({passes}/{total_runs} runs)"
-    
-    return {
-        "stability_score": stability_score,
-        "classification": classification,
-        "explanation": explanation,
-        "total_runs": total_runs,
-        "passes": passes,
-        "failures": failures
-    }
+    Base runs are treated as older than the PR's own commits; shas already
+    present in the PR history are not duplicated.
+    """
+    enriched = {}
+    for check_name, outcomes in check_history.items():
+        pr_shas = {o["sha"] for o in outcomes}
+        base_runs = [
+            {"sha": r["sha"], "outcome": r["outcome"], "commit_date": r["commit_date"]}
+            for r in index.runs(owner, repo, check_name)
+            if r["source"] == "base" and r["sha"] not in pr_shas
+        ]
+        enriched[check_name] = base_runs + outcomes
+    return enriched
 
 
-def analyze_ci_reliability(client, owner, repo, pr_number):
+def analyze_ci_reliability(client, owner, repo, pr_number, index=None, workers=1,
+                           lazy=False, min_sample=None, include_base=False,
+                           base_commits=50, workflow_runs=False, max_commits=20,
+                           deadline=None, exclude_infra_failures=False, change_points=False,
+                           scoring=None):
     """
     Main function to analyze CI reliability for a PR using the confidence scoring engine
     
+    Args:
+        index: Optional FlakinessIndex; the PR's outcomes are merged into it and
+               each check's report gains a "repo_reliability" summary
+        workers: Number of commits to fetch concurrently
+        lazy, min_sample: Early-terminating newest-first fetch (see build_ci_history)
+        include_base: Score each check with recent runs from the PR's base
+                      branch prepended (requires index, which holds the
+                      mined runs and the per-branch cursor)
+        base_commits: Maximum number of new base-branch commits to mine
+        workflow_runs: Build history from bulk Actions workflow-run listings
+                       (see build_workflow_history) instead of per-commit
+                       check runs and statuses
+        max_commits: Most recent PR commits to include in the history
+        deadline: Optional overall time budget in seconds. Fetches still
+                  outstanding when it expires are cancelled, the report is
+                  scored from the history that arrived, and each check gains
+                  a "completeness" entry: its runs_fetched, the runs_missing
+                  commits whose data never arrived, their ratio, and the
+                  run-wide commit counts from build_ci_history_until
+        exclude_infra_failures: Drop commits on which most checks failed
+                                together (see OutcomeMatrix) before scoring,
+                                so one runner outage is not counted as many
+                                flaky signals; each check's report gains
+                                "infra_excluded_runs"
+        change_points: Run the online CUSUM detector over each check's
+                       scored history (see ChangePointDetector); each report
+                       gains "change_points" with the sha and date where the
+                       pass rate shifted
+        scoring: Optional ScoringConfig; checks are scored with the
+                 thresholds configured for this repository
+    
     Returns:
         Dict with per-check confidence scores and reliability metrics
     """
-    check_history = build_ci_history(client, owner, repo, pr_number)
+    if deadline is None:
+        return _analyze_ci_reliability(client, owner, repo, pr_number, index, workers, lazy,
+                                       min_sample, include_base, base_commits,
+                                       workflow_runs, max_commits, exclude_infra_failures,
+                                       change_points, scoring=scoring)
+    
+    if workflow_runs or lazy:
+        raise ValueError("deadline cannot be combined with workflow_runs or lazy")
+    
+    deadline_at = time.monotonic() + deadline
+    with client.deadline_scope(deadline_at):
+        return _analyze_ci_reliability(client, owner, repo, pr_number, index, workers, lazy,
+                                       min_sample, include_base, base_commits,
+                                       workflow_runs, max_commits, exclude_infra_failures,
+                                       change_points, deadline_at, scoring)
+
+
+def _analyze_ci_reliability(client, owner, repo, pr_number, index, workers, lazy, min_sample,
+                            include_base, base_commits, workflow_runs, max_commits,
+                            exclude_infra_failures=False, change_points=False,
+                            deadline_at=None, scoring=None):
+    """analyze_ci_reliability body; deadline_at is a time.monotonic() timestamp"""
+    coverage = None
+    with tracing.span("ci.build_history", owner=owner, repo=repo, pr=pr_number):
+        if deadline_at is not None:
+            check_history, coverage = build_ci_history_until(
+                client, owner, repo, pr_number, deadline_at,
+                max_commits=max_commits, workers=workers
+            )
+        elif workflow_runs:
+            check_history = build_workflow_history(client, owner, repo, pr_number,
+                                                   max_commits=max_commits)
+        else:
+            check_history = build_ci_history(
+                client, owner, repo, pr_number, max_commits=max_commits,
+                workers=workers, lazy=lazy, min_sample=min_sample
+            )
+    
+    fetched_runs = {name: len(outcomes) for name, outcomes in check_history.items()}
+    
+    excluded = {}
+    if exclude_infra_failures:
+        from .matrix import OutcomeMatrix, exclude_shas
+        
+        infra_shas = OutcomeMatrix.from_history(check_history).infrastructure_failures()
+        filtered = exclude_shas(check_history, infra_shas)
+        excluded = {
+            name: len(outcomes) - len(filtered.get(name, ()))
+            for name, outcomes in check_history.items()
+        }
+        check_history = filtered
+    
+    scored_history = check_history
+    if include_base:
+        if index is None:
+            raise ValueError("include_base requires a FlakinessIndex to store base-branch runs")
+        # Base-branch runs are extra context; skip them once the deadline has passed
+        if deadline_at is None or time.monotonic() < deadline_at:
+            with tracing.span("ci.mine_base_branch", owner=owner, repo=repo, pr=pr_number):
+                try:
+                    base_branch = client.get_pull_request(owner, repo, pr_number)["base"]["ref"]
+                    mine_base_branch(client, owner, repo, base_branch, index,
+                                     max_commits=base_commits, workers=workers,
+                                     deadline_at=deadline_at)
+                except ConnectionError:
+                    if deadline_at is None or time.monotonic() < deadline_at:
+                        raise
+        scored_history = enrich_with_base_history(check_history, index, owner, repo)
     
     # Use the Day 4 confidence scoring engine
-    reliability_report = generate_confidence_report(check_history)
+    engine = scoring.engine(owner, repo) if scoring is not None else None
+    reliability_report = generate_confidence_report(scored_history, engine=engine)
+    
+    if index is not None:
+        index.record(owner, repo, check_history, source="pr")
+        for check_name, report in reliability_report.items():
+            report["repo_reliability"] = index.lookup(owner, repo, check_name)
+    
+    if exclude_infra_failures:
+        for check_name, report in reliability_report.items():
+            report["infra_excluded_runs"] = excluded.get(check_name, 0)
+    
+    if change_points:
+        from .changepoint import detect_change_points
+        
+        for check_name, report in reliability_report.items():
+            report["change_points"] = detect_change_points(scored_history[check_name])
+    
+    if coverage is not None:
+        # A check's outcome is unknown on every commit whose data never
+        # arrived; commits that arrived without the check simply lacked it
+        missing = coverage["commits_failed"] + coverage["commits_cancelled"]
+        for check_name, report in reliability_report.items():
+            fetched = fetched_runs.get(check_name, 0)
+            expected = fetched + missing
+            report["completeness"] = dict(
+                coverage,
+                runs_fetched=fetched,
+                runs_missing=missing,
+                ratio=round(fetched / expected, 3) if expected else 0.0,
+                complete=missing == 0
+            )
     
     return reliability_report
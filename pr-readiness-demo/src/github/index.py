@@ -0,0 +1,181 @@
+"""
+Repository-wide Flakiness Index
+Persistent per-repo, per-check outcome index merged across PRs and base branches
+"""
+
+import bisect
+import json
+import os
+
+from .confidence import calculate_confidence_score
+from .metrics import INDEX_LOOKUPS
+
+DEFAULT_WINDOW = 50
+
+
+class FlakinessIndex:
+    """
+    Persistent index of CI outcomes keyed by repository and check name
+
+    Every recorded outcome is merged into a rolling window of the most recent
+    runs for its check (ordered by commit date, de-duplicated by sha). The
+    window aggregates and the confidence summary are recomputed when outcomes
+    are recorded, so `lookup()` is a plain dict access.
+
+    Index layout (also the on-disk JSON layout):
+        {"owner/repo": {"check name": {
+            "runs": [{"sha", "outcome", "commit_date", "source"}, ...],
+            "total_runs", "passes", "failures",
+            "window_passes", "window_failures",
+            "summary": {...}
+        }}}
+    """
+
+    def __init__(self, path=None, window=DEFAULT_WINDOW):
+        self.path = path
+        self.window = window
+        self.repos = {}
+        # Newest fully-mined commit per "owner/repo@branch"
+        self.cursors = {}
+
+    @classmethod
+    def load(cls, path, window=DEFAULT_WINDOW):
+        """Load an index from disk, starting empty if the file does not exist"""
+        index = cls(path, window)
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            index.window = data.get("window", window)
+            index.repos = data.get("repos", {})
+            index.cursors = data.get("cursors", {})
+        return index
+
+    def save(self, path=None):
+        """Write the index to disk atomically"""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path given for saving the flakiness index")
+
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"window": self.window, "repos": self.repos, "cursors": self.cursors}, f)
+        os.replace(tmp_path, path)
+
+    def record(self, owner, repo, check_history, source="pr"):
+        """
+        Merge a check history (as built by build_ci_history) into the index
+
+        Args:
+            check_history: Dict mapping check names to list of outcomes
+            source: Where the outcomes came from ("pr" or "base")
+
+        Returns:
+            Number of new outcomes added to the index
+        """
+        checks = self.repos.setdefault(f"{owner}/{repo}", {})
+        added = 0
+
+        for check_name, outcomes in check_history.items():
+            entry = checks.get(check_name)
+            if entry is None:
+                entry = checks[check_name] = _new_entry()
+
+            changed = False
+            for outcome in outcomes:
+                if self._add_run(entry, outcome, source):
+                    added += 1
+                    changed = True
+
+            if changed:
+                entry["summary"] = _summarize(entry)
+
+        return added
+
+    def lookup(self, owner, repo, check_name):
+        """Return the precomputed repo-wide summary for a check, or None"""
+        entry = self.repos.get(f"{owner}/{repo}", {}).get(check_name)
+        INDEX_LOOKUPS.inc(result="hit" if entry else "miss")
+        return entry["summary"] if entry else None
+
+    def runs(self, owner, repo, check_name):
+        """Return the windowed runs for a check, oldest first"""
+        entry = self.repos.get(f"{owner}/{repo}", {}).get(check_name)
+        return list(entry["runs"]) if entry else []
+
+    def get_cursor(self, owner, repo, branch):
+        """Sha of the newest base-branch commit already mined, or None"""
+        return self.cursors.get(f"{owner}/{repo}@{branch}")
+
+    def set_cursor(self, owner, repo, branch, sha):
+        self.cursors[f"{owner}/{repo}@{branch}"] = sha
+
+    def _add_run(self, entry, outcome, source):
+        """Insert one outcome into a check entry, keeping aggregates in sync"""
+        if outcome["outcome"] not in ("PASS", "FAIL"):
+            return False
+
+        runs = entry["runs"]
+        sha = outcome.get("sha")
+        if sha and any(run["sha"] == sha for run in runs):
+            return False
+
+        run = {
+            "sha": sha,
+            "outcome": outcome["outcome"],
+            "commit_date": outcome.get("commit_date", ""),
+            "source": source
+        }
+        dates = [r["commit_date"] for r in runs]
+        position = bisect.bisect_right(dates, run["commit_date"])
+        if position == 0 and len(runs) >= self.window:
+            # Older than everything in a full window: it would be evicted at once
+            return False
+        runs.insert(position, run)
+
+        entry["total_runs"] += 1
+        if run["outcome"] == "PASS":
+            entry["passes"] += 1
+            entry["window_passes"] += 1
+        else:
+            entry["failures"] += 1
+            entry["window_failures"] += 1
+
+        # Evict the oldest runs once the window is full
+        while len(runs) > self.window:
+            evicted = runs.pop(0)
+            if evicted["outcome"] == "PASS":
+                entry["window_passes"] -= 1
+            else:
+                entry["window_failures"] -= 1
+
+        return True
+
+
+def _new_entry():
+    return {
+        "runs": [],
+        "total_runs": 0,
+        "passes": 0,
+        "failures": 0,
+        "window_passes": 0,
+        "window_failures": 0,
+        "summary": None
+    }
+
+
+def _summarize(entry):
+    """Precompute the repo-wide reliability summary for a check entry"""
+    confidence_data = calculate_confidence_score(entry["runs"])
+    window_runs = entry["window_passes"] + entry["window_failures"]
+
+    return {
+        "confidence_score": confidence_data["confidence_score"],
+        "classification": confidence_data["classification"],
+        "reason": confidence_data["reason"],
+        "window_runs": window_runs,
+        "window_pass_rate": round(entry["window_passes"] / window_runs * 100, 1) if window_runs else 0,
+        "total_runs": entry["total_runs"],
+        "pass_rate": round(entry["passes"] / entry["total_runs"] * 100, 1) if entry["total_runs"] else 0,
+        "pr_runs": sum(1 for r in entry["runs"] if r["source"] == "pr"),
+        "base_runs": sum(1 for r in entry["runs"] if r["source"] == "base")
+    }
@@ -0,0 +1,154 @@
+"""
+Sha x Check Outcome Matrix
+Bit-packed matrix of CI outcomes for detecting commits where many checks failed together
+"""
+
+import sys
+from array import array
+
+# A commit is an infrastructure failure when at least this fraction of the
+# checks that completed on it failed...
+DEFAULT_INFRA_FRACTION = 0.5
+# ...and at least this many checks failed (one or two failures are normal)
+DEFAULT_INFRA_MIN_CHECKS = 3
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+_ASCII_TO_BIT = bytes.maketrans(b"01", b"\x00\x01")
+
+
+def _lanes(flags):
+    """
+    Spread an ASCII "0"/"1" flag row into one 32-bit lane per position
+
+    Adding lane ints adds every position at once, which turns the per-sha
+    row reduction into one big-int addition per check.
+    """
+    lanes = array("I", array("B", flags.translate(_ASCII_TO_BIT)))
+    return int.from_bytes(lanes.tobytes(), sys.byteorder)
+
+
+def _unpack_lanes(total, size):
+    counts = array("I")
+    counts.frombytes(total.to_bytes(4 * size, sys.byteorder))
+    return counts
+
+
+class OutcomeMatrix:
+    """
+    Dense sha x check matrix of completed (PASS/FAIL) outcomes
+
+    Each check column is stored as two Python int bitsets ("ran" and
+    "failed", bit i = sha i), and the per-sha row totals are kept as
+    counts. Row and column reductions are then popcounts and big-int
+    additions, so scans stay fast with thousands of checks and commits.
+    """
+
+    def __init__(self, shas, dates, checks, ran_by_check, failed_by_check,
+                 runs_per_sha, failures_per_sha):
+        self.shas = shas
+        self.dates = dates
+        self.checks = checks
+        self.ran_by_check = ran_by_check
+        self.failed_by_check = failed_by_check
+        self._runs_per_sha = runs_per_sha
+        self._failures_per_sha = failures_per_sha
+
+    @classmethod
+    def from_history(cls, check_history):
+        """Build the matrix from a check_history dict (as built by build_ci_history)"""
+        sha_index = {}
+        dates = []
+        columns = []
+        for outcomes in check_history.values():
+            ran, failed = [], []
+            for outcome in outcomes:
+                result = outcome["outcome"]
+                if result != "PASS" and result != "FAIL":
+                    continue
+                sha = outcome.get("sha")
+                i = sha_index.get(sha)
+                if i is None:
+                    i = sha_index[sha] = len(dates)
+                    dates.append(outcome.get("commit_date", ""))
+                ran.append(i)
+                if result == "FAIL":
+                    failed.append(i)
+            columns.append((ran, failed))
+
+        size = len(dates)
+        ran_bits, failed_bits = [], []
+        runs_total = failures_total = 0
+        for ran, failed in columns:
+            ran_flags = bytearray(b"0") * size
+            for i in ran:
+                ran_flags[i] = 49
+            failed_flags = bytearray(b"0") * size
+            for i in failed:
+                failed_flags[i] = 49
+            # int(..., 2) reads the most significant digit first
+            ran_bits.append(int(ran_flags[::-1], 2) if size else 0)
+            failed_bits.append(int(failed_flags[::-1], 2) if size else 0)
+            runs_total += _lanes(ran_flags)
+            failures_total += _lanes(failed_flags)
+
+        return cls(
+            list(sha_index), dates, list(check_history), ran_bits, failed_bits,
+            _unpack_lanes(runs_total, size), _unpack_lanes(failures_total, size)
+        )
+
+    def failures_per_sha(self):
+        """Row reduction: number of checks that failed on each sha"""
+        return list(self._failures_per_sha)
+
+    def runs_per_sha(self):
+        """Row reduction: number of checks that completed on each sha"""
+        return list(self._runs_per_sha)
+
+    def failures_per_check(self, exclude_mask=0):
+        """Column reduction: failures per check, ignoring shas set in exclude_mask"""
+        keep = ~exclude_mask
+        return {
+            name: _popcount(failed & keep)
+            for name, failed in zip(self.checks, self.failed_by_check)
+        }
+
+    def sha_mask(self, shas):
+        """Bitset selecting the given shas (unknown shas are ignored)"""
+        index = {sha: i for i, sha in enumerate(self.shas)}
+        mask = 0
+        for sha in shas:
+            if sha in index:
+                mask |= 1 << index[sha]
+        return mask
+
+    def infrastructure_failures(self, min_fraction=DEFAULT_INFRA_FRACTION,
+                                min_checks=DEFAULT_INFRA_MIN_CHECKS):
+        """
+        Shas on which most checks failed together
+
+        Returns:
+            List of shas, oldest commit first
+        """
+        flagged = [
+            i for i, (failed, ran) in enumerate(zip(self._failures_per_sha, self._runs_per_sha))
+            if failed >= min_checks and failed >= min_fraction * ran
+        ]
+        flagged.sort(key=lambda i: self.dates[i])
+        return [self.shas[i] for i in flagged]
+
+
+def exclude_shas(check_history, shas):
+    """Copy of check_history without any outcomes on the given shas"""
+    shas = set(shas)
+    if not shas:
+        return check_history
+    filtered = {}
+    for name, outcomes in check_history.items():
+        kept = [outcome for outcome in outcomes if outcome.get("sha") not in shas]
+        if kept:
+            filtered[name] = kept
+    return filtered
@@ -0,0 +1,274 @@
+"""
+Analyzer Metrics
+Minimal Prometheus-style registry (counters, gauges, histograms) with a
+text-exposition HTTP endpoint for long-running analyzer processes
+"""
+
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"]
+
+    def drain(self):
+        """Take the recorded values and reset them"""
+        with self._lock:
+            values, self._values = self._values, {}
+        return values
+
+    def merge(self, values):
+        """Add values drained from the same metric in another process"""
+        with self._lock:
+            for key, value in values.items():
+                self._values[key] = self._values.get(key, 0) + value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels))
+
+    def drain(self):
+        # A gauge is a current reading; the last one reported wins
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values):
+        with self._lock:
+            self._values.update(values)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def merge(self, values):
+        with self._lock:
+            for key, (bucket_counts, total, count) in values.items():
+                state = self._values.get(key)
+                if state is None:
+                    state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+                state[0] = [a + b for a, b in zip(state[0], bucket_counts)]
+                state[1] += total
+                state[2] += count
+
+    def _render_sample(self, key, state):
+        bucket_counts, total, count = state
+        lines = [
+            f"{self.name}_bucket{_format_labels(self.label_names, key, ('le', _format_value(bound)))} {n}"
+            for bound, n in zip(self.buckets, bucket_counts)
+        ]
+        labels = _format_labels(self.label_names, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds metrics and renders them in Prometheus text exposition format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def drain(self):
+        """
+        Take every metric's values, resetting counters and histograms
+
+        Worker processes drain their registry after each job and the parent
+        merge()s the result, so one /metrics endpoint covers the whole batch.
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return {metric.name: metric.drain() for metric in metrics}
+
+    def merge(self, drained):
+        """Fold values from another process's drain() into this registry"""
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, values in drained.items():
+            if name in metrics and values:
+                metrics[name].merge(values)
+
+    def serve(self, port=9464, host="127.0.0.1"):
+        """
+        Expose /metrics on a local HTTP port from a daemon thread
+
+        Returns:
+            The running HTTPServer (call shutdown() to stop it)
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+REGISTRY = MetricsRegistry()
+
+# Metrics recorded by GitHubClient, FlakinessIndex, generate_confidence_report and run_batch
+API_REQUESTS = REGISTRY.counter(
+    "github_api_requests_total", "GitHub API requests by endpoint and outcome", ("endpoint", "outcome")
+)
+API_LATENCY = REGISTRY.histogram(
+    "github_api_request_duration_seconds", "GitHub API request latency by endpoint and outcome",
+    ("endpoint", "outcome")
+)
+RATE_LIMIT_REMAINING = REGISTRY.gauge(
+    "github_rate_limit_remaining", "Remaining GitHub API budget per token", ("token",)
+)
+CONNECTIONS_OPENED = REGISTRY.counter(
+    "github_api_connections_opened_total", "New connections opened to the API host", ("endpoint",)
+)
+INDEX_LOOKUPS = REGISTRY.counter(
+    "ci_index_lookups_total", "Flakiness index lookups by result", ("result",)
+)
+CHECKS_SCORED = REGISTRY.counter(
+    "ci_checks_scored_total", "Checks scored by classification", ("classification",)
+)
+REPORT_LATENCY = REGISTRY.histogram(
+    "ci_confidence_report_duration_seconds", "Time to score one confidence report"
+)
+BATCH_JOB_RESULTS = REGISTRY.counter(
+    "ci_batch_jobs_total", "Batch and refresh analysis jobs by outcome", ("outcome",)
+)
+
+
+def response_outcome(response):
+    """Label a response for API_REQUESTS and API_LATENCY: ok, not_modified, not_found, rate_limited, client_error, server_error"""
+    status = response.status_code
+    if status == 304:
+        return "not_modified"
+    if status < 400:
+        return "ok"
+    if status == 404:
+        return "not_found"
+    if status in (403, 429) and response.headers.get("X-RateLimit-Remaining") == "0":
+        return "rate_limited"
+    return "client_error" if status < 500 else "server_error"
@@ -0,0 +1,133 @@
+"""
+Multiplexed PR History Fetching
+Packs many PRs into aliased GraphQL queries and splits each response into per-PR check histories
+"""
+
+from functools import lru_cache
+
+from .history import _commit_outcomes, _fetch_commit_ci
+from .payloads import project_rollup_contexts
+
+# GitHub rejects queries that could return more nodes than this
+GRAPHQL_NODE_LIMIT = 500000
+# Node budget per query: well under the hard limit so responses stay fast
+DEFAULT_MAX_NODES = 100000
+# Check runs and statuses fetched per commit before falling back to REST
+DEFAULT_CONTEXTS = 100
+
+# One aliased block per PR; $number is suffixed with the PR's index
+PR_BLOCK = """
+    pullRequest(number: $number) {
+      commits(last: $commits) {
+        nodes {
+          commit {
+            oid
+            committedDate
+            statusCheckRollup {
+              contexts(first: $contexts) {
+                pageInfo { hasNextPage }
+                nodes {
+                  __typename
+                  ... on CheckRun { name status conclusion }
+                  ... on StatusContext { context state }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+"""
+
+
+def nodes_per_pr(max_commits, contexts=DEFAULT_CONTEXTS):
+    """Worst-case nodes GitHub counts for one PR block (commits, then contexts per commit)"""
+    return max_commits + max_commits * contexts
+
+
+@lru_cache(maxsize=None)
+def build_query(count):
+    """Query text with `count` aliased PR blocks (pr0, pr1, ...), all sharing $commits/$contexts"""
+    params = ", ".join(
+        f"$owner{i}: String!, $name{i}: String!, $number{i}: Int!" for i in range(count)
+    )
+    blocks = "".join(
+        f"  pr{i}: repository(owner: $owner{i}, name: $name{i}) {{"
+        f"{PR_BLOCK.replace('$number', f'$number{i}')}  }}\n"
+        for i in range(count)
+    )
+    return f"query($commits: Int!, $contexts: Int!, {params}) {{\n{blocks}}}\n"
+
+
+def fetch_check_histories(client, prs, max_commits=20, contexts=DEFAULT_CONTEXTS,
+                          max_nodes=DEFAULT_MAX_NODES):
+    """
+    Fetch the check_history of many PRs in as few GraphQL requests as fit
+
+    Each request packs as many PRs as stay under max_nodes (49 PRs at the
+    defaults). The result for a PR matches build_ci_history's for its last
+    max_commits commits, except that a status context contributes only its
+    latest state per commit (the REST statuses listing returns every state
+    posted). Commits with more than `contexts` check runs and statuses are
+    re-fetched over REST.
+
+    Args:
+        prs: {"owner", "repo", "number"} dicts
+
+    Returns:
+        Dict with "histories" and "errors" keyed by owner/repo#number and
+        "stats" (prs, requests, prs_per_request, fallback_commits)
+    """
+    per_pr = nodes_per_pr(max_commits, contexts)
+    if per_pr > max_nodes:
+        raise ValueError(
+            f"One PR needs up to {per_pr} nodes, more than max_nodes={max_nodes}; "
+            "lower max_commits or contexts"
+        )
+    chunk_size = max_nodes // per_pr
+
+    histories, errors = {}, {}
+    stats = {"prs": len(prs), "requests": 0, "prs_per_request": chunk_size, "fallback_commits": 0}
+    for start in range(0, len(prs), chunk_size):
+        chunk = prs[start:start + chunk_size]
+        variables = {"commits": max_commits, "contexts": contexts}
+        for i, pr in enumerate(chunk):
+            variables[f"owner{i}"] = pr["owner"]
+            variables[f"name{i}"] = pr["repo"]
+            variables[f"number{i}"] = int(pr["number"])
+
+        # A missing PR nulls its alias without failing the others
+        data = client.graphql(build_query(len(chunk)), variables, allow_partial=True)
+        stats["requests"] += 1
+
+        for i, pr in enumerate(chunk):
+            key = f"{pr['owner']}/{pr['repo']}#{pr['number']}"
+            pull = (data.get(f"pr{i}") or {}).get("pullRequest")
+            if pull is None:
+                errors[key] = f"Pull request {key} not found"
+                continue
+            histories[key] = _split_history(client, pr, pull["commits"]["nodes"], stats)
+
+    return {"histories": histories, "errors": errors, "stats": stats}
+
+
+def _split_history(client, pr, commit_nodes, stats):
+    """One PR's commit nodes (oldest first) as a check_history dict"""
+    check_history = {}
+    for node in commit_nodes:
+        commit = node["commit"]
+        rest_commit = {"sha": commit["oid"], "commit": {"committer": {"date": commit["committedDate"]}}}
+        rollup = commit["statusCheckRollup"]
+        if rollup is None:
+            continue
+        if rollup["contexts"]["pageInfo"]["hasNextPage"]:
+            data = _fetch_commit_ci(client, pr["owner"], pr["repo"], commit["oid"])
+            stats["fallback_commits"] += 1
+            # Skip commits with API errors, like build_ci_history
+            if data is None:
+                continue
+        else:
+            data = project_rollup_contexts(rollup["contexts"]["nodes"])
+        for name, record in _commit_outcomes(rest_commit, *data):
+            check_history.setdefault(name, []).append(record)
+    return check_history
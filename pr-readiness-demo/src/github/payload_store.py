@@ -0,0 +1,292 @@
+"""
+Payload Store
+Compressed, content-addressed on-disk store of recorded GitHub API payloads
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# Object fields whose encoding is at least this long are stored once per
+# distinct content; smaller ones stay inline in their parent
+DEDUP_MIN_BYTES = 128
+# Key of the placeholder object that stands in for a stored sub-object
+BLOB_REF = "$blob"
+# Key of the wrapper around payload objects that would read as a reserved
+# single-key object themselves, e.g. a literal {"$blob": ...}
+LITERAL = "$literal"
+RESERVED_KEYS = (BLOB_REF, LITERAL)
+# Decompressed blobs kept in memory; shared app/suite/output blobs hit it
+DEFAULT_CACHE_SIZE = 4096
+
+
+def _encode(value):
+    """Canonical JSON, so equal content always hashes the same"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+class PayloadStore:
+    """
+    SQLite store of API payloads keyed by request path, with their ETags
+
+    Check-run and status payloads repeat the same app, check-suite, creator
+    and output objects on every commit. Each payload is split bottom-up:
+    every object-valued field of at least DEDUP_MIN_BYTES is replaced by a
+    reference to a blob named by the sha256 of its canonical JSON, and the
+    rest of the payload becomes its root blob. Blobs are zlib-compressed
+    and stored once, however many payloads share them. Payload objects that
+    would read as a reference are stored wrapped in a LITERAL object.
+    Rewriting a key can leave blobs unreferenced; compact() removes them.
+    """
+
+    def __init__(self, path, cache_size=DEFAULT_CACHE_SIZE):
+        self.path = path
+        # Shared by a client's fetch threads; batch worker processes each
+        # open their own connection and wait on the file lock
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                raw_size INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS payloads (
+                key TEXT PRIMARY KEY,
+                root TEXT NOT NULL,
+                etag TEXT,
+                raw_size INTEGER NOT NULL,
+                stored_at REAL NOT NULL
+            );
+            """
+        )
+        self.conn.commit()
+
+    def put(self, key, payload, etag=None):
+        """Store a decoded JSON payload (and the ETag it was served with) under key"""
+        blobs = {}
+        encoded = _encode(self._externalize(payload, blobs))
+        root = hashlib.sha256(encoded).hexdigest()
+        blobs[root] = encoded
+
+        with self._lock, self.conn:
+            # Take the write lock before checking which blobs exist, so a
+            # compact() in another process cannot delete one in between
+            self.conn.execute("BEGIN IMMEDIATE")
+            known = self._existing(list(blobs))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO blobs (hash, data, raw_size) VALUES (?, ?, ?)",
+                [(digest, zlib.compress(encoded), len(encoded))
+                 for digest, encoded in blobs.items() if digest not in known]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO payloads (key, root, etag, raw_size, stored_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, root, etag, len(_encode(payload)), time.time())
+            )
+
+    def get(self, key):
+        """
+        Return (payload, etag) stored under key, or None
+
+        Every occurrence of a blob shared within the payload (such as the
+        app object on each check run) is the same object, which keeps loads
+        fast. Treat loaded payloads as read-only, or copy them before
+        modifying any part.
+        """
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT root, etag FROM payloads WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            return self._load(row[0], {}), row[1]
+
+    def etag(self, key):
+        """ETag stored with key (None if absent or never sent)"""
+        with self._lock:
+            row = self.conn.execute("SELECT etag FROM payloads WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _externalize(self, value, blobs, field=False):
+        """
+        Replace large object-valued fields with blob references, innermost first
+
+        Only fields are split out (app, check_suite, output, creator...);
+        list items are per-record and unique, so they stay inline where one
+        zlib stream over the whole list compresses their repeated keys.
+        """
+        if isinstance(value, list):
+            return [self._externalize(item, blobs) for item in value]
+        if not isinstance(value, dict):
+            return value
+        node = {k: self._externalize(v, blobs, field=True) for k, v in value.items()}
+        if _is_reserved(node):
+            node = {LITERAL: node}
+        if not field:
+            return node
+        encoded = _encode(node)
+        if len(encoded) < DEDUP_MIN_BYTES:
+            return node
+        digest = hashlib.sha256(encoded).hexdigest()
+        blobs[digest] = encoded
+        return {BLOB_REF: digest}
+
+    def _existing(self, digests):
+        known = set()
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            rows = self.conn.execute(
+                f"SELECT hash FROM blobs WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            known.update(row[0] for row in rows)
+        return known
+
+    def _blob(self, digest):
+        """Decompressed bytes of one blob, through the in-memory cache"""
+        encoded = self._cache.get(digest)
+        if encoded is not None:
+            self._cache.move_to_end(digest)
+            return encoded
+        row = self.conn.execute("SELECT data FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            raise ValueError(f"Payload store {self.path} is missing blob {digest}")
+        encoded = zlib.decompress(row[0])
+        self._cache[digest] = encoded
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return encoded
+
+    def _load(self, digest, decoded):
+        """Rebuild a blob's value; `decoded` shares blobs repeated within one payload"""
+        if digest not in decoded:
+            decoded[digest] = self._resolve(json.loads(self._blob(digest)), decoded)
+        return decoded[digest]
+
+    def _resolve(self, value, decoded):
+        if isinstance(value, list):
+            return [self._resolve(item, decoded) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if _is_reserved(value):
+            if BLOB_REF in value:
+                return self._load(value[BLOB_REF], decoded)
+            value = value[LITERAL]
+        return {k: self._resolve(v, decoded) for k, v in value.items()}
+
+    def compact(self):
+        """
+        Delete blobs no payload references any more and reclaim the space
+
+        Returns:
+            Dict with blobs_removed and bytes_before/bytes_after (file size)
+        """
+        with self._lock:
+            bytes_before = self._file_size()
+            # Mark and sweep in one write transaction, so no put() can
+            # reference a blob between being marked dead and deleted
+            with self.conn:
+                self.conn.execute("BEGIN IMMEDIATE")
+                live = set()
+                pending = [row[0] for row in self.conn.execute("SELECT DISTINCT root FROM payloads")]
+                while pending:
+                    digest = pending.pop()
+                    if digest in live:
+                        continue
+                    live.add(digest)
+                    pending.extend(_references(json.loads(self._blob(digest))))
+
+                stored = [row[0] for row in self.conn.execute("SELECT hash FROM blobs")]
+                dead = [digest for digest in stored if digest not in live]
+                self.conn.executemany("DELETE FROM blobs WHERE hash = ?", [(d,) for d in dead])
+            self.conn.execute("VACUUM")
+            for digest in dead:
+                self._cache.pop(digest, None)
+            return {"blobs_removed": len(dead), "bytes_before": bytes_before,
+                    "bytes_after": self._file_size()}
+
+    def stats(self):
+        """
+        Size and compression statistics
+
+        Returns:
+            Dict with payloads, blobs, raw_bytes (payloads as plain JSON),
+            unique_bytes (distinct content before compression),
+            stored_bytes (compressed), dedup_ratio and compression_ratio
+            (raw_bytes / stored_bytes)
+        """
+        with self._lock:
+            payloads, raw_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM payloads"
+            ).fetchone()
+            blobs, unique_bytes, stored_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "payloads": payloads,
+            "blobs": blobs,
+            "raw_bytes": raw_bytes,
+            "unique_bytes": unique_bytes,
+            "stored_bytes": stored_bytes,
+            "dedup_ratio": round(raw_bytes / unique_bytes, 2) if unique_bytes else 0,
+            "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else 0
+        }
+
+    def measure_load(self):
+        """
+        Load every stored payload once, starting from a cold cache
+
+        Returns:
+            Dict with payloads, seconds, payloads_per_sec and mb_per_sec
+            (raw JSON megabytes rebuilt per second)
+        """
+        with self._lock:
+            keys = [row[0] for row in self.conn.execute("SELECT key FROM payloads")]
+            raw_bytes = self.conn.execute(
+                "SELECT COALESCE(SUM(raw_size), 0) FROM payloads"
+            ).fetchone()[0]
+        self._cache.clear()
+        start = time.perf_counter()
+        for key in keys:
+            self.get(key)
+        elapsed = time.perf_counter() - start
+        return {
+            "payloads": len(keys),
+            "seconds": elapsed,
+            "payloads_per_sec": len(keys) / elapsed if elapsed > 0 else 0.0,
+            "mb_per_sec": raw_bytes / 1e6 / elapsed if elapsed > 0 else 0.0
+        }
+
+    def _file_size(self):
+        page_count = self.conn.execute("PRAGMA page_count").fetchone()[0]
+        page_size = self.conn.execute("PRAGMA page_size").fetchone()[0]
+        return page_count * page_size
+
+    def close(self):
+        self.conn.close()
+
+
+def _references(value):
+    """Blob digests referenced directly by a decoded blob"""
+    if isinstance(value, list):
+        return [digest for item in value for digest in _references(item)]
+    if not isinstance(value, dict):
+        return []
+    if _is_reserved(value):
+        if BLOB_REF in value:
+            return [value[BLOB_REF]]
+        value = value[LITERAL]
+    return [digest for v in value.values() for digest in _references(v)]
+
+
+def _is_reserved(value):
+    """Whether a dict is a blob reference or literal wrapper (when stored)"""
+    return len(value) == 1 and next(iter(value)) in RESERVED_KEYS
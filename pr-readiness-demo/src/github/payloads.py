@@ -0,0 +1,73 @@
+"""
+Lean Payload Decoding
+Field-projected decoding of check-run and status payloads into compact records
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+# The only fields aggregate_ci and build_ci_history read
+CHECK_RUN_FIELDS = ("name", "status", "conclusion")
+STATUS_FIELDS = ("context", "state")
+
+
+def decode_json(raw):
+    """Decode a JSON response body, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def project_check_runs(raw):
+    """
+    Decode a check-runs response body keeping only the fields we score on
+
+    The large output/app/check_suite sub-objects are dropped right after
+    parsing so they are never retained per commit.
+
+    Returns:
+        List of {"name", "status", "conclusion"} dicts
+    """
+    return project_records(decode_json(raw).get("check_runs", []), CHECK_RUN_FIELDS)
+
+
+def project_statuses(raw):
+    """
+    Decode a commit-statuses response body keeping only context and state
+
+    Returns:
+        List of {"context", "state"} dicts
+    """
+    return project_records(decode_json(raw), STATUS_FIELDS)
+
+
+def project_records(records, fields):
+    """Keep only `fields` of already-decoded records (e.g. loaded from a PayloadStore)"""
+    return [{field: record.get(field) for field in fields} for record in records]
+
+
+def project_rollup_contexts(contexts):
+    """
+    Convert GraphQL statusCheckRollup context nodes into lean REST-shaped records
+
+    GraphQL enums are the upper-case forms of the REST values, so lowering
+    them lets aggregate_ci and normalize_ci_outcome read both alike.
+
+    Returns:
+        (check_runs, statuses) as from project_check_runs/project_statuses
+    """
+    check_runs, statuses = [], []
+    for context in contexts:
+        if context.get("__typename") == "CheckRun":
+            check_runs.append({
+                "name": context["name"],
+                "status": (context["status"] or "").lower(),
+                "conclusion": context["conclusion"].lower() if context["conclusion"] else None
+            })
+        elif context.get("__typename") == "StatusContext":
+            statuses.append({"context": context["context"], "state": context["state"].lower()})
+    return check_runs, statuses
@@ -0,0 +1,107 @@
+"""
+API Cost Planner
+Estimates the request cost of a batch and degrades it to fit the live rate-limit budget
+"""
+
+# Per commit: one check-runs and one statuses request
+REQUESTS_PER_COMMIT = 2
+# Per PR: the commit listing
+REQUESTS_PER_PR = 1
+# Requests held back for everything else the process does
+DEFAULT_RESERVE = 100
+
+
+def estimate_cost(commits, max_commits):
+    """Requests analyze_ci_reliability makes for a PR with `commits` commits"""
+    return REQUESTS_PER_PR + REQUESTS_PER_COMMIT * min(commits, max_commits)
+
+
+def plan_batch(jobs, budget, max_commits=20, min_commits=5, reserve=DEFAULT_RESERVE):
+    """
+    Fit a batch of PR jobs into a request budget
+
+    Degradation happens in two steps: first max_commits is lowered (never
+    below min_commits) until every PR fits; if that is not enough, PRs are
+    skipped from the lowest priority up. Jobs flagged "cached" (already
+    analyzed) cost nothing and are never skipped.
+
+    Args:
+        jobs: {"owner", "repo", "number", "commits"} dicts, optionally with
+              "priority" (higher runs first, default 0) and "cached"
+        budget: Requests remaining, e.g. client.get_rate_limit()["remaining"]
+        max_commits: History depth to use when the budget allows
+        min_commits: Shallowest history worth scoring
+        reserve: Requests to leave unspent
+
+    Returns:
+        Plan dict with the chosen "max_commits", "estimated_cost", and the
+        "run", "skipped" and "cached" job lists (each job gains a "cost")
+    """
+    available = max(budget - reserve, 0)
+    cached = [job for job in jobs if job.get("cached")]
+    candidates = [job for job in jobs if not job.get("cached")]
+
+    def total(depth, selected):
+        return sum(estimate_cost(job["commits"], depth) for job in selected)
+
+    depth = max_commits
+    if total(depth, candidates) > available:
+        # Deepest history that still fits; cost is monotonic in depth
+        low, high = min_commits, max_commits
+        while low < high:
+            mid = (low + high + 1) // 2
+            if total(mid, candidates) <= available:
+                low = mid
+            else:
+                high = mid - 1
+        depth = min(low, max_commits)
+
+    # Stable sort keeps input order among equal priorities
+    ranked = sorted(enumerate(candidates), key=lambda item: (-item[1].get("priority", 0), item[0]))
+    run, skipped, spent = [], [], 0
+    for _, job in ranked:
+        cost = estimate_cost(job["commits"], depth)
+        if spent + cost <= available:
+            run.append(dict(job, cost=cost))
+            spent += cost
+        else:
+            skipped.append(dict(job, cost=cost))
+
+    return {
+        "budget": budget,
+        "reserve": reserve,
+        "max_commits": depth,
+        "estimated_cost": spent,
+        "run": run,
+        "skipped": skipped,
+        "cached": [dict(job, cost=0) for job in cached]
+    }
+
+
+def plan_for_client(client, jobs, store=None, max_commits=20, min_commits=5,
+                    reserve=DEFAULT_RESERVE):
+    """
+    Build a plan from the live /rate_limit budget and each PR's commit count
+
+    Commit counts come from the job's "commits" key when present, otherwise
+    from one pulls request per PR; those lookups are spent before the plan
+    is made and are reported as "planning_cost". Jobs already completed in
+    the batch JobStore are marked cached.
+    """
+    planning_cost = 0
+    sized = []
+    for job in jobs:
+        job = dict(job)
+        if store is not None and store.is_done(job):
+            job["cached"] = True
+            job.setdefault("commits", 0)
+        elif "commits" not in job:
+            job["commits"] = client.get_pull_request(job["owner"], job["repo"], job["number"])["commits"]
+            planning_cost += 1
+        sized.append(job)
+
+    budget = client.get_rate_limit()["remaining"]
+    plan = plan_batch(sized, budget, max_commits=max_commits,
+                      min_commits=min_commits, reserve=reserve)
+    plan["planning_cost"] = planning_cost
+    return plan
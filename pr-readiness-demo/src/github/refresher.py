@@ -0,0 +1,179 @@
+"""
+Events-Feed Refresher
+Polls repository event feeds with ETags to find PRs whose CI needs re-analysis
+"""
+
+import json
+import os
+import time
+
+# PullRequestEvent actions that put new commits (and so new CI runs) on a PR
+PR_ACTIVITY_ACTIONS = ("opened", "reopened", "synchronize")
+PR_CLOSED_ACTIONS = ("closed",)
+
+# Page size for listing the open PRs a repository's branch map is seeded from
+SEED_PAGE_SIZE = 100
+
+
+class EventsRefresher:
+    """
+    Tracks which PRs in a set of repositories have fresh CI activity
+
+    Each repository costs one events request per server-chosen poll
+    interval, and unchanged feeds answer 304 against the stored ETag.
+    The public events feed carries no check-run events, so CI activity is
+    inferred from what triggers it: PullRequestEvent opened, reopened or
+    synchronize, and PushEvent to a branch that is the head of an open PR.
+    Head branches are keyed by the head repository as well as the ref, so
+    a fork branch named like a base branch is never matched by pushes to
+    the base repository; the map is seeded from the open PRs on the first
+    poll and kept current from PullRequestEvents.
+    """
+
+    def __init__(self, client, repos, state_path=None):
+        """
+        Args:
+            client: GitHubClient (anything with get_repo_events and
+                    get_pull_requests)
+            repos: Iterable of "owner/repo" strings
+            state_path: Optional JSON file persisting ETags, poll schedule,
+                        last seen event ids and known PR head branches
+        """
+        self.client = client
+        self.state_path = state_path
+        self.state = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        for repo in repos:
+            self.state.setdefault(repo, {
+                "etag": None,
+                "poll_interval": None,
+                "next_poll": 0,
+                "last_event_id": None,
+                "branches": {}
+            })
+            # State saved before seeding keyed branches by bare ref
+            self.state[repo].setdefault("seeded", False)
+        self.repos = list(dict.fromkeys(repos))
+
+    def save(self):
+        """Write the refresher state to disk atomically"""
+        if not self.state_path:
+            raise ValueError("No path given for saving the refresher state")
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def poll(self, now=None):
+        """
+        Poll every repository whose interval has elapsed
+
+        Returns:
+            De-duplicated list of {"owner", "repo", "number"} jobs with new
+            activity since the previous poll, in event order
+        """
+        now = time.time() if now is None else now
+        queued = {}
+        for full_name in self.repos:
+            state = self.state[full_name]
+            if state["next_poll"] > now:
+                continue
+            owner, repo = full_name.split("/", 1)
+            if not state["seeded"]:
+                state["branches"] = self._open_pr_branches(owner, repo)
+                state["seeded"] = True
+            events, state["etag"], state["poll_interval"] = self.client.get_repo_events(
+                owner, repo, etag=state["etag"]
+            )
+            state["next_poll"] = now + state["poll_interval"]
+            if events is None:
+                continue
+            for number in self._active_prs(full_name, state, events):
+                queued[(owner, repo, number)] = None
+        return [{"owner": o, "repo": r, "number": n} for o, r, n in queued]
+
+    def next_poll_in(self, now=None):
+        """Seconds until the next repository is due to be polled"""
+        now = time.time() if now is None else now
+        return max(min(self.state[r]["next_poll"] for r in self.repos) - now, 0)
+
+    def _open_pr_branches(self, owner, repo):
+        """Branch map of every open PR, so pushes to PRs opened before the first poll are seen"""
+        branches = {}
+        page = 1
+        while True:
+            prs = self.client.get_pull_requests(owner, repo, state="open",
+                                                per_page=SEED_PAGE_SIZE, page=page)
+            for pr in prs:
+                key = _branch_key(pr.get("head"))
+                if key:
+                    branches.setdefault(key, []).append(str(pr["number"]))
+            if len(prs) < SEED_PAGE_SIZE:
+                return branches
+            page += 1
+
+    def _active_prs(self, full_name, state, events):
+        """PR numbers with CI activity among events newer than the last poll, oldest first"""
+        last_id = state["last_event_id"]
+        # The feed is newest first; event ids increase over time
+        fresh = [e for e in events if last_id is None or int(e["id"]) > int(last_id)]
+        if fresh:
+            state["last_event_id"] = max((e["id"] for e in fresh), key=int)
+
+        branches = state["branches"]
+        active = []
+        for event in reversed(fresh):
+            payload = event.get("payload", {})
+            if event["type"] == "PullRequestEvent":
+                pr = payload.get("pull_request", {})
+                number = str(payload.get("number") or pr.get("number"))
+                head = _branch_key(pr.get("head"))
+                if payload.get("action") in PR_CLOSED_ACTIONS:
+                    if head and number in branches.get(head, []):
+                        branches[head].remove(number)
+                        if not branches[head]:
+                            del branches[head]
+                    continue
+                if head:
+                    prs = branches.setdefault(head, [])
+                    if number not in prs:
+                        prs.append(number)
+                if payload.get("action") in PR_ACTIVITY_ACTIONS:
+                    active.append(number)
+            elif event["type"] == "PushEvent":
+                ref = payload.get("ref", "")
+                branch = ref[len("refs/heads/"):] if ref.startswith("refs/heads/") else ref
+                # The feed only holds pushes to this repository itself
+                active.extend(branches.get(f"{full_name}:{branch}", []))
+        return list(dict.fromkeys(active))
+
+    def run(self, analyze, iterations=None, sleep=time.sleep):
+        """
+        Poll-and-analyze loop
+
+        Args:
+            analyze: Callback(owner, repo, number), e.g. a wrapper around
+                     analyze_ci_reliability
+            iterations: Number of polls before returning (None = forever)
+            sleep: Injectable sleep function
+        """
+        done = 0
+        while iterations is None or done < iterations:
+            for job in self.poll():
+                analyze(job["owner"], job["repo"], job["number"])
+            if self.state_path:
+                self.save()
+            done += 1
+            if iterations is None or done < iterations:
+                sleep(self.next_poll_in())
+
+
+def _branch_key(head):
+    """'owner/repo:ref' for a PR head, or None when its repository is gone (deleted fork)"""
+    head = head or {}
+    head_repo = (head.get("repo") or {}).get("full_name")
+    if not head_repo or not head.get("ref"):
+        return None
+    return f"{head_repo}:{head['ref']}"
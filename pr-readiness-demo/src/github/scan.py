@@ -0,0 +1,134 @@
+"""
+Incremental Repository Scan
+Re-analyzes only the pull requests that changed since the previous scan of a repository
+"""
+
+import json
+import os
+
+
+class RepoScanner:
+    """
+    Keeps each scanned repository's open PR results between scans
+
+    Pull requests are listed most recently updated first and paging stops
+    at the previous scan's updated_at watermark, so a scan costs one page
+    plus one analysis per PR that actually changed. Every PR above the
+    watermark is still checked against its stored head sha: comments,
+    labels and reviews bump updated_at without new CI, and those PRs keep
+    their previous result.
+    """
+
+    def __init__(self, client, state_path=None):
+        """
+        Args:
+            client: GitHubClient (anything with get_pull_requests)
+            state_path: Optional JSON file persisting each repository's
+                        watermark and per-PR head sha and result
+        """
+        self.client = client
+        self.state_path = state_path
+        self.state = {}
+        if state_path and os.path.exists(state_path):
+            with open(state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def save(self):
+        """Write the scan state to disk atomically"""
+        if not self.state_path:
+            raise ValueError("No path given for saving the scan state")
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def scan(self, owner, repo, analyze=None, per_page=100):
+        """
+        Bring a repository's open PR results up to date
+
+        A PR is re-analyzed when it is new, its head sha moved, or its
+        stored result still had pending checks (CI finishing does not bump
+        updated_at). PRs closed since the watermark are dropped. The
+        watermark only advances once every changed PR was analyzed, so an
+        interrupted scan repeats the listing but not the finished analyses.
+
+        Args:
+            analyze: Callback(owner, repo, number) returning a report;
+                     defaults to analyze_ci_reliability with this client
+
+        Returns:
+            Dict with "results" (report per PR number) and "stats"
+        """
+        if analyze is None:
+            from .history import analyze_ci_reliability
+
+            def analyze(owner, repo, number):
+                return analyze_ci_reliability(self.client, owner, repo, number)
+
+        state = self.state.setdefault(f"{owner}/{repo}", {"watermark": None, "prs": {}})
+        watermark = state["watermark"]
+        prs = state["prs"]
+        stats = {"pages": 0, "listed": 0, "analyzed": 0, "unchanged": 0,
+                 "closed": 0, "reused": 0}
+
+        changed, new_watermark = self._list_changed(owner, repo, watermark, per_page, stats)
+
+        for number, pr in changed.items():
+            if pr["state"] != "open":
+                if prs.pop(number, None) is not None:
+                    stats["closed"] += 1
+                continue
+            previous = prs.get(number)
+            if (previous is not None and previous["head_sha"] == pr["head"]["sha"]
+                    and not _has_pending(previous["report"])):
+                stats["unchanged"] += 1
+                continue
+            prs[number] = {
+                "head_sha": pr["head"]["sha"],
+                "updated_at": pr["updated_at"],
+                "report": analyze(owner, repo, number)
+            }
+            stats["analyzed"] += 1
+
+        # PRs below the watermark whose CI was still running are rechecked too
+        for number, entry in list(prs.items()):
+            if number not in changed and _has_pending(entry["report"]):
+                entry["report"] = analyze(owner, repo, number)
+                stats["analyzed"] += 1
+
+        state["watermark"] = new_watermark
+        stats["reused"] = len(prs) - stats["analyzed"]
+        stats["watermark"] = new_watermark
+        return {"results": {number: entry["report"] for number, entry in prs.items()},
+                "stats": stats}
+
+    def _list_changed(self, owner, repo, watermark, per_page, stats):
+        """PRs updated at or after the watermark keyed by number, and the new watermark"""
+        # The first scan only needs open PRs; later scans also list closed
+        # ones so PRs closed since the watermark can be dropped
+        list_state = "all" if watermark else "open"
+        changed = {}
+        new_watermark = watermark
+        page = 1
+        while True:
+            listing = self.client.get_pull_requests(owner, repo, state=list_state,
+                                                    per_page=per_page, page=page)
+            stats["pages"] += 1
+            for pr in listing:
+                # Strictly older PRs were seen by the previous scan; equal
+                # timestamps are rechecked since they may have landed after it
+                if watermark and pr["updated_at"] < watermark:
+                    return changed, new_watermark
+                stats["listed"] += 1
+                if new_watermark is None or pr["updated_at"] > new_watermark:
+                    new_watermark = pr["updated_at"]
+                # A PR updated mid-scan can show up on two pages; keep the first
+                changed.setdefault(str(pr["number"]), pr)
+            if len(listing) < per_page:
+                return changed, new_watermark
+            page += 1
+
+
+def _has_pending(report):
+    """Whether any check in an analysis report was still running"""
+    return any(check.get("current_status") == "PENDING" for check in (report or {}).values())
@@ -0,0 +1,485 @@
+"""
+Rule-Table Scoring Engine
+Computes a check's metrics in one pass and classifies them from declarative rule tables
+"""
+
+import ast
+import json
+
+# Classification thresholds; a scoring config can override any of them per repository
+DEFAULT_THRESHOLDS = {
+    "reliable_min_runs": 10,
+    "highly_stable_min_runs": 15,
+    "highly_stable_pass_rate": 93,
+    "stable_streak": 5,
+    "stable_pass_rate": 70,
+    "stabilizing_streak": 3,
+    "stabilizing_pass_rate": 60,
+    "failing_streak": 3,
+    "complete_failure_min_runs": 3,
+    "low_pass_rate": 50,
+    "low_pass_rate_min_runs": 5,
+    "min_runs": 3,
+    "moderate_pass_rate": 60,
+    "flaky_min_runs": 4,
+    "flaky_min_transitions": 3,
+    "flaky_transition_rate": 0.35,
+}
+
+# Each rule is (classification, condition, score, reason). Conditions,
+# scores and reasons are Python expressions over the metric names below and
+# the threshold names above; the first rule whose condition holds wins, and
+# the last rule must always hold. Reasons print run counts with count_text,
+# since time-decayed scoring passes fractional effective counts.
+CONFIDENCE_RULES = (
+    ("RELIABLE",
+     "total_runs >= reliable_min_runs and failures == 0",
+     "100",
+     'f"Perfect track record: {count_text(total_runs)} consecutive passes with no failures"'),
+    ("RELIABLE",
+     "total_runs >= highly_stable_min_runs and pass_rate >= highly_stable_pass_rate",
+     "int(90 + min(10, int((pass_rate - 90))))",
+     'f"Highly stable: {pass_rate:.1f}% pass rate over {count_text(total_runs)} runs '
+     '({count_text(failures)} failure{\'s\' if failures > 1 else \'\'})"'),
+    ("STABLE",
+     "consecutive_passes >= stable_streak and pass_rate >= stable_pass_rate",
+     "int(70 + min(15, consecutive_passes * 2))",
+     'f"Recently stable: {consecutive_passes} consecutive passes (overall {pass_rate:.1f}% pass rate)"'),
+    ("STABLE",
+     "consecutive_passes >= stabilizing_streak and pass_rate >= stabilizing_pass_rate and not is_flaky",
+     "min(85, int(70 + (consecutive_passes * 3)))",
+     'f"Stabilizing: {consecutive_passes} recent passes out of {count_text(total_runs)} total runs"'),
+    ("FLAKY",
+     "is_flaky",
+     "max(20, min(50, int(pass_rate / 2)))",
+     'f"Inconsistent behavior: {count_text(flaky_transitions)} pass/fail transitions detected '
+     'across {count_text(total_runs)} runs"'),
+    ("UNSTABLE",
+     "consecutive_failures >= failing_streak",
+     "int(max(10, 30 - (consecutive_failures * 3)))",
+     'f"Failing consistently: {consecutive_failures} consecutive failures"'),
+    ("UNSTABLE",
+     "failures == total_runs and total_runs >= complete_failure_min_runs",
+     "10",
+     'f"Complete failure: All {count_text(total_runs)} runs failed"'),
+    ("UNSTABLE",
+     "pass_rate < low_pass_rate and total_runs >= low_pass_rate_min_runs",
+     "max(15, int(pass_rate / 2))",
+     'f"Low reliability: {pass_rate:.1f}% pass rate ({count_text(passes)}/{count_text(total_runs)} runs)"'),
+    ("UNKNOWN",
+     "total_runs < min_runs",
+     "int(40 + (total_runs * 5))",
+     'f"Insufficient data: Only {count_text(total_runs)} run(s) available"'),
+    ("STABLE",
+     "pass_rate >= moderate_pass_rate",
+     "max(30, min(70, int(pass_rate * 0.7)))",
+     'f"Moderate stability: {pass_rate:.1f}% pass rate over {count_text(total_runs)} runs"'),
+    ("UNSTABLE",
+     "True",
+     "max(30, min(70, int(pass_rate * 0.7)))",
+     'f"Unreliable: {pass_rate:.1f}% pass rate ({count_text(passes)}/{count_text(total_runs)} runs passed)"'),
+)
+
+# The older stability heuristics behind history.calculate_stability_metrics.
+# They have fixed thresholds and flag flakiness on any two transitions.
+STABILITY_RULES = (
+    ("FLAKY",
+     "flaky_transitions >= 2",
+     "max(20, min(50, int((passes / total_runs) * 100)))",
+     'f"Alternating pass/fail detected across {total_runs} runs"'),
+    ("RELIABLE",
+     "total_runs >= 10 and failures == 0",
+     "100",
+     'f"No failures in {total_runs} consecutive runs"'),
+    ("STABLE",
+     "consecutive_passes >= 3",
+     "min(95, 70 + (consecutive_passes * 5))",
+     'f"{consecutive_passes} consecutive passes detected"'),
+    ("UNSTABLE",
+     "failures == total_runs",
+     "10",
+     'f"Failed all {total_runs} runs"'),
+    ("UNKNOWN",
+     "total_runs < 5",
+     "50",
+     'f"Insufficient data ({total_runs} runs)"'),
+    ("UNSTABLE",
+     "True",
+     "int((passes / total_runs) * 100)",
+     'f"Pass rate: {int((passes / total_runs) * 100)}% ({passes}/{total_runs} runs)"'),
+)
+
+_METRIC_NAMES = ("total_runs", "passes", "failures", "pass_rate", "consecutive_passes",
+                 "consecutive_failures", "flaky_transitions", "is_flaky")
+
+
+def compile_rules(rules, thresholds, name="rules"):
+    """
+    Compile a rule table into one function of the metric values
+
+    The table becomes a single generated if-chain, so evaluating it costs the
+    same as a handwritten cascade. Thresholds are bound as the function's
+    globals rather than pasted into the source.
+
+    Returns:
+        Function(total_runs, passes, failures, pass_rate, consecutive_passes,
+        consecutive_failures, flaky_transitions, is_flaky) returning
+        (score, classification, reason)
+    """
+    if not rules or rules[-1][1] != "True":
+        raise ValueError(f"The last rule of {name} must have the condition 'True'")
+    lines = [f"def {name}({', '.join(_METRIC_NAMES)}):"]
+    for classification, condition, score, reason in rules:
+        lines.append(f"    if {condition}:")
+        lines.append(f"        return {score}, {classification!r}, {reason}")
+    namespace = {}
+    exec(compile("\n".join(lines), f"<{name}>", "exec"), dict(thresholds, count_text=count_text),
+         namespace)
+    return namespace[name]
+
+
+def count_text(count):
+    """A run count for reason text: whole counts as integers, effective (decayed) ones to one decimal"""
+    if count == int(count):
+        return str(int(count))
+    return f"{count:.1f}"
+
+
+def merge_thresholds(overrides=None, base=None):
+    """Validated copy of base (default DEFAULT_THRESHOLDS) updated with overrides"""
+    merged = dict(DEFAULT_THRESHOLDS if base is None else base)
+    for key, value in (overrides or {}).items():
+        if key not in DEFAULT_THRESHOLDS:
+            raise ValueError(f"Unknown scoring threshold: {key}")
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"Scoring threshold {key} must be a number, got {value!r}")
+        merged[key] = value
+    return merged
+
+
+def summarize_outcomes(outcomes):
+    """
+    Single pass over an outcome list, oldest first
+
+    Returns:
+        (seen, passes, failures, transitions, consecutive_passes,
+        consecutive_failures). Transitions and streaks are counted over
+        completed (PASS/FAIL) outcomes only.
+    """
+    seen = passes = failures = transitions = streak = 0
+    last = None
+    for outcome in outcomes:
+        seen += 1
+        result = outcome["outcome"]
+        if result == "PASS":
+            passes += 1
+        elif result == "FAIL":
+            failures += 1
+        else:
+            continue
+        if result == last:
+            streak += 1
+        else:
+            if last is not None:
+                transitions += 1
+            last = result
+            streak = 1
+    if last == "PASS":
+        return seen, passes, failures, transitions, streak, 0
+    return seen, passes, failures, transitions, 0, streak
+
+
+class ScoringEngine:
+    """
+    Confidence scoring from compiled rule tables
+
+    One engine holds one set of thresholds; build one per repository that
+    has custom thresholds and share DEFAULT_ENGINE otherwise.
+    """
+
+    def __init__(self, thresholds=None, rules=CONFIDENCE_RULES):
+        self.thresholds = merge_thresholds(thresholds)
+        self._rules = compile_rules(rules, self.thresholds, "confidence_rules")
+        self._conditions = [(classification, ast.parse(condition, mode="eval").body)
+                            for classification, condition, _, _ in rules]
+        self._threshold_bounds = {name: (value, value) for name, value in self.thresholds.items()}
+        self._flaky_min_runs = self.thresholds["flaky_min_runs"]
+        self._flaky_min_transitions = self.thresholds["flaky_min_transitions"]
+        self._flaky_transition_rate = self.thresholds["flaky_transition_rate"]
+
+    def is_flaky(self, total_runs, transitions):
+        """Flaky: enough runs, enough transitions, and a high transition rate"""
+        return (total_runs >= self._flaky_min_runs
+                and transitions >= self._flaky_min_transitions
+                and transitions / total_runs >= self._flaky_transition_rate)
+
+    def score(self, outcomes):
+        """
+        Score one check's outcomes (oldest first)
+
+        Returns:
+            dict with confidence_score, classification, reason, and metrics
+        """
+        seen, passes, failures, transitions, consecutive_passes, consecutive_failures = (
+            summarize_outcomes(outcomes)
+        )
+        if seen == 0:
+            return _no_history()
+        total_runs = passes + failures
+        if total_runs == 0:
+            return _all_pending(seen)
+
+        pass_rate = (passes / total_runs) * 100
+        is_flaky = self.is_flaky(total_runs, transitions)
+        flaky_transitions = transitions if total_runs >= self._flaky_min_runs else 0
+        score, classification, reason = self._rules(
+            total_runs, passes, failures, pass_rate, consecutive_passes,
+            consecutive_failures, flaky_transitions, is_flaky
+        )
+        return {
+            "confidence_score": score,
+            "classification": classification,
+            "reason": reason,
+            "metrics": {
+                "total_runs": total_runs,
+                "passes": passes,
+                "failures": failures,
+                "pass_rate": round(pass_rate, 1),
+                "consecutive_passes": consecutive_passes,
+                "consecutive_failures": consecutive_failures,
+                "flaky_transitions": flaky_transitions
+            }
+        }
+
+    def reachable_classifications(self, outcomes, remaining):
+        """
+        Classifications outcomes (oldest first) can end up with once up to
+        `remaining` older outcomes are prepended
+
+        Each prepended commit may add a pass, a failure, a pending run or
+        nothing, so every metric is bounded by an interval over all such
+        completions and each rule condition is evaluated over that box. The
+        result can over-approximate but never misses a reachable
+        classification; a single element means the classification is fixed.
+        """
+        seen, passes, failures, transitions, consecutive_passes, consecutive_failures = (
+            summarize_outcomes(outcomes)
+        )
+        total_runs = passes + failures
+        if not remaining:
+            return {self.score(outcomes)["classification"]}
+        if total_runs == 0:
+            return {classification for classification, _ in self._conditions} | {"UNKNOWN"}
+
+        most_runs = total_runs + remaining
+        # Older runs only extend the current streak when no known run broke it
+        passes_streak = consecutive_passes + (remaining if consecutive_passes and not transitions else 0)
+        failures_streak = consecutive_failures + (remaining if consecutive_failures and not transitions else 0)
+        # k more completed runs add at most k transitions (one at the junction)
+        rate_low = transitions / most_runs
+        rate_high = max(transitions / total_runs, (transitions + remaining) / most_runs)
+        can_flaky = (most_runs >= self._flaky_min_runs
+                     and transitions + remaining >= self._flaky_min_transitions
+                     and rate_high >= self._flaky_transition_rate)
+        must_flaky = (total_runs >= self._flaky_min_runs
+                      and transitions >= self._flaky_min_transitions
+                      and rate_low >= self._flaky_transition_rate)
+
+        bounds = dict(self._threshold_bounds)
+        bounds.update({
+            "total_runs": (total_runs, most_runs),
+            "passes": (passes, passes + remaining),
+            "failures": (failures, failures + remaining),
+            "pass_rate": (100 * passes / most_runs,
+                          100 * max(passes / total_runs, (passes + remaining) / most_runs)),
+            "consecutive_passes": (consecutive_passes, passes_streak),
+            "consecutive_failures": (consecutive_failures, failures_streak),
+            "flaky_transitions": (transitions if total_runs >= self._flaky_min_runs else 0,
+                                  transitions + remaining),
+            "is_flaky": {value for value in (True, False)
+                         if (can_flaky if value else not must_flaky)},
+        })
+
+        reachable = set()
+        for classification, condition in self._conditions:
+            values = _evaluate_over(condition, bounds)
+            if True in values:
+                reachable.add(classification)
+            if False not in values:
+                break
+        return reachable
+
+    def classify(self, metrics, is_flaky):
+        """Apply the rule table to precomputed (possibly decayed) metrics"""
+        total_runs = metrics["total_runs"]
+        passes = metrics["passes"]
+        # Recompute rather than reading metrics["pass_rate"], which is rounded
+        pass_rate = (passes / total_runs) * 100 if total_runs > 0 else 0
+        score, classification, reason = self._rules(
+            total_runs, passes, metrics["failures"], pass_rate, metrics["consecutive_passes"],
+            metrics["consecutive_failures"], metrics["flaky_transitions"], is_flaky
+        )
+        return {
+            "confidence_score": score,
+            "classification": classification,
+            "reason": reason,
+            "metrics": metrics
+        }
+
+
+# Interval comparisons: (always true, possibly true) for (low, high) operands
+_INTERVAL_COMPARE = {
+    ast.GtE: lambda a, b: (a[0] >= b[1], a[1] >= b[0]),
+    ast.Gt: lambda a, b: (a[0] > b[1], a[1] > b[0]),
+    ast.LtE: lambda a, b: (a[1] <= b[0], a[0] <= b[1]),
+    ast.Lt: lambda a, b: (a[1] < b[0], a[0] < b[1]),
+    ast.Eq: lambda a, b: (a[0] == a[1] == b[0] == b[1], a[0] <= b[1] and b[0] <= a[1]),
+    ast.NotEq: lambda a, b: (not (a[0] <= b[1] and b[0] <= a[1]), not a[0] == a[1] == b[0] == b[1]),
+}
+
+
+def _evaluate_over(node, bounds):
+    """
+    Evaluate a rule expression over value ranges
+
+    Numbers are (low, high) intervals and booleans the set of values they
+    can take, so a condition yields {True}, {False} or both.
+    """
+    if isinstance(node, ast.Constant):
+        if isinstance(node.value, bool):
+            return {node.value}
+        return (node.value, node.value)
+    if isinstance(node, ast.Name):
+        return bounds[node.id]
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+        return {not value for value in _evaluate_over(node.operand, bounds)}
+    if isinstance(node, ast.BoolOp):
+        values = [_evaluate_over(value, bounds) for value in node.values]
+        if isinstance(node.op, ast.And):
+            return ({True} if all(True in v for v in values) else set()) | (
+                {False} if any(False in v for v in values) else set())
+        return ({True} if any(True in v for v in values) else set()) | (
+            {False} if all(False in v for v in values) else set())
+    if isinstance(node, ast.Compare):
+        result = {True}
+        left = _evaluate_over(node.left, bounds)
+        for op, comparator in zip(node.ops, node.comparators):
+            right = _evaluate_over(comparator, bounds)
+            always, possibly = _INTERVAL_COMPARE[type(op)](left, right)
+            if not always:
+                result.add(False)
+            if not possibly:
+                result.discard(True)
+            left = right
+        return result
+    if isinstance(node, ast.BinOp) and isinstance(node.op, (ast.Add, ast.Sub, ast.Mult)):
+        a = _evaluate_over(node.left, bounds)
+        b = _evaluate_over(node.right, bounds)
+        if isinstance(node.op, ast.Add):
+            return (a[0] + b[0], a[1] + b[1])
+        if isinstance(node.op, ast.Sub):
+            return (a[0] - b[1], a[1] - b[0])
+        products = [x * y for x in a for y in b]
+        return (min(products), max(products))
+    raise ValueError(f"Unsupported expression in rule condition: {ast.dump(node)}")
+
+
+def _no_history():
+    return {
+        "confidence_score": 40,
+        "classification": "UNKNOWN",
+        "reason": "No historical data available for this check",
+        "metrics": _empty_metrics(0)
+    }
+
+
+def _all_pending(seen):
+    return {
+        "confidence_score": 50,
+        "classification": "UNKNOWN",
+        "reason": "All runs are pending or incomplete",
+        "metrics": _empty_metrics(seen)
+    }
+
+
+def _empty_metrics(total_runs):
+    return {
+        "total_runs": total_runs,
+        "passes": 0,
+        "failures": 0,
+        "pass_rate": 0,
+        "consecutive_passes": 0,
+        "consecutive_failures": 0,
+        "flaky_transitions": 0
+    }
+
+
+DEFAULT_ENGINE = ScoringEngine()
+
+_stability_rules = compile_rules(STABILITY_RULES, {}, "stability_rules")
+
+
+def stability_metrics(outcomes):
+    """Legacy stability classification, evaluated from STABILITY_RULES"""
+    seen, passes, failures, transitions, consecutive_passes, consecutive_failures = (
+        summarize_outcomes(outcomes)
+    )
+    if seen == 0:
+        return {
+            "stability_score": 0,
+            "classification": "UNKNOWN",
+            "explanation": "No historical data available"
+        }
+    total_runs = passes + failures
+    if total_runs == 0:
+        return {
+            "stability_score": 0,
+            "classification": "UNKNOWN",
+            "explanation": "No completed runs found"
+        }
+    score, classification, explanation = _stability_rules(
+        total_runs, passes, failures, None, consecutive_passes,
+        consecutive_failures, transitions, None
+    )
+    return {
+        "stability_score": score,
+        "classification": classification,
+        "explanation": explanation,
+        "total_runs": total_runs,
+        "passes": passes,
+        "failures": failures
+    }
+
+
+class ScoringConfig:
+    """
+    Per-repository thresholds
+
+    Config files are JSON: {"defaults": {...}, "repos": {"owner/repo": {...}}}.
+    Repository entries override the defaults, which override
+    DEFAULT_THRESHOLDS. Engines are compiled once per distinct repository.
+    """
+
+    def __init__(self, defaults=None, repos=None):
+        self.defaults = merge_thresholds(defaults)
+        self.repos = {name: merge_thresholds(overrides, self.defaults)
+                      for name, overrides in (repos or {}).items()}
+        self._engines = {}
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"Scoring config {path} must be a JSON object")
+        return cls(config.get("defaults"), config.get("repos"))
+
+    def engine(self, owner, repo):
+        """ScoringEngine for a repository (DEFAULT_ENGINE when nothing is overridden)"""
+        thresholds = self.repos.get(f"{owner}/{repo}", self.defaults)
+        if thresholds == DEFAULT_THRESHOLDS:
+            return DEFAULT_ENGINE
+        key = tuple(sorted(thresholds.items()))
+        if key not in self._engines:
+            self._engines[key] = ScoringEngine(thresholds)
+        return self._engines[key]
@@ -0,0 +1,226 @@
+"""
+Columnar CI History Snapshots
+Compact binary snapshot of check_history, read back zero-copy with mmap
+
+File layout (little-endian, sections padded to 8 bytes):
+
+    header      magic "CISNAP01", then u32 counts (strings, shas, checks)
+                and u64 section offsets
+    strings     u32 end offsets[strings] + UTF-8 blob; holds check names,
+                shas and commit dates
+    shas        (u32 sha string, u32 date string) per distinct commit
+    checks      (u32 name string, u32 run count, u64 codes offset,
+                u64 refs offset) per check
+    columns     per check: u8 outcome codes[count], u32 sha refs[count]
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+from .confidence import ConfidenceAccumulator
+
+MAGIC = b"CISNAP01"
+HEADER = struct.Struct("<8sIII4xQQQQ")  # 56 bytes, keeps sections 8-aligned
+SHA_ENTRY = struct.Struct("<II")
+CHECK_ENTRY = struct.Struct("<IIQQ")
+
+OUTCOME_CODES = {"PASS": 0, "FAIL": 1, "PENDING": 2, "UNKNOWN": 3}
+OUTCOMES = ("PASS", "FAIL", "PENDING", "UNKNOWN")
+
+
+def _pad(buffer):
+    buffer.extend(b"\0" * (-len(buffer) % 8))
+
+
+def _u32_array(values):
+    arr = array("I", values)
+    if sys.byteorder != "little":
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_snapshot(path, check_history):
+    """
+    Write a check_history dict (as built by build_ci_history) to `path`
+
+    Returns:
+        Size of the written file in bytes
+    """
+    strings = {}
+
+    def intern(value):
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    shas = {}
+    sha_entries = []
+    columns = []
+    for check_name, outcomes in check_history.items():
+        codes = bytearray()
+        refs = []
+        for outcome in outcomes:
+            sha = outcome.get("sha", "")
+            ref = shas.get(sha)
+            if ref is None:
+                ref = shas[sha] = len(sha_entries)
+                sha_entries.append((intern(sha), intern(outcome.get("commit_date", ""))))
+            codes.append(OUTCOME_CODES.get(outcome["outcome"], OUTCOME_CODES["UNKNOWN"]))
+            refs.append(ref)
+        columns.append((intern(check_name), codes, refs))
+
+    # String table
+    blob = bytearray()
+    ends = []
+    for value in strings:
+        blob.extend(value.encode("utf-8"))
+        ends.append(len(blob))
+
+    body = bytearray()
+    strings_offset = HEADER.size + len(body)
+    body.extend(_u32_array(ends))
+    body.extend(blob)
+    _pad(body)
+
+    shas_offset = HEADER.size + len(body)
+    for entry in sha_entries:
+        body.extend(SHA_ENTRY.pack(*entry))
+    _pad(body)
+
+    # Directory first, then the columns it points at
+    checks_offset = HEADER.size + len(body)
+    column_offset = checks_offset + CHECK_ENTRY.size * len(columns)
+    column_offset += -column_offset % 8
+    directory = bytearray()
+    column_data = bytearray()
+    for name_index, codes, refs in columns:
+        codes_offset = column_offset + len(column_data)
+        column_data.extend(codes)
+        _pad(column_data)
+        refs_offset = column_offset + len(column_data)
+        column_data.extend(_u32_array(refs))
+        _pad(column_data)
+        directory.extend(CHECK_ENTRY.pack(name_index, len(codes), codes_offset, refs_offset))
+    body.extend(directory)
+    _pad(body)
+    body.extend(column_data)
+
+    header = HEADER.pack(MAGIC, len(strings), len(sha_entries), len(columns),
+                         strings_offset, shas_offset, checks_offset, HEADER.size + len(body))
+    with open(path, "wb") as f:
+        f.write(header)
+        f.write(body)
+    return HEADER.size + len(body)
+
+
+class Snapshot:
+    """
+    Read-only, memory-mapped view of a snapshot file
+
+    Opening only parses the header and the check directory; outcome columns
+    are exposed as memoryview slices of the mapping and are paged in by the
+    OS on first access.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+
+        (magic, n_strings, n_shas, n_checks,
+         strings_offset, shas_offset, checks_offset, _) = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a CI history snapshot")
+
+        self._string_ends = self._u32_view(strings_offset, n_strings)
+        self._blob_offset = strings_offset + 4 * n_strings
+        self._shas_offset = shas_offset
+        self.sha_count = n_shas
+
+        self._checks = {}
+        for i in range(n_checks):
+            name_index, count, codes_offset, refs_offset = CHECK_ENTRY.unpack_from(
+                self._map, checks_offset + i * CHECK_ENTRY.size
+            )
+            self._checks[self.string(name_index)] = (count, codes_offset, refs_offset)
+
+    def _u32_view(self, offset, count):
+        view = self._view[offset:offset + 4 * count]
+        if sys.byteorder == "little":
+            return view.cast("I")
+        # Big-endian hosts pay for one copy
+        arr = array("I", view.tobytes())
+        arr.byteswap()
+        return arr
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap the file; views returned by outcome_codes() must be released first"""
+        for name in ("_string_ends", "_view"):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        self._map.close()
+        self._file.close()
+
+    def string(self, index):
+        start = self._string_ends[index - 1] if index else 0
+        end = self._string_ends[index]
+        return bytes(self._view[self._blob_offset + start:self._blob_offset + end]).decode("utf-8")
+
+    def check_names(self):
+        return list(self._checks)
+
+    def outcome_codes(self, check_name):
+        """Zero-copy view of a check's outcome codes (see OUTCOMES)"""
+        count, codes_offset, _ = self._checks[check_name]
+        return self._view[codes_offset:codes_offset + count]
+
+    def outcomes(self, check_name):
+        """Materialize a check's outcomes as build_ci_history-style dicts"""
+        count, codes_offset, refs_offset = self._checks[check_name]
+        refs = self._u32_view(refs_offset, count)
+        result = []
+        for code, ref in zip(self._view[codes_offset:codes_offset + count], refs):
+            sha_index, date_index = SHA_ENTRY.unpack_from(self._map, self._shas_offset + ref * SHA_ENTRY.size)
+            result.append({
+                "sha": self.string(sha_index),
+                "outcome": OUTCOMES[code],
+                "commit_date": self.string(date_index)
+            })
+        return result
+
+    def to_check_history(self):
+        return {name: self.outcomes(name) for name in self._checks}
+
+    def accumulate(self, check_name):
+        """Fold a check's code column into a ConfidenceAccumulator, without building dicts"""
+        accumulator = ConfidenceAccumulator()
+        for code in self.outcome_codes(check_name):
+            accumulator.add(OUTCOMES[code])
+        return accumulator
+
+    def confidence_report(self):
+        """Same report as generate_confidence_report(self.to_check_history())"""
+        report = {}
+        for check_name in self._checks:
+            accumulator = self.accumulate(check_name)
+            confidence_data = accumulator.score()
+            report[check_name] = {
+                "check_name": check_name,
+                "current_status": accumulator.current_status,
+                "confidence_score": confidence_data["confidence_score"],
+                "classification": confidence_data["classification"],
+                "reason": confidence_data["reason"],
+                "metrics": confidence_data["metrics"]
+            }
+        return report
@@ -0,0 +1,150 @@
+"""
+GitHub Token Pool
+Routes API requests across several tokens using their rate-limit headers
+"""
+
+import os
+import threading
+import time
+
+# Assumed budget for a token before GitHub has reported its real headroom
+DEFAULT_TOKEN_BUDGET = 5000
+
+
+class TokenPool:
+    """
+    Pool of personal access tokens and/or GitHub App installation tokens
+
+    Each request is routed to the token with the most remaining budget, as
+    last reported by its X-RateLimit-* response headers. Tokens that hit zero
+    are skipped until their reset time passes. The core REST budget is kept
+    on each token's state; other resources GitHub meters separately
+    (graphql, search) are tracked under "resources" by name.
+    """
+
+    def __init__(self, tokens):
+        tokens = [t.strip() for t in tokens if t and t.strip()]
+        if not tokens:
+            raise PermissionError("GITHUB_TOKEN not set in .env file")
+
+        self._lock = threading.Lock()
+        self._state = {
+            token: {
+                "label": f"#{index} ...{token[-4:]}",
+                "remaining": None,
+                "limit": None,
+                "reset": 0,
+                "requests": 0,
+                "rate_limited": 0,
+                "resources": {}
+            }
+            for index, token in enumerate(dict.fromkeys(tokens), start=1)
+        }
+
+    @classmethod
+    def from_env(cls):
+        """Build a pool from GITHUB_TOKENS (comma-separated) and GITHUB_TOKEN"""
+        tokens = os.getenv("GITHUB_TOKENS", "").split(",")
+        tokens.append(os.getenv("GITHUB_TOKEN", ""))
+        return cls(tokens)
+
+    def __len__(self):
+        return len(self._state)
+
+    def tokens(self):
+        with self._lock:
+            return list(self._state)
+
+    def acquire(self, now=None, resource="core"):
+        """
+        Pick the token with the most remaining budget for a rate-limit resource
+
+        Returns:
+            Token string, or None if every token is exhausted until its reset
+        """
+        now = time.time() if now is None else now
+        best_token, best_key = None, None
+
+        with self._lock:
+            for token, state in self._state.items():
+                budget_state = _budget(state, resource)
+                remaining = budget_state["remaining"]
+                if remaining is not None and remaining <= 0:
+                    if budget_state["reset"] > now:
+                        continue
+                    # Reset window has passed; budget is unknown again
+                    budget_state["remaining"] = None
+                    remaining = None
+
+                budget = DEFAULT_TOKEN_BUDGET if remaining is None else remaining
+                key = (budget, -state["requests"])
+                if best_key is None or key > best_key:
+                    best_token, best_key = token, key
+
+            if best_token is not None:
+                self._state[best_token]["requests"] += 1
+        return best_token
+
+    def update(self, token, headers, resource="core"):
+        """
+        Record the rate-limit headers returned for a request made with `token`
+
+        The budget updated is the one named by X-RateLimit-Resource, falling
+        back to `resource` (the one the request was made against).
+        """
+        remaining = headers.get("X-RateLimit-Remaining")
+        if remaining is None:
+            return
+
+        with self._lock:
+            state = self._state[token]
+            budget_state = _budget(state, headers.get("X-RateLimit-Resource", resource))
+            budget_state["remaining"] = int(remaining)
+            budget_state["limit"] = int(headers.get("X-RateLimit-Limit", budget_state["limit"] or 0))
+            budget_state["reset"] = int(headers.get("X-RateLimit-Reset", budget_state["reset"]))
+            if budget_state["remaining"] <= 0:
+                state["rate_limited"] += 1
+
+    def has_available(self, now=None, resource="core"):
+        """True if at least one token still has budget for `resource` (or has reset)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return any(
+                b["remaining"] is None or b["remaining"] > 0 or b["reset"] <= now
+                for b in (_budget(s, resource) for s in self._state.values())
+            )
+
+    def earliest_reset(self, resource="core"):
+        """Unix timestamp at which the first token exhausted for `resource` resets"""
+        with self._lock:
+            resets = [b["reset"] for b in (_budget(s, resource) for s in self._state.values())
+                      if b["remaining"] == 0]
+        return min(resets) if resets else None
+
+    def label(self, token):
+        """Masked id of a token: its position in the pool and last four characters"""
+        return self._state[token]["label"]
+
+    def usage(self):
+        """
+        Per-token usage report, keyed by masked token id
+
+        Returns:
+            Dict mapping "#1 ...abcd" to requests, remaining, limit and reset
+            (core budget), and the same fields per other resource seen
+        """
+        with self._lock:
+            return {
+                state["label"]: dict(
+                    {k: v for k, v in state.items() if k not in ("label", "resources")},
+                    resources={name: dict(b) for name, b in state["resources"].items()}
+                )
+                for state in self._state.values()
+            }
+
+
+def _budget(state, resource):
+    """A token's budget fields for one rate-limit resource"""
+    if resource == "core":
+        return state
+    return state["resources"].setdefault(resource, {"remaining": None, "limit": None, "reset": 0})
@@ -0,0 +1,149 @@
+"""
+Tracing Hooks
+Pluggable span callbacks around client calls and analysis stages, with a
+Chrome-trace JSON exporter
+"""
+
+import json
+import os
+import threading
+import time
+
+_hooks = []
+
+
+class Span:
+    """One timed operation; hooks see it at start and again at end"""
+
+    __slots__ = ("name", "attributes", "start", "end", "thread_id")
+
+    def __init__(self, name, attributes):
+        self.name = name
+        self.attributes = attributes
+        self.start = time.perf_counter()
+        self.end = None
+        self.thread_id = threading.get_ident()
+
+    def __bool__(self):
+        return True
+
+    def set(self, key, value):
+        self.attributes[key] = value
+
+    def update(self, attributes):
+        self.attributes.update(attributes)
+
+    @property
+    def duration(self):
+        return (self.end or time.perf_counter()) - self.start
+
+    def __enter__(self):
+        for hook in _hooks:
+            hook.on_span_start(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc_type is not None:
+            self.attributes.setdefault("status", "error")
+            self.attributes["error"] = exc_type.__name__
+        for hook in _hooks:
+            hook.on_span_end(self)
+        return False
+
+
+class _NoopSpan:
+    """Returned when no hook is registered; falsy so callers can skip attribute work"""
+
+    __slots__ = ()
+
+    def __bool__(self):
+        return False
+
+    def set(self, key, value):
+        pass
+
+    def update(self, attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def span(name, **attributes):
+    """
+    Context manager timing one operation
+
+    With no hooks registered this returns a shared no-op span, so untraced
+    runs pay for one function call and nothing else.
+
+    Args:
+        name: Span name, e.g. "github.request" or "ci.commit"
+        **attributes: owner, repo, sha, endpoint, status, ...
+    """
+    if not _hooks:
+        return _NOOP_SPAN
+    return Span(name, attributes)
+
+
+def add_hook(hook):
+    """Register an object with on_span_start(span) and on_span_end(span) methods"""
+    global _hooks
+    # Copy-on-write so spans iterating the old list are unaffected
+    _hooks = _hooks + [hook]
+
+
+def remove_hook(hook):
+    global _hooks
+    _hooks = [h for h in _hooks if h is not hook]
+
+
+def enabled():
+    return bool(_hooks)
+
+
+class ChromeTraceExporter:
+    """
+    Hook that collects finished spans as Chrome trace events
+
+    Load the written file in chrome://tracing or https://ui.perfetto.dev.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self._lock = threading.Lock()
+        self.events = []
+        self._pid = os.getpid()
+
+    def on_span_start(self, span):
+        pass
+
+    def on_span_end(self, span):
+        event = {
+            "name": span.name,
+            "ph": "X",
+            "ts": span.start * 1e6,
+            "dur": (span.end - span.start) * 1e6,
+            "pid": self._pid,
+            "tid": span.thread_id,
+            "args": {k: v for k, v in span.attributes.items() if v is not None}
+        }
+        with self._lock:
+            self.events.append(event)
+
+    def write(self, path=None):
+        """Write collected events as a Chrome trace JSON file"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("No trace output path given")
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return len(events)
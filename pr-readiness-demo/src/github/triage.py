@@ -0,0 +1,180 @@
+"""
+CI Triage
+Finds the PRs with failing or pending CI across many repositories from GraphQL search pages
+"""
+
+from .ci import aggregate_ci
+from .payloads import project_rollup_contexts
+
+# PRs per search page; each costs about CONTEXTS_PER_PR nodes
+DEFAULT_PAGE_SIZE = 50
+# Check runs and statuses fetched per head commit
+CONTEXTS_PER_PR = 100
+# GitHub search stops returning results after this many
+SEARCH_RESULT_LIMIT = 1000
+
+TRIAGE_QUERY = """
+query($search: String!, $first: Int!, $after: String, $contexts: Int!) {
+  search(query: $search, type: ISSUE, first: $first, after: $after) {
+    issueCount
+    pageInfo { hasNextPage endCursor }
+    nodes {
+      ... on PullRequest {
+        number
+        url
+        repository { nameWithOwner }
+        headRefOid
+        commits(last: 1) {
+          nodes {
+            commit {
+              statusCheckRollup {
+                state
+                contexts(first: $contexts) {
+                  pageInfo { hasNextPage }
+                  nodes {
+                    __typename
+                    ... on CheckRun { name status conclusion }
+                    ... on StatusContext { context state }
+                  }
+                }
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
+# Rollup state to CI status, used when a commit has more contexts than fetched
+ROLLUP_STATUS = {
+    "SUCCESS": "PASS",
+    "FAILURE": "FAIL",
+    "ERROR": "FAIL",
+    "PENDING": "PENDING",
+    "EXPECTED": "PENDING",
+}
+
+
+def search_pr_rollups(client, query, page_size=DEFAULT_PAGE_SIZE, max_prs=None):
+    """
+    Head-commit CI contexts of every PR matching a search, a page at a time
+
+    Args:
+        query: GitHub search syntax, e.g. "org:acme" or "repo:acme/api
+               label:release"; "is:pr is:open" is added when missing
+        max_prs: Stop after this many PRs (search itself stops at 1000)
+
+    Returns:
+        (prs, requests) where each PR is a dict with owner, repo, number,
+        url, head_sha, rollup_state, check_runs and statuses (REST-shaped,
+        as aggregate_ci expects) and contexts_truncated
+    """
+    search = query
+    for qualifier in ("is:pr", "is:open"):
+        if qualifier not in search.split():
+            search = f"{search} {qualifier}"
+    limit = min(max_prs or SEARCH_RESULT_LIMIT, SEARCH_RESULT_LIMIT)
+
+    prs = []
+    requests = 0
+    cursor = None
+    while len(prs) < limit:
+        data = client.graphql(TRIAGE_QUERY, {
+            "search": search,
+            "first": min(page_size, limit - len(prs)),
+            "after": cursor,
+            "contexts": CONTEXTS_PER_PR
+        })
+        requests += 1
+        result = data["search"]
+        # Non-PR nodes (issues) come back as empty objects
+        prs.extend(_pr_rollup(node) for node in result["nodes"] if node)
+        if not result["pageInfo"]["hasNextPage"]:
+            break
+        cursor = result["pageInfo"]["endCursor"]
+    return prs[:limit], requests
+
+
+def _pr_rollup(node):
+    owner, repo = node["repository"]["nameWithOwner"].split("/", 1)
+    commits = node["commits"]["nodes"]
+    rollup = commits[0]["commit"]["statusCheckRollup"] if commits else None
+    check_runs, statuses = [], []
+    truncated = False
+    if rollup:
+        truncated = rollup["contexts"]["pageInfo"]["hasNextPage"]
+        check_runs, statuses = project_rollup_contexts(rollup["contexts"]["nodes"])
+    return {
+        "owner": owner,
+        "repo": repo,
+        "number": str(node["number"]),
+        "url": node["url"],
+        "head_sha": node["headRefOid"],
+        "rollup_state": rollup["state"] if rollup else None,
+        "check_runs": check_runs,
+        "statuses": statuses,
+        "contexts_truncated": truncated
+    }
+
+
+def classify_rollup(pr):
+    """
+    CI status of a PR's head commit: NO_CI, PASS, PENDING or FAIL
+
+    Uses aggregate_ci on the fetched contexts, so a PR triages exactly as
+    the single-PR report would show it. When the commit has more contexts
+    than were fetched, GitHub's own rollup state decides instead.
+    """
+    if pr["contexts_truncated"] and pr["rollup_state"] in ROLLUP_STATUS:
+        return ROLLUP_STATUS[pr["rollup_state"]]
+    status, _ = aggregate_ci(pr["check_runs"], pr["statuses"])
+    return status
+
+
+def triage(client, query, analyze=None, page_size=DEFAULT_PAGE_SIZE, max_prs=None,
+           analyze_statuses=("FAIL", "PENDING")):
+    """
+    Classify every matching PR from search pages, then analyze the unhealthy ones
+
+    Args:
+        analyze: Callback(owner, repo, number) returning a report; defaults
+                 to analyze_ci_reliability with this client. A PR whose
+                 analysis fails is recorded in "errors"; only connection
+                 errors (rate limit, network) stop the triage.
+        analyze_statuses: CI statuses that get the full history analysis
+
+    Returns:
+        Dict with "prs" (each gaining "ci_status"), "counts" per status,
+        "search_requests", and "reports" / "errors" keyed by owner/repo#number
+    """
+    if analyze is None:
+        from .history import analyze_ci_reliability
+
+        def analyze(owner, repo, number):
+            return analyze_ci_reliability(client, owner, repo, number)
+
+    prs, search_requests = search_pr_rollups(client, query, page_size=page_size, max_prs=max_prs)
+    counts = {"FAIL": 0, "PENDING": 0, "PASS": 0, "NO_CI": 0}
+    reports, errors = {}, {}
+    for pr in prs:
+        pr["ci_status"] = classify_rollup(pr)
+        counts[pr["ci_status"]] += 1
+
+    for pr in prs:
+        if pr["ci_status"] not in analyze_statuses:
+            continue
+        key = f"{pr['owner']}/{pr['repo']}#{pr['number']}"
+        try:
+            reports[key] = analyze(pr["owner"], pr["repo"], pr["number"])
+        except (ValueError, PermissionError, RuntimeError) as e:
+            errors[key] = str(e)
+
+    return {
+        "prs": prs,
+        "counts": counts,
+        "search_requests": search_requests,
+        "reports": reports,
+        "errors": errors
+    }
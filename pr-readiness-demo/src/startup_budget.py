@@ -0,0 +1,83 @@
+"""
+Startup-time budget check using `python -X importtime`
+
+Measures the cumulative import cost of the help path (`import cli`) and the
+analysis path (cli plus the deferred github.* modules) and compares each
+against its budget. Exits non-zero if a budget is exceeded.
+
+Usage: python startup_budget.py
+"""
+
+import os
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Budgets in milliseconds of cumulative import time
+BUDGETS = {
+    "help": (["cli"], 25),
+    "analysis": (["cli", "parser", "github.client", "github.ci", "github.history", "github.index"], 400),
+}
+
+# Modules that must never be loaded just to print --help / --version
+HELP_FORBIDDEN = ("requests", "dotenv", "github")
+
+
+def measure_imports(modules):
+    """
+    Import `modules` in a fresh interpreter under -X importtime
+
+    Returns:
+        (total_ms, imported_names) or raises ImportError if a module is missing
+    """
+    code = "; ".join(f"import {m}" for m in modules)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=SRC_DIR,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+
+    wanted = {m.split(".")[0] for m in modules}
+    total_us = 0
+    imported = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        cumulative_us, name = int(fields[1]), fields[2][1:]
+        imported.append(name.strip())
+        # Nested imports are indented and already included in their parent
+        if not name.startswith(" ") and name.split(".")[0] in wanted:
+            total_us += cumulative_us
+    return total_us / 1000, imported
+
+
+def main():
+    failed = False
+
+    for path_name, (modules, budget_ms) in BUDGETS.items():
+        try:
+            total_ms, imported = measure_imports(modules)
+        except ImportError as e:
+            print(f"⚠️  {path_name:<9} skipped: {e}")
+            continue
+
+        within = total_ms <= budget_ms
+        print(f"{'✅' if within else '❌'} {path_name:<9} {total_ms:7.1f} ms (budget {budget_ms} ms)")
+        failed = failed or not within
+
+        if path_name == "help":
+            leaked = sorted({n.strip() for n in imported if n.strip().split(".")[0] in HELP_FORBIDDEN})
+            if leaked:
+                print(f"❌ help path imports {', '.join(leaked)}")
+                failed = True
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
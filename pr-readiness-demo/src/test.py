@@ -3,13 +3,40 @@ Comprehensive test suite for CI Reliability & Flakiness Analytics
 All tests in one file for simplicity
 """
 
+import itertools
+import json
 import sys
+import threading
+import time
 import os
+from contextlib import contextmanager
 sys.path.insert(0, os.path.dirname(__file__))
 
 from parser import parse_pr_url
 from github.ci import aggregate_ci
 from github.confidence import calculate_confidence_score
+from github.index import FlakinessIndex
+from github.multiplex import fetch_check_histories
+from github.history import (
+    build_ci_history, normalize_ci_outcome, mine_base_branch, analyze_ci_reliability,
+    build_workflow_history, calculate_stability_metrics
+)
+from github.payloads import project_check_runs, project_statuses
+from github.tokens import TokenPool
+from github.batch import run_batch
+from github.planner import estimate_cost, plan_batch
+from github.refresher import EventsRefresher
+from github.scan import RepoScanner
+from github.triage import triage
+from github.backfill import BackfillStore, backfill_branch
+from github.snapshot import Snapshot, write_snapshot
+from github.payload_store import PayloadStore
+from github.matrix import OutcomeMatrix, exclude_shas
+from github.changepoint import ChangePointDetector, detect_change_points
+from github.scoring import DEFAULT_ENGINE, ScoringConfig
+from github.decay import DecayedCheckSummary, calculate_decayed_confidence_score
+from github.metrics import BATCH_JOB_RESULTS, CHECKS_SCORED, MetricsRegistry, REGISTRY
+from github.tracing import ChromeTraceExporter, add_hook, remove_hook, span
 
 
 class TestRunner:
@@ -244,6 +271,1473 @@ def test_unknown_insufficient_data():
     assert result['classification'] == 'UNKNOWN'
     assert 40 <= result['confidence_score'] <= 60
 
+def test_repo_thresholds_override_defaults():
+    """Test per-repo thresholds from a scoring config change only that repo"""
+    config = ScoringConfig(repos={"org/strict": {"reliable_min_runs": 20}})
+    outcomes = [{"outcome": "PASS", "sha": f"sha{i}"} for i in range(10)]
+    
+    assert config.engine("org", "other") is DEFAULT_ENGINE
+    assert config.engine("org", "other").score(outcomes)['classification'] == 'RELIABLE'
+    strict = config.engine("org", "strict").score(outcomes)
+    assert strict['classification'] == 'STABLE'
+    assert strict['metrics'] == calculate_confidence_score(outcomes)['metrics']
+    assert config.engine("org", "strict") is config.engine("org", "strict")
+    
+    try:
+        ScoringConfig(defaults={"reliable_runs": 5})
+        assert False, "Unknown threshold should be rejected"
+    except ValueError:
+        pass
+
+def test_legacy_stability_rules():
+    """Test calculate_stability_metrics keeps its own rule table"""
+    flaky = calculate_stability_metrics([{"outcome": o} for o in ("PASS", "FAIL", "PASS", "FAIL")])
+    assert flaky['classification'] == 'FLAKY'
+    assert flaky['stability_score'] == 50
+    
+    stable = calculate_stability_metrics([{"outcome": o} for o in ("FAIL", "PASS", "PASS", "PASS", "PENDING")])
+    assert stable['classification'] == 'STABLE'
+    assert stable['stability_score'] == 85
+    assert stable['total_runs'] == 4
+    
+    poor = calculate_stability_metrics([{"outcome": o} for o in ("PASS",) * 2 + ("FAIL",) * 4])
+    assert poor['explanation'] == "Pass rate: 33% (2/6 runs)"
+
+
+# ============================================================================
+# FLAKINESS INDEX TESTS
+# ============================================================================
+
+def _history(check_name, outcomes, prefix="sha"):
+    """Build a check history with ordered commit dates"""
+    return {
+        check_name: [
+            {"outcome": o, "sha": f"{prefix}{i}", "commit_date": f"2026-01-{i + 1:02d}T00:00:00Z"}
+            for i, o in enumerate(outcomes)
+        ]
+    }
+
+def test_index_merges_across_prs():
+    """Test that outcomes from several PRs merge into one repo-wide entry"""
+    index = FlakinessIndex()
+    index.record("o", "r", _history("lint", ["PASS", "FAIL"], "a"))
+    index.record("o", "r", _history("lint", ["PASS", "FAIL", "PASS"], "b"))
+    summary = index.lookup("o", "r", "lint")
+    
+    assert summary["total_runs"] == 5
+    assert summary["pr_runs"] == 5
+    assert index.lookup("o", "other", "lint") is None
+
+def test_index_deduplicates_and_windows():
+    """Test sha de-duplication and rolling-window eviction"""
+    index = FlakinessIndex(window=3)
+    history = _history("lint", ["FAIL", "PASS", "PASS", "PASS"])
+    assert index.record("o", "r", history) == 4
+    assert index.record("o", "r", history) == 0
+    
+    summary = index.lookup("o", "r", "lint")
+    assert summary["window_runs"] == 3
+    assert summary["window_pass_rate"] == 100.0
+    assert summary["total_runs"] == 4
+
+def test_index_save_and_load():
+    """Test that the index round-trips through its JSON file"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "index.json")
+        index = FlakinessIndex(path)
+        index.record("o", "r", _history("lint", ["PASS"] * 10))
+        index.save()
+        
+        loaded = FlakinessIndex.load(path)
+        assert loaded.lookup("o", "r", "lint")["classification"] == "RELIABLE"
+
+
+# ============================================================================
+# TIME-DECAYED SCORING TESTS
+# ============================================================================
+
+def _dated(outcomes, start_day=1, month="01"):
+    """Build outcomes on consecutive days"""
+    return [
+        {"outcome": o, "sha": f"sha{i}", "commit_date": f"2026-{month}-{start_day + i:02d}T00:00:00Z"}
+        for i, o in enumerate(outcomes)
+    ]
+
+def test_decay_matches_plain_scoring_for_fresh_runs():
+    """Test that a long half-life classifies like the plain scorer"""
+    outcomes = _dated(["PASS"] * 12)
+    result = calculate_decayed_confidence_score(outcomes, half_life_days=10000)
+    
+    assert result['classification'] == calculate_confidence_score(outcomes)['classification']
+    assert result['classification'] == 'RELIABLE'
+
+def test_decay_forgets_old_failures():
+    """Test that failures months ago weigh less than recent passes"""
+    outcomes = _dated(["FAIL"] * 5, month="01") + _dated(["PASS"] * 20, month="06")
+    decayed = calculate_decayed_confidence_score(outcomes, half_life_days=14)
+    
+    assert calculate_confidence_score(outcomes)['classification'] != 'RELIABLE'
+    assert decayed['metrics']['failures'] == 0
+    assert decayed['classification'] == 'RELIABLE'
+
+def test_window_excludes_old_runs():
+    """Test that a fixed window only counts recent runs"""
+    outcomes = _dated(["FAIL"] * 5, month="01") + _dated(["PASS"] * 4, month="06")
+    result = calculate_decayed_confidence_score(outcomes, window_days=30)
+    
+    assert result['metrics']['total_runs'] == 4
+    assert result['metrics']['failures'] == 0
+
+def test_decayed_summary_constant_memory():
+    """Test that the window summary does not grow with history length"""
+    summary = DecayedCheckSummary(window_days=7)
+    for month in range(1, 13):
+        for o in _dated(["PASS", "FAIL"] * 14, month=f"{month:02d}"):
+            summary.update(o)
+    
+    assert len(summary.buckets) == 7
+    assert summary.metrics()['total_runs'] <= 7 * 2
+
+def test_decay_rejects_non_positive_periods():
+    """Test that a zero or negative half-life or window is refused"""
+    for kwargs in ({"half_life_days": 0}, {"half_life_days": -3},
+                   {"window_days": 0}, {"window_days": -1}, {"window_days": 2.5}):
+        try:
+            DecayedCheckSummary(**kwargs)
+        except ValueError:
+            continue
+        raise AssertionError(f"{kwargs} should be rejected")
+
+def test_decayed_reasons_round_effective_counts():
+    """Test that fractional effective run counts read as one decimal in reasons"""
+    outcomes = _dated(["PASS", "PASS"])
+    result = calculate_decayed_confidence_score(outcomes, half_life_days=1)
+    
+    total = result['metrics']['total_runs']
+    assert total != int(total)
+    assert result['classification'] == 'UNKNOWN'
+    assert f"Only {total:.1f} run(s)" in result['reason'], result['reason']
+    assert isinstance(result['confidence_score'], int)
+
+
+# ============================================================================
+# HISTORY BUILDING TESTS
+# ============================================================================
+
+class FakeClient:
+    """In-memory stand-in for GitHubClient serving canned commit CI data"""
+    
+    def __init__(self, outcomes_by_check, fail_shas=()):
+        self.outcomes_by_check = outcomes_by_check
+        self.fail_shas = set(fail_shas)
+        self.calls = 0
+        self._local = threading.local()
+        count = max(len(o) for o in outcomes_by_check.values())
+        self.commits = [
+            {"sha": f"sha{i}", "commit": {"committer": {"date": f"2026-01-{i + 1:02d}T00:00:00Z"}}}
+            for i in range(count)
+        ]
+    
+    @property
+    def deadline(self):
+        return getattr(self._local, "deadline", None)
+    
+    @contextmanager
+    def deadline_scope(self, deadline_at):
+        previous = self.deadline
+        self._local.deadline = deadline_at
+        try:
+            yield
+        finally:
+            self._local.deadline = previous
+    
+    def get_pr_commits(self, owner, repo, number):
+        self.calls += 1
+        return list(self.commits)
+    
+    def get_check_runs(self, owner, repo, sha):
+        self.calls += 1
+        if sha in self.fail_shas:
+            raise ConnectionError("boom")
+        i = int(sha[3:])
+        conclusions = {"PASS": "success", "FAIL": "failure"}
+        return [
+            {"name": name, "status": "completed", "conclusion": conclusions[outcomes[i]]}
+            for name, outcomes in self.outcomes_by_check.items() if i < len(outcomes)
+        ]
+    
+    def get_commit_statuses(self, owner, repo, sha):
+        self.calls += 1
+        return []
+
+def test_history_concurrent_matches_sequential():
+    """Test that concurrent fetching keeps commit order and skips errors"""
+    client = FakeClient({"lint": ["PASS", "FAIL"] * 6}, fail_shas=["sha3"])
+    sequential = build_ci_history(client, "o", "r", 1)
+    concurrent = build_ci_history(client, "o", "r", 1, workers=4)
+    
+    assert sequential == concurrent
+    assert [o["sha"] for o in concurrent["lint"]][:4] == ["sha0", "sha1", "sha2", "sha4"]
+
+
+def test_lazy_history_stops_at_min_sample():
+    """Test that the lazy fetch stops once every check has enough runs"""
+    client = FakeClient({"lint": ["PASS"] * 20})
+    history = build_ci_history(client, "o", "r", 1, lazy=True, min_sample=10)
+    
+    assert client.calls == 1 + 2 * 10
+    assert [o["sha"] for o in history["lint"]] == [f"sha{i}" for i in range(10, 20)]
+    assert calculate_confidence_score(history["lint"])['classification'] == 'RELIABLE'
+
+def test_lazy_history_matches_full_classification():
+    """Test that stopping early never changes a classification"""
+    # Probing only all-pass/all-fail/alternating older runs stopped this one
+    # after 9 commits as STABLE; the full history is FLAKY
+    counterexample = [{"P": "PASS", "F": "FAIL"}[c] for c in "FPFFPPPFPPPPP"]
+    histories = [counterexample, ["PASS"] * 20, ["PASS"] * 8 + ["FAIL"] * 12]
+    for length in range(1, 11):
+        histories.extend(list(p) for p in itertools.product(("PASS", "FAIL"), repeat=length))
+    
+    saved = 0
+    for outcomes in histories:
+        full_client = FakeClient({"lint": outcomes})
+        lazy_client = FakeClient({"lint": outcomes})
+        full = build_ci_history(full_client, "o", "r", 1)
+        lazy = build_ci_history(lazy_client, "o", "r", 1, lazy=True)
+        
+        assert lazy_client.calls <= full_client.calls
+        assert (calculate_confidence_score(lazy["lint"])['classification'] ==
+                calculate_confidence_score(full["lint"])['classification']), outcomes
+        saved += full_client.calls - lazy_client.calls
+    assert saved > 0
+
+
+class FakeBaseClient(FakeClient):
+    """FakeClient whose commits double as the PR's base branch, newest first"""
+    
+    def get_pull_request(self, owner, repo, number):
+        self.calls += 1
+        return {"base": {"ref": "main"}}
+    
+    def get_branch_commits(self, owner, repo, branch, per_page=100, page=1):
+        self.calls += 1
+        newest_first = list(reversed(self.commits))
+        return newest_first[(page - 1) * 5:page * 5]
+
+def test_base_branch_cursor_fetches_only_new_commits():
+    """Test that a second mining pass only fetches commits since the cursor"""
+    client = FakeBaseClient({"lint": ["PASS"] * 12})
+    index = FlakinessIndex()
+    
+    assert mine_base_branch(client, "o", "r", "main", index) == 12
+    assert index.get_cursor("o", "r", "main") == "sha11"
+    
+    client.commits.append({"sha": "sha12", "commit": {"committer": {"date": "2026-01-13T00:00:00Z"}}})
+    client.outcomes_by_check["lint"].append("PASS")
+    assert mine_base_branch(client, "o", "r", "main", index) == 1
+    assert index.lookup("o", "r", "lint")["base_runs"] == 13
+
+def test_base_branch_cursor_skips_only_running_ci():
+    """Test that skipped checks do not hold the cursor back but in-progress ones do"""
+    client = FakeBaseClient({"lint": ["PASS"] * 6})
+    passing = client.get_check_runs
+    client.get_check_runs = lambda owner, repo, sha: passing(owner, repo, sha) + [
+        {"name": "docs", "status": "completed", "conclusion": "skipped"}
+    ]
+    index = FlakinessIndex()
+    
+    mine_base_branch(client, "o", "r", "main", index)
+    assert index.get_cursor("o", "r", "main") == "sha5"
+    calls = client.calls
+    assert mine_base_branch(client, "o", "r", "main", index) == 0
+    assert client.calls == calls + 1
+    
+    client.commits.append({"sha": "sha6", "commit": {"committer": {"date": "2026-01-07T00:00:00Z"}}})
+    client.outcomes_by_check["lint"].append("PASS")
+    client.get_commit_statuses = lambda owner, repo, sha: (
+        [{"context": "deploy", "state": "pending"}] if sha == "sha6" else []
+    )
+    mine_base_branch(client, "o", "r", "main", index)
+    assert index.get_cursor("o", "r", "main") == "sha5"
+
+def test_include_base_enriches_small_prs():
+    """Test that base-branch runs lift a short PR history out of UNKNOWN"""
+    base_client = FakeBaseClient({"lint": ["PASS"] * 12})
+    index = FlakinessIndex()
+    mine_base_branch(base_client, "o", "r", "main", index)
+    
+    pr_client = FakeBaseClient({"lint": ["PASS"] * 2})
+    pr_client.commits = [dict(c, sha=f"pr{i}") for i, c in enumerate(pr_client.commits)]
+    pr_client.get_check_runs = lambda owner, repo, sha: [
+        {"name": "lint", "status": "completed", "conclusion": "success"}
+    ]
+    pr_client.get_branch_commits = lambda *args, **kwargs: []
+    
+    plain = analyze_ci_reliability(pr_client, "o", "r", 1)
+    enriched = analyze_ci_reliability(pr_client, "o", "r", 1, index=index, include_base=True)
+    
+    assert plain["lint"]["classification"] == "UNKNOWN"
+    assert enriched["lint"]["classification"] == "RELIABLE"
+    assert enriched["lint"]["metrics"]["total_runs"] == 14
+
+
+class FakeActionsClient(FakeBaseClient):
+    """Serves workflow-run listings: every commit ran "CI", sha1 was re-run"""
+    
+    def get_pull_request(self, owner, repo, number):
+        self.calls += 1
+        return {"head": {"ref": "feature"}, "base": {"ref": "main"}}
+    
+    def get_workflow_runs(self, owner, repo, branch=None, per_page=100, page=1):
+        self.calls += 1
+        if page > 1:
+            return []
+        return [
+            {"id": i, "name": "CI", "head_sha": c["sha"], "conclusion": "success",
+             "run_attempt": 2 if c["sha"] == "sha1" else 1,
+             "created_at": c["commit"]["committer"]["date"]}
+            for i, c in reversed(list(enumerate(self.commits)))
+        ] + [{"id": 99, "name": "CI", "head_sha": "other", "conclusion": "failure", "run_attempt": 1}]
+    
+    def get_workflow_run_attempt(self, owner, repo, run_id, attempt):
+        self.calls += 1
+        return {"id": run_id, "name": "CI", "conclusion": "failure", "run_attempt": attempt}
+
+def test_workflow_history_includes_attempts():
+    """Test bulk workflow-run ingestion with re-run attempts on one sha"""
+    client = FakeActionsClient({"lint": ["PASS"] * 4})
+    history = build_workflow_history(client, "o", "r", 1)
+    
+    outcomes = [(o["sha"], o["attempt"], o["outcome"]) for o in history["CI"]]
+    assert outcomes == [
+        ("sha0", 1, "PASS"), ("sha1", 1, "FAIL"), ("sha1", 2, "PASS"),
+        ("sha2", 1, "PASS"), ("sha3", 1, "PASS")
+    ]
+    # PR + commits + one listing page + one earlier attempt
+    assert client.calls == 4
+
+
+def test_streaming_report_memory_ceiling():
+    """Test that streaming matches the materialized report in bounded memory"""
+    from bench import bench_streaming_memory
+    (_, _, small_kib), (_, materialized_kib, large_kib) = bench_streaming_memory((200, 2000), checks=10)
+    
+    assert large_kib < small_kib * 2
+    assert large_kib < materialized_kib / 10
+
+class SlowClient(FakeClient):
+    """FakeClient whose check-runs request stalls for some commits"""
+    
+    def __init__(self, outcomes_by_check, slow_shas, delay):
+        super().__init__(outcomes_by_check)
+        self.slow_shas = set(slow_shas)
+        self.delay = delay
+        self.late_deadlines = []
+    
+    def get_check_runs(self, owner, repo, sha):
+        if sha in self.slow_shas:
+            time.sleep(self.delay)
+            # The deadline this thread's next request would be sent with
+            self.late_deadlines.append(self.deadline)
+        return super().get_check_runs(owner, repo, sha)
+
+def test_deadline_scores_partial_history():
+    """Test that an expired deadline cancels fetches and marks completeness per check"""
+    client = SlowClient({"lint": ["PASS"] * 8, "docs": ["PASS", "PASS"]},
+                        slow_shas=["sha2"], delay=0.5)
+    
+    start = time.monotonic()
+    report = analyze_ci_reliability(client, "o", "r", 1, workers=2, deadline=0.2)
+    elapsed = time.monotonic() - start
+    
+    assert elapsed < 0.45
+    assert client.deadline is None
+    lint = report["lint"]["completeness"]
+    assert lint["commits_total"] == 8
+    assert lint["commits_cancelled"] >= 1
+    assert lint["runs_fetched"] == report["lint"]["metrics"]["total_runs"]
+    assert lint["commits_fetched"] + lint["commits_cancelled"] == 8
+    assert lint["runs_missing"] == lint["commits_cancelled"]
+    assert not lint["complete"]
+    docs = report["docs"]["completeness"]
+    assert docs["runs_fetched"] == 2 and docs["ratio"] < lint["ratio"]
+    
+    # The abandoned sha2 fetch keeps the expired deadline after analysis returns
+    while not client.late_deadlines and time.monotonic() - start < 2:
+        time.sleep(0.05)
+    assert client.late_deadlines and client.late_deadlines[0] <= time.monotonic()
+
+def test_expired_deadline_blocks_requests():
+    """Test that a client refuses to send once its thread's deadline has passed"""
+    client = _fake_client(FakeResponse(200, {}))
+    with client.deadline_scope(time.monotonic() - 1):
+        try:
+            client.get_pull_request("o", "r", 1)
+            assert False, "expected ConnectionError"
+        except ConnectionError:
+            pass
+    assert client.deadline is None
+    assert not client.session.requests
+
+def test_deadline_met_reports_complete_history():
+    """Test that a deadline that is met changes nothing but adds completeness"""
+    client = FakeClient({"lint": ["PASS", "FAIL"] * 3}, fail_shas=["sha1"])
+    report = analyze_ci_reliability(client, "o", "r", 1, deadline=5)
+    expected = analyze_ci_reliability(client, "o", "r", 1)
+    
+    completeness = report["lint"].pop("completeness")
+    assert report == expected
+    assert completeness["commits_fetched"] == completeness["runs_fetched"] == 5
+    assert completeness["commits_failed"] == completeness["runs_missing"] == 1
+    assert completeness["ratio"] == round(5 / 6, 3)
+
+
+class FakeGraphQLClient(FakeClient):
+    """FakeClient that also answers multiplexed GraphQL PR history queries"""
+    
+    def __init__(self, outcomes_by_check, missing=()):
+        super().__init__(outcomes_by_check)
+        self.missing = set(missing)
+        self.queries = 0
+    
+    def graphql(self, query, variables=None, allow_partial=False):
+        self.queries += 1
+        data = {}
+        i = 0
+        while f"number{i}" in variables:
+            if variables[f"number{i}"] in self.missing:
+                data[f"pr{i}"] = {"pullRequest": None}
+            else:
+                nodes = []
+                for commit in self.commits[-variables["commits"]:]:
+                    runs = [
+                        {"__typename": "CheckRun", "name": run["name"],
+                         "status": run["status"].upper(), "conclusion": run["conclusion"].upper()}
+                        for run in self.get_check_runs("o", "r", commit["sha"])
+                    ]
+                    nodes.append({"commit": {
+                        "oid": commit["sha"],
+                        "committedDate": commit["commit"]["committer"]["date"],
+                        "statusCheckRollup": {"contexts": {
+                            "pageInfo": {"hasNextPage": len(runs) > variables["contexts"]},
+                            "nodes": runs[:variables["contexts"]]
+                        }}
+                    }})
+                data[f"pr{i}"] = {"pullRequest": {"commits": {"nodes": nodes}}}
+            i += 1
+        return data
+
+def test_multiplexed_histories_match_rest():
+    """Test that aliased GraphQL batches split back into build_ci_history's output"""
+    client = FakeGraphQLClient({"lint": ["PASS", "FAIL"] * 4, "unit": ["PASS"] * 8}, missing=[3])
+    prs = [{"owner": "o", "repo": "r", "number": str(n)} for n in (1, 2, 3, 4, 5)]
+    expected = build_ci_history(client, "o", "r", 1, max_commits=5)
+    
+    # Two PRs fit per query at this node budget
+    fetched = fetch_check_histories(client, prs, max_commits=5, contexts=2, max_nodes=30)
+    assert client.queries == 3
+    assert fetched["stats"]["requests"] == 3
+    assert sorted(fetched["histories"]) == ["o/r#1", "o/r#2", "o/r#4", "o/r#5"]
+    assert all(history == expected for history in fetched["histories"].values())
+    assert "o/r#3" in fetched["errors"]
+    
+    # Commits with more contexts than fetched fall back to REST
+    fallback = fetch_check_histories(client, prs[:1], max_commits=5, contexts=1)
+    assert fallback["stats"]["fallback_commits"] == 5
+    assert fallback["histories"]["o/r#1"] == expected
+
+
+# ============================================================================
+# LEAN PAYLOAD TESTS
+# ============================================================================
+
+def test_lean_check_runs_projection():
+    """Test that lean decoding keeps only scored fields and scores identically"""
+    payload = {"total_count": 1, "check_runs": [{
+        "id": 1, "name": "pytest", "status": "completed", "conclusion": "failure",
+        "output": {"title": "x" * 1000, "annotations_count": 3},
+        "app": {"id": 15368, "owner": {"login": "github"}},
+        "check_suite": {"id": 42}
+    }]}
+    full = payload["check_runs"]
+    lean = project_check_runs(json.dumps(payload).encode())
+    
+    assert lean == [{"name": "pytest", "status": "completed", "conclusion": "failure"}]
+    assert aggregate_ci(lean, []) == aggregate_ci(full, [])
+    assert normalize_ci_outcome(check_run=lean[0]) == normalize_ci_outcome(check_run=full[0])
+
+def test_lean_statuses_projection():
+    """Test that lean status decoding keeps context and state"""
+    raw = b'[{"context": "ci/travis", "state": "success", "creator": {"login": "bot"}}]'
+    assert project_statuses(raw) == [{"context": "ci/travis", "state": "success"}]
+
+
+# ============================================================================
+# TOKEN POOL TESTS
+# ============================================================================
+
+def test_token_pool_prefers_most_remaining():
+    """Test that requests go to the token with the most budget left"""
+    pool = TokenPool(["aaaa1111", "bbbb2222"])
+    pool.update("aaaa1111", {"X-RateLimit-Remaining": "10", "X-RateLimit-Reset": "0"})
+    pool.update("bbbb2222", {"X-RateLimit-Remaining": "4000", "X-RateLimit-Reset": "0"})
+    
+    assert pool.acquire(now=0) == "bbbb2222"
+    assert pool.usage()["#2 ...2222"]["requests"] == 1
+
+def test_token_pool_usage_keeps_same_suffix_tokens_apart():
+    """Test that tokens ending in the same characters are reported separately"""
+    pool = TokenPool(["aaaa1111", "bbbb1111"])
+    pool.acquire(now=0)
+    
+    usage = pool.usage()
+    assert sorted(usage) == ["#1 ...1111", "#2 ...1111"]
+    assert sum(entry["requests"] for entry in usage.values()) == 1
+
+def test_token_pool_skips_exhausted_until_reset():
+    """Test that exhausted tokens are skipped until their reset time"""
+    pool = TokenPool(["aaaa1111", "bbbb2222"])
+    pool.update("aaaa1111", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "100"})
+    pool.update("bbbb2222", {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "200"})
+    
+    assert pool.acquire(now=50) is None
+    assert pool.earliest_reset() == 100
+    assert pool.acquire(now=150) == "aaaa1111"
+
+
+class FakeResponse:
+    """Minimal requests.Response stand-in"""
+    
+    def __init__(self, status_code=200, payload=None, headers=None):
+        self.status_code = status_code
+        self.payload = payload
+        self.headers = headers or {}
+        self.ok = status_code < 400
+        self.text = json.dumps(payload)
+    
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """Session stand-in returning one canned response and recording requests"""
+    
+    def __init__(self, response, limit=50):
+        self.response = response
+        self.limit = limit
+        self.requests = []
+    
+    def request(self, method, url, json=None, headers=None, timeout=None):
+        self.requests.append({"method": method, "url": url, "json": json, "headers": headers})
+        assert len(self.requests) <= self.limit, "client kept re-sending"
+        return self.response
+
+def _fake_client(response, tokens=("aaaa1111", "bbbb2222")):
+    from github.client import GitHubClient
+    client = GitHubClient(tokens=list(tokens))
+    client.session = FakeSession(response)
+    return client
+
+def _pooled_adapter(maxsize):
+    """HTTPAdapter checking connections out of the client's counting pool without a network"""
+    from requests.adapters import HTTPAdapter
+    from requests.models import Response
+    from requests.structures import CaseInsensitiveDict
+    from github.client import _CountingHTTPSConnectionPool
+    
+    class PooledFakeAdapter(HTTPAdapter):
+        def __init__(self):
+            super().__init__()
+            self.pool = _CountingHTTPSConnectionPool("api.github.com", maxsize=maxsize, block=True)
+            self.sent = []
+        
+        def send(self, request, **kwargs):
+            self.sent.append(request)
+            self.pool._put_conn(self.pool._get_conn())
+            response = Response()
+            response.status_code = 200
+            response.headers = CaseInsensitiveDict({"Content-Encoding": "gzip"})
+            response._content = b'{"number": 1}'
+            response.request = request
+            response.url = request.url
+            return response
+    
+    return PooledFakeAdapter()
+
+def test_client_counts_connection_reuse():
+    """Test that requests on a kept-alive connection count as reused and new ones as opened"""
+    from github.client import GitHubClient
+    client = GitHubClient(tokens=["aaaa1111"], pool_size=2)
+    adapter = _pooled_adapter(maxsize=2)
+    client.session.mount("https://", adapter)
+    
+    for _ in range(3):
+        client.get_pull_request("o", "r", 1)
+    stats = client.connection_stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused_connections"]) == (3, 1, 2)
+    
+    # While another worker holds the open connection a second one is needed
+    busy = adapter.pool._get_conn()
+    client.get_pull_request("o", "r", 1)
+    adapter.pool._put_conn(busy)
+    for _ in range(2):
+        client.get_pull_request("o", "r", 1)
+    
+    stats = client.connection_stats()
+    assert (stats["requests"], stats["new_connections"], stats["reused_connections"]) == (6, 2, 4)
+    assert stats["endpoints"]["pulls"] == {"requests": 6, "new_connections": 2, "reused_connections": 4}
+    assert stats["reuse_ratio"] == 0.667
+    assert stats["compressed_responses"] == 6
+    # requests negotiates compression by default
+    assert "gzip" in adapter.sent[0].headers["Accept-Encoding"]
+
+def test_client_stops_when_limit_reset_is_stale():
+    """Test that a rate limit with an already-passed reset is tried once per token"""
+    stale = FakeResponse(403, {"message": "rate limited"},
+                         {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1"})
+    client = _fake_client(stale)
+    
+    try:
+        client.get_pull_request("o", "r", 1)
+        assert False, "expected ConnectionError"
+    except ConnectionError as e:
+        assert "rate limit" in str(e)
+    assert len(client.session.requests) == 2
+    assert {r["headers"]["Authorization"] for r in client.session.requests} == {
+        "token aaaa1111", "token bbbb2222"
+    }
+
+
+# ============================================================================
+# BATCH QUEUE TESTS
+# ============================================================================
+
+BATCH_JOBS = [{"owner": "o", "repo": "r", "number": str(n)} for n in (11, 12, 13)]
+
+def _fake_analyze(owner, repo, number):
+    """Picklable job function; PR 13 always errors"""
+    if number == "13":
+        raise ConnectionError("boom")
+    return {"lint": {"classification": "RELIABLE"}}
+
+def test_batch_runs_across_processes():
+    """Test that jobs shard across worker processes and merge into one report"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        merged = run_batch(BATCH_JOBS, os.path.join(tmp, "q.db"), workers=2, analyze=_fake_analyze)
+    
+    assert sorted(merged["reports"]) == ["o/r#11", "o/r#12"]
+    assert "o/r#13" in merged["errors"]
+    assert merged["summary"] == {"RELIABLE": 2}
+
+def test_batch_resumes_from_checkpoint():
+    """Test that a rerun only processes jobs that did not complete"""
+    import tempfile
+    calls = []
+    
+    def analyze(owner, repo, number):
+        calls.append(number)
+        return {"lint": {"classification": "STABLE"}}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "q.db")
+        run_batch(BATCH_JOBS, db_path, workers=1, analyze=_fake_analyze)
+        merged = run_batch(BATCH_JOBS, db_path, workers=1, analyze=analyze)
+    
+    assert calls == ["13"]
+    assert len(merged["reports"]) == 3 and not merged["errors"]
+
+def test_batch_runs_only_given_jobs():
+    """Test that unfinished jobs left in the database by other runs are not picked up"""
+    import tempfile
+    calls = []
+    
+    def analyze(owner, repo, number):
+        calls.append(number)
+        return {"lint": {"classification": "STABLE"}}
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "q.db")
+        run_batch(BATCH_JOBS, db_path, workers=1, analyze=_fake_analyze)
+        merged = run_batch([{"owner": "o", "repo": "r", "number": 11},
+                            {"owner": "o", "repo": "r", "number": "14"}],
+                           db_path, workers=1, analyze=analyze)
+    
+    # 13 failed in the first run but is not part of this batch
+    assert calls == ["14"]
+    assert sorted(merged["reports"]) == ["o/r#11", "o/r#14"]
+    assert not merged["errors"]
+
+
+def test_plan_fits_budget_by_lowering_depth():
+    """Test that the planner lowers max_commits before skipping any PR"""
+    jobs = [{"owner": "o", "repo": "r", "number": n, "commits": 30} for n in range(1, 6)]
+    assert estimate_cost(30, 20) == 41
+    
+    full = plan_batch(jobs, budget=1000, reserve=100)
+    assert full["max_commits"] == 20 and not full["skipped"]
+    assert full["estimated_cost"] == 5 * 41
+    
+    tight = plan_batch(jobs, budget=200, reserve=100)
+    assert tight["max_commits"] == 9
+    assert not tight["skipped"]
+    assert tight["estimated_cost"] <= 100
+
+def test_plan_skips_low_priority_prs():
+    """Test that PRs are skipped lowest priority first and cached PRs are free"""
+    jobs = [
+        {"owner": "o", "repo": "r", "number": 1, "commits": 10, "priority": 0},
+        {"owner": "o", "repo": "r", "number": 2, "commits": 10, "priority": 5},
+        {"owner": "o", "repo": "r", "number": 3, "commits": 10, "cached": True},
+        {"owner": "o", "repo": "r", "number": 4, "commits": 10, "priority": 1}
+    ]
+    plan = plan_batch(jobs, budget=30, min_commits=5, reserve=0)
+    
+    assert plan["max_commits"] == 5
+    assert [j["number"] for j in plan["run"]] == [2, 4]
+    assert [j["number"] for j in plan["skipped"]] == [1]
+    assert [j["number"] for j in plan["cached"]] == [3]
+
+
+# ============================================================================
+# REFRESHER TESTS
+# ============================================================================
+
+class FakeEventsClient:
+    """Serves scripted events feeds; a feed equal to the last one answers 304"""
+    
+    def __init__(self, feeds, open_prs=None):
+        self.feeds = feeds
+        self.open_prs = open_prs or {}
+        self.requests = []
+    
+    def get_pull_requests(self, owner, repo, state="open", per_page=100, page=1):
+        assert state == "open"
+        self.requests.append((f"{owner}/{repo}", "pulls", page))
+        prs = self.open_prs.get(f"{owner}/{repo}", [])
+        return prs[(page - 1) * per_page:page * per_page]
+    
+    def get_repo_events(self, owner, repo, etag=None):
+        self.requests.append((f"{owner}/{repo}", etag))
+        events = self.feeds[f"{owner}/{repo}"]
+        current = f'"{len(events)}"'
+        if etag == current:
+            return None, etag, 30
+        return list(reversed(events)), current, 30
+
+def _pr_head(branch, head_repo="o/r"):
+    return {"ref": branch, "repo": {"full_name": head_repo}}
+
+def _pr_event(event_id, number, action, branch, head_repo="o/r"):
+    return {"id": str(event_id), "type": "PullRequestEvent", "payload": {
+        "action": action, "number": number,
+        "pull_request": {"number": number, "head": _pr_head(branch, head_repo)}
+    }}
+
+def _push_event(event_id, branch):
+    return {"id": str(event_id), "type": "PushEvent", "payload": {"ref": f"refs/heads/{branch}"}}
+
+def test_refresher_queues_only_active_prs():
+    """Test that PR pushes are queued once and quiet feeds cost a 304"""
+    feed = [_pr_event(1, 7, "opened", "fix-a"), _pr_event(2, 8, "labeled", "fix-b")]
+    client = FakeEventsClient({"o/r": feed, "o/quiet": []})
+    refresher = EventsRefresher(client, ["o/r", "o/quiet"])
+    
+    assert refresher.poll(now=0) == [{"owner": "o", "repo": "r", "number": "7"}]
+    # Interval not elapsed: no requests at all
+    assert refresher.poll(now=10) == []
+    assert len([r for r in client.requests if r[1] != "pulls"]) == 2
+    
+    # Push to PR 8's branch and a closed PR's branch; quiet repo answers 304
+    feed.extend([_pr_event(3, 7, "closed", "fix-a"), _push_event(4, "fix-b"), _push_event(5, "fix-a")])
+    assert refresher.poll(now=30) == [{"owner": "o", "repo": "r", "number": "8"}]
+    assert client.requests[-1] == ("o/quiet", '"0"')
+    assert refresher.poll(now=60) == []
+
+def test_refresher_state_round_trip():
+    """Test that ETags and seen event ids survive a restart"""
+    import tempfile
+    feed = [_pr_event(1, 7, "synchronize", "fix-a")]
+    client = FakeEventsClient({"o/r": feed})
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "refresh.json")
+        first = EventsRefresher(client, ["o/r"], state_path=path)
+        assert len(first.poll(now=0)) == 1
+        first.save()
+        
+        second = EventsRefresher(client, ["o/r"], state_path=path)
+        assert second.poll(now=100) == []
+        assert client.requests[-1] == ("o/r", '"1"')
+        # The branch map was seeded once, before the first restart
+        assert client.requests.count(("o/r", "pulls", 1)) == 1
+
+def test_refresher_seeds_branches_from_open_prs():
+    """Test that pushes reach PRs opened before the first poll but never fork PRs"""
+    open_prs = [{"number": n, "head": _pr_head(f"filler-{n}")} for n in range(100, 200)]
+    open_prs += [
+        {"number": 5, "head": _pr_head("old-fix")},
+        {"number": 6, "head": _pr_head("main", head_repo="fork/r")},
+        {"number": 4, "head": {"ref": "gone", "repo": None}}
+    ]
+    feed = []
+    client = FakeEventsClient({"o/r": feed}, open_prs={"o/r": open_prs})
+    refresher = EventsRefresher(client, ["o/r"])
+    
+    assert refresher.poll(now=0) == []
+    assert [r for r in client.requests if r[1] == "pulls"] == [("o/r", "pulls", 1), ("o/r", "pulls", 2)]
+    
+    # A push to the base repo's main is not the fork PR's head branch
+    feed.extend([_push_event(1, "old-fix"), _push_event(2, "main"),
+                 _pr_event(3, 9, "labeled", "main", head_repo="other/r"), _push_event(4, "main")])
+    assert refresher.poll(now=30) == [{"owner": "o", "repo": "r", "number": "5"}]
+
+
+# ============================================================================
+# REPOSITORY SCAN TESTS
+# ============================================================================
+
+class FakePullsClient:
+    """Lists scripted PRs most recently updated first, a page at a time"""
+    
+    def __init__(self, prs):
+        self.prs = prs
+        self.pages = 0
+    
+    def get_pull_requests(self, owner, repo, state="open", sort="updated", direction="desc",
+                          per_page=100, page=1):
+        self.pages += 1
+        listed = [pr for pr in self.prs if state == "all" or pr["state"] == state]
+        listed.sort(key=lambda pr: pr["updated_at"], reverse=True)
+        return listed[(page - 1) * per_page:page * per_page]
+
+def _pr(number, sha, updated_at, state="open"):
+    return {"number": number, "state": state, "head": {"sha": sha}, "updated_at": updated_at}
+
+def test_scan_reanalyzes_only_changed_prs():
+    """Test that rescans stop at the watermark and reuse unchanged PRs' results"""
+    prs = {n: _pr(n, f"sha{n}", t) for n, t in ((5, "t0"), (3, "t1"), (1, "t2"), (2, "t3"))}
+    client = FakePullsClient(list(prs.values()))
+    analyzed = []
+    pending = {"3"}
+    
+    def analyze(owner, repo, number):
+        analyzed.append(number)
+        status = "PENDING" if number in pending else "PASS"
+        pending.discard(number)
+        return {"ci": {"current_status": status}}
+    
+    scanner = RepoScanner(client)
+    first = scanner.scan("o", "r", analyze=analyze, per_page=2)
+    assert sorted(first["results"]) == ["1", "2", "3", "5"]
+    assert first["stats"]["watermark"] == "t3"
+    
+    # PR 1 only got a comment, PR 2 a push, PR 5 was closed; PR 3's CI was pending
+    prs[1]["updated_at"] = "t5"
+    prs[2].update(head={"sha": "sha2b"}, updated_at="t6")
+    prs[5].update(state="closed", updated_at="t7")
+    del analyzed[:]
+    second = scanner.scan("o", "r", analyze=analyze, per_page=2)
+    assert sorted(analyzed) == ["2", "3"]
+    assert sorted(second["results"]) == ["1", "2", "3"]
+    assert second["results"]["3"]["ci"]["current_status"] == "PASS"
+    assert (second["stats"]["listed"], second["stats"]["pages"]) == (3, 2)
+    assert (second["stats"]["unchanged"], second["stats"]["closed"], second["stats"]["reused"]) == (1, 1, 1)
+    
+    # Nothing new: one page, no analyses
+    pages = client.pages
+    third = scanner.scan("o", "r", analyze=analyze, per_page=2)
+    assert third["stats"]["analyzed"] == 0
+    assert client.pages == pages + 1
+    assert third["results"] == second["results"]
+
+
+# ============================================================================
+# TRIAGE TESTS
+# ============================================================================
+
+class FakeSearchClient:
+    """Serves GraphQL search pages of PR rollups, page_size PRs at a time"""
+    
+    def __init__(self, nodes):
+        self.nodes = nodes
+        self.queries = []
+    
+    def graphql(self, query, variables=None, allow_partial=False):
+        self.queries.append(variables)
+        start = int(variables["after"] or 0)
+        end = start + variables["first"]
+        return {"search": {
+            "issueCount": len(self.nodes),
+            "pageInfo": {"hasNextPage": end < len(self.nodes), "endCursor": str(end)},
+            "nodes": self.nodes[start:end]
+        }}
+
+def _rollup_node(number, contexts, state="SUCCESS", truncated=False):
+    return {
+        "number": number, "url": f"https://github.com/o/r/pull/{number}",
+        "repository": {"nameWithOwner": "o/r"}, "headRefOid": f"sha{number}",
+        "commits": {"nodes": [{"commit": {"statusCheckRollup": None if contexts is None else {
+            "state": state,
+            "contexts": {"pageInfo": {"hasNextPage": truncated}, "nodes": contexts}
+        }}}]}
+    }
+
+def _run(conclusion, status="COMPLETED"):
+    return {"__typename": "CheckRun", "name": "tests", "status": status, "conclusion": conclusion}
+
+def test_triage_analyzes_only_failing_and_pending():
+    """Test that triage classifies from search pages and analyzes only unhealthy PRs"""
+    client = FakeSearchClient([
+        _rollup_node(1, [_run("SUCCESS"), _run("FAILURE")]),
+        _rollup_node(2, [_run(None, status="IN_PROGRESS")]),
+        _rollup_node(3, [_run("SUCCESS"), {"__typename": "StatusContext", "context": "ci", "state": "SUCCESS"}]),
+        _rollup_node(4, None),
+        # More contexts than fetched: GitHub's rollup state wins
+        _rollup_node(5, [_run("SUCCESS")], state="FAILURE", truncated=True),
+        {},
+    ])
+    analyzed = []
+    
+    def analyze(owner, repo, number):
+        analyzed.append(number)
+        if number == "5":
+            raise ValueError("gone")
+        return {"tests": {"classification": "FLAKY"}}
+    
+    result = triage(client, "org:o", analyze=analyze, page_size=2)
+    assert [pr["ci_status"] for pr in result["prs"]] == ["FAIL", "PENDING", "PASS", "NO_CI", "FAIL"]
+    assert result["counts"] == {"FAIL": 2, "PENDING": 1, "PASS": 1, "NO_CI": 1}
+    assert result["search_requests"] == 3
+    assert client.queries[0]["search"] == "org:o is:pr is:open"
+    assert analyzed == ["1", "2", "5"]
+    assert sorted(result["reports"]) == ["o/r#1", "o/r#2"]
+    assert result["errors"] == {"o/r#5": "gone"}
+
+def test_graphql_posts_query_and_maps_errors():
+    """Test that graphql() POSTs the query and maps GraphQL errors to exception types"""
+    client = _fake_client(FakeResponse(200, {"data": {"viewer": {"login": "me"}}}))
+    assert client.graphql("query { viewer { login } }", {"x": 1}) == {"viewer": {"login": "me"}}
+    sent = client.session.requests[0]
+    assert sent["method"] == "POST" and sent["url"].endswith("/graphql")
+    assert sent["json"] == {"query": "query { viewer { login } }", "variables": {"x": 1}}
+    
+    cases = [("NOT_FOUND", ValueError), ("RATE_LIMITED", ConnectionError), ("INTERNAL", RuntimeError)]
+    for error_type, expected in cases:
+        client.session.response = FakeResponse(200, {"data": None, "errors": [
+            {"type": error_type, "message": "nope"}
+        ]})
+        try:
+            client.graphql("query { x }")
+            assert False, f"expected {expected.__name__}"
+        except expected:
+            pass
+    
+    client.session.response = FakeResponse(200, {"data": {"pr0": None, "pr1": {"ok": True}}, "errors": [
+        {"type": "NOT_FOUND", "message": "missing"}
+    ]})
+    assert client.graphql("query { x }", allow_partial=True)["pr1"] == {"ok": True}
+
+def test_graphql_rate_limit_tracked_apart_from_core():
+    """Test that an exhausted GraphQL budget stops requests but leaves core usable"""
+    exhausted = FakeResponse(403, {"message": "rate limited"}, {
+        "X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(time.time()) + 3600),
+        "X-RateLimit-Resource": "graphql"
+    })
+    client = _fake_client(exhausted)
+    
+    for _ in range(2):
+        try:
+            client.graphql("query { x }")
+            assert False, "expected ConnectionError"
+        except ConnectionError as e:
+            assert "graphql rate limit" in str(e)
+    # One attempt per token, then refused without sending
+    assert len(client.session.requests) == 2
+    assert not client.token_pool.has_available(resource="graphql")
+    assert client.token_pool.has_available()
+
+
+# ============================================================================
+# BACKFILL TESTS
+# ============================================================================
+
+class FakeHistoryClient(FakeClient):
+    """FakeClient whose commits form a branch listable from any sha, newest first"""
+    
+    def get_branch_commits(self, owner, repo, branch, per_page=100, page=1, since=None):
+        self.calls += 1
+        newest_first = [
+            dict(commit, parents=[{"sha": parent["sha"]} for parent in self.commits[i - 1:i]])
+            for i, commit in reversed(list(enumerate(self.commits)))
+        ]
+        shas = [c["sha"] for c in newest_first]
+        start = shas.index(branch) if branch in shas else 0
+        return newest_first[start:start + per_page]
+    
+    def push(self, outcomes_by_check):
+        """Append one commit per outcome to the branch"""
+        for name, outcomes in outcomes_by_check.items():
+            self.outcomes_by_check[name] = self.outcomes_by_check[name] + outcomes
+        count = max(len(o) for o in self.outcomes_by_check.values())
+        self.commits = [
+            {"sha": f"sha{i}", "commit": {"committer": {"date": f"2026-01-{i + 1:02d}T00:00:00Z"}}}
+            for i in range(count)
+        ]
+
+def test_backfill_resumes_within_budget():
+    """Test that a budget-limited backfill checkpoints and resumes without refetching"""
+    import tempfile
+    client = FakeHistoryClient({"lint": ["PASS", "FAIL", "PASS"] * 4, "unit": ["PASS"] * 12},
+                               fail_shas=["sha5"])
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackfillStore(os.path.join(tmp, "backfill.sqlite3"))
+        try:
+            first = backfill_branch(client, store, "o", "r", "main", budget=15, per_page=5, workers=1)
+            assert first["commits"] == 6 and not first["finished"]
+            assert first["requests"] <= 15
+            
+            store.close()
+            store = BackfillStore(os.path.join(tmp, "backfill.sqlite3"))
+            second = backfill_branch(client, store, "o", "r", "main", budget=100, per_page=5, workers=2)
+            assert second["finished"]
+            assert first["commits"] + second["commits"] == 12
+            assert second["failed_commits"] == 1
+            assert second["commits_per_minute"] > 0
+            
+            history = store.check_history("o", "r")
+            assert [o["sha"] for o in history["unit"]] == [f"sha{i}" for i in range(12) if i != 5]
+            assert store.counts("o", "r") == {"commits": 12, "outcomes": 22}
+            
+            # Nothing new: one listing request, and the failed commit is retried
+            third = backfill_branch(client, store, "o", "r", "main", budget=100, workers=1)
+            assert third["commits"] == 0 and third["failed_commits"] == 1
+            assert third["finished"] and third["requests"] == 1 + 2
+        finally:
+            store.close()
+
+def test_backfill_retries_failures_and_catches_up():
+    """Test that later backfills recover failed commits and store commits pushed since"""
+    import tempfile
+    client = FakeHistoryClient({"lint": ["PASS"] * 6}, fail_shas=["sha2"])
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BackfillStore(os.path.join(tmp, "backfill.sqlite3"))
+        try:
+            # One commit per page still advances down the branch
+            first = backfill_branch(client, store, "o", "r", "main", budget=100, per_page=1, workers=1)
+            assert first["finished"] and first["commits"] == 6 and first["failed_commits"] == 1
+            assert first["requests"] == 6 + 6 * 2
+            
+            client.fail_shas.clear()
+            client.push({"lint": ["FAIL", "PASS"]})
+            second = backfill_branch(client, store, "o", "r", "main", budget=100, per_page=1, workers=1)
+            assert second["finished"]
+            assert second["retried"] == 1
+            assert second["commits"] == 2
+            history = store.check_history("o", "r")
+            assert [o["sha"] for o in history["lint"]] == [f"sha{i}" for i in range(8)]
+            assert store.counts("o", "r") == {"commits": 8, "outcomes": 8}
+        finally:
+            store.close()
+
+
+# ============================================================================
+# PAYLOAD STORE TESTS
+# ============================================================================
+
+def _check_runs_payload(sha, suite_status="completed"):
+    app = {"id": 15368, "slug": "github-actions", "description": "Automate your workflow " * 8}
+    return {"total_count": 2, "check_runs": [
+        {"id": f"{sha}-{j}", "name": f"job-{j}", "head_sha": sha, "status": "completed",
+         "conclusion": "success", "app": app, "pull_requests": [],
+         "check_suite": {"id": sha, "status": suite_status, "head_branch": "feature-branch-" * 8},
+         "output": {"title": None, "summary": "All tests passed. " * 10}}
+        for j in range(2)
+    ]}
+
+def test_payload_store_round_trip_and_dedup():
+    """Test that payloads load back unchanged while shared objects are stored once"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PayloadStore(os.path.join(tmp, "payloads.sqlite3"))
+        statuses = [{"context": "ci", "state": "success", "creator": {"login": "bot"}}]
+        for i in range(5):
+            store.put(f"/check-runs/sha{i}", _check_runs_payload(f"sha{i}"), etag=f'"{i}"')
+        store.put("/statuses/sha0", statuses)
+        
+        assert store.get("/check-runs/sha3") == (_check_runs_payload("sha3"), '"3"')
+        assert store.get("/statuses/sha0") == (statuses, None)
+        assert store.get("/missing") is None
+        assert store.etag("/check-runs/sha1") == '"1"'
+        
+        stats = store.stats()
+        # One root per payload, one suite per commit, one app and one output overall
+        assert stats["blobs"] == 6 + 5 + 2
+        assert stats["compression_ratio"] > 3
+        assert store.measure_load()["payloads"] == 6
+        store.close()
+
+def test_payload_store_compaction_blocks_concurrent_puts():
+    """Test that a put from another connection waits out compaction instead of reusing dead blobs"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "payloads.sqlite3")
+        store = PayloadStore(path)
+        store.put("/check-runs/sha0", _check_runs_payload("sha0"))
+        # Orphans the original root and suite blobs
+        store.put("/check-runs/sha0", _check_runs_payload("sha0", suite_status="rerun"))
+        
+        other = PayloadStore(path)
+        writer = threading.Thread(
+            target=lambda: other.put("/check-runs/copy", _check_runs_payload("sha0"))
+        )
+        blob = store._blob
+        
+        def blob_while_writing(digest):
+            # The other process records a payload reusing the dead blobs mid-mark
+            if writer.ident is None:
+                writer.start()
+                time.sleep(0.2)
+            return blob(digest)
+        
+        store._blob = blob_while_writing
+        store.compact()
+        writer.join()
+        
+        assert other.get("/check-runs/copy")[0] == _check_runs_payload("sha0")
+        assert store.compact()["blobs_removed"] == 0
+        other.close()
+        store.close()
+
+def test_payload_store_keeps_reserved_looking_objects():
+    """Test that payload objects shaped like blob references load back as data"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        store = PayloadStore(os.path.join(tmp, "payloads.sqlite3"))
+        payload = {"x": {"$blob": "deadbeef"}, "y": [{"$literal": {"$blob": "f00d"}}],
+                   "output": {"$blob": "a" * 200}}
+        store.put("/odd", payload)
+        
+        assert store.get("/odd") == (payload, None)
+        assert store.compact()["blobs_removed"] == 0
+        assert store.get("/odd") == (payload, None)
+        store.close()
+
+def test_payload_store_compaction():
+    """Test that compaction drops only blobs no payload references"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "payloads.sqlite3")
+        store = PayloadStore(path)
+        for i in range(3):
+            store.put(f"/check-runs/sha{i}", _check_runs_payload(f"sha{i}"))
+        # Re-recording after a re-run orphans the old root and suite blobs
+        store.put("/check-runs/sha0", _check_runs_payload("sha0", suite_status="rerun"))
+        
+        assert store.compact()["blobs_removed"] == 2
+        assert store.compact()["blobs_removed"] == 0
+        store.close()
+        
+        reopened = PayloadStore(path)
+        assert reopened.get("/check-runs/sha0")[0] == _check_runs_payload("sha0", suite_status="rerun")
+        assert reopened.get("/check-runs/sha2")[0] == _check_runs_payload("sha2")
+        reopened.close()
+
+
+# ============================================================================
+# SNAPSHOT TESTS
+# ============================================================================
+
+def test_snapshot_round_trip():
+    """Test that a snapshot reads back the exact check history and report"""
+    import tempfile
+    from github.confidence import generate_confidence_report
+    history = {
+        "lint": [{"sha": "a1", "outcome": "PASS", "commit_date": "2026-01-01"},
+                 {"sha": "b2", "outcome": "PENDING", "commit_date": "2026-01-02"}],
+        "tests ✓": [{"sha": "a1", "outcome": "FAIL", "commit_date": "2026-01-01"}]
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "history.snap")
+        write_snapshot(path, history)
+        with Snapshot(path) as snapshot:
+            assert snapshot.to_check_history() == history
+            assert snapshot.sha_count == 2
+            assert snapshot.confidence_report() == generate_confidence_report(history)
+
+def test_snapshot_rejects_other_files():
+    """Test that non-snapshot files are rejected"""
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bogus.snap")
+        with open(path, "wb") as f:
+            f.write(b"\0" * 128)
+        try:
+            Snapshot(path)
+            assert False, "Should have raised ValueError"
+        except ValueError:
+            pass
+
+
+# ============================================================================
+# OUTCOME MATRIX TESTS
+# ============================================================================
+
+def _outage_history():
+    """Five checks over six commits; every check fails on sha3 (runner outage)"""
+    rows = {
+        "lint":   "PPPFPP",
+        "unit":   "PPPFPP",
+        "e2e":    "PFPFPF",
+        "docs":   "PPPFP-",
+        "deploy": "PPPFPP"
+    }
+    return {
+        name: [
+            {"sha": f"sha{i}", "outcome": "PASS" if c == "P" else "FAIL",
+             "commit_date": f"2026-01-0{i + 1}"}
+            for i, c in enumerate(row) if c != "-"
+        ]
+        for name, row in rows.items()
+    }
+
+def test_matrix_row_and_column_reductions():
+    """Test per-sha and per-check reductions over the bit-packed matrix"""
+    matrix = OutcomeMatrix.from_history(_outage_history())
+    
+    assert matrix.shas == [f"sha{i}" for i in range(6)]
+    assert matrix.failures_per_sha() == [0, 1, 0, 5, 0, 1]
+    assert matrix.runs_per_sha() == [5, 5, 5, 5, 5, 4]
+    assert matrix.infrastructure_failures() == ["sha3"]
+    
+    per_check = matrix.failures_per_check(matrix.sha_mask(["sha3"]))
+    assert per_check == {"lint": 0, "unit": 0, "e2e": 2, "docs": 0, "deploy": 0}
+
+def test_infra_failures_excluded_from_flakiness():
+    """Test that a shared outage no longer makes every check look unreliable"""
+    history = _outage_history()
+    client = FakeClient({
+        name: [o["outcome"] for o in outcomes] for name, outcomes in history.items()
+    })
+    client.outcomes_by_check["docs"] = ["PASS", "PASS", "PASS", "FAIL", "PASS"]
+    
+    plain = analyze_ci_reliability(client, "o", "r", 1)
+    filtered = analyze_ci_reliability(client, "o", "r", 1, exclude_infra_failures=True)
+    
+    assert plain["lint"]["metrics"]["failures"] == 1
+    assert filtered["lint"]["metrics"]["failures"] == 0
+    assert filtered["lint"]["infra_excluded_runs"] == 1
+    assert filtered["e2e"]["metrics"]["failures"] == 2
+    assert exclude_shas(history, ["sha3"])["lint"] == [o for o in history["lint"] if o["sha"] != "sha3"]
+
+
+# ============================================================================
+# CHANGE-POINT TESTS
+# ============================================================================
+
+def _pattern(pattern):
+    """Outcome list from a P/F string, one commit per character"""
+    return [
+        {"sha": f"sha{i}", "outcome": "PASS" if c == "P" else "FAIL", "commit_date": f"day{i}"}
+        for i, c in enumerate(pattern)
+    ]
+
+def test_change_point_finds_regression_sha():
+    """Test that a reliable check that broke reports the sha it broke at"""
+    changes = detect_change_points(_pattern("P" * 20 + "FPFFPFFFPF"))
+    
+    assert len(changes) == 1
+    assert changes[0]["direction"] == "regression"
+    assert changes[0]["sha"] == "sha20"
+    assert changes[0]["commit_date"] == "day20"
+    assert changes[0]["pass_rate_before"] == 100.0
+
+def test_change_point_ignores_steady_flakiness():
+    """Test that alternating and one-off failures are not reported as shifts"""
+    assert detect_change_points(_pattern("PF" * 40)) == []
+    assert detect_change_points(_pattern("P" * 30 + "F" + "P" * 30 + "FF" + "P" * 20)) == []
+    
+    recovered = detect_change_points(_pattern("F" * 10 + "P" * 10))
+    assert [(c["direction"], c["sha"]) for c in recovered] == [("recovery", "sha10")]
+
+def test_change_point_is_constant_memory():
+    """Test that the detector keeps no per-outcome state"""
+    detector = ChangePointDetector()
+    for i in range(10000):
+        detector.update("PASS" if i % 3 else "FAIL", sha=f"sha{i}")
+    assert detector.runs == 10000
+    assert detector.changes == []
+    assert not any(isinstance(v, list) and v for k, v in vars(detector).items() if k != "changes")
+
+
+# ============================================================================
+# METRICS TESTS
+# ============================================================================
+
+def test_metrics_text_exposition():
+    """Test counter and histogram rendering in Prometheus text format"""
+    registry = MetricsRegistry()
+    requests_total = registry.counter("requests_total", "Requests", ("endpoint", "outcome"))
+    latency = registry.histogram("latency_seconds", "Latency", ("endpoint",), buckets=(0.1, 1.0))
+    requests_total.inc(endpoint="pulls", outcome="ok")
+    requests_total.inc(2, endpoint="pulls", outcome="ok")
+    latency.observe(0.05, endpoint="pulls")
+    latency.observe(0.5, endpoint="pulls")
+    
+    text = registry.render()
+    assert "# TYPE requests_total counter" in text
+    assert 'requests_total{endpoint="pulls",outcome="ok"} 3' in text
+    assert 'latency_seconds_bucket{endpoint="pulls",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="pulls",le="+Inf"} 2' in text
+    assert 'latency_seconds_count{endpoint="pulls"} 2' in text
+    
+    try:
+        requests_total.inc(endpoint="pulls")
+        assert False, "Should have raised ValueError"
+    except ValueError:
+        pass
+
+def test_client_latency_split_by_outcome():
+    """Test that request latency is recorded per endpoint and response outcome"""
+    _fake_client(FakeResponse(200, {"number": 1})).get_pull_request("o", "r", 1)
+    try:
+        _fake_client(FakeResponse(403, {"message": "rate limited"},
+                                  {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "1"})
+                     ).get_pull_request("o", "r", 1)
+    except ConnectionError:
+        pass
+    
+    text = REGISTRY.render()
+    for outcome in ("ok", "rate_limited"):
+        assert f'github_api_request_duration_seconds_count{{endpoint="pulls",outcome="{outcome}"}}' in text
+
+def test_metrics_served_over_http():
+    """Test that scoring is counted and served on a local port"""
+    import urllib.request
+    from github.confidence import generate_confidence_report
+    before = CHECKS_SCORED.value(classification="STABLE")
+    generate_confidence_report({"lint": [{"outcome": "PASS"}] * 5})
+    assert CHECKS_SCORED.value(classification="STABLE") == before + 1
+    
+    server = REGISTRY.serve(port=0)
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            text = response.read().decode("utf-8")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert f'ci_checks_scored_total{{classification="STABLE"}} {before + 1}' in text
+    assert "ci_confidence_report_duration_seconds_count" in text
+
+def test_metrics_drain_and_merge():
+    """Test that drained counters and histograms add up in another registry"""
+    worker, parent = MetricsRegistry(), MetricsRegistry()
+    for registry in (worker, parent):
+        registry.counter("jobs_total", "Jobs", ("outcome",))
+        registry.histogram("latency_seconds", "Latency", buckets=(0.1, 1.0))
+    worker.counter("jobs_total", "Jobs", ("outcome",)).inc(2, outcome="done")
+    worker.histogram("latency_seconds", "Latency").observe(0.5)
+    parent.counter("jobs_total", "Jobs", ("outcome",)).inc(outcome="done")
+    
+    parent.merge(worker.drain())
+    text = parent.render()
+    assert 'jobs_total{outcome="done"} 3' in text
+    assert 'latency_seconds_bucket{le="1.0"} 1' in text
+    assert worker.counter("jobs_total", "Jobs", ("outcome",)).value(outcome="done") == 0
+
+def _scoring_analyze(owner, repo, number):
+    """Picklable job function that records scoring metrics in its process"""
+    from github.confidence import generate_confidence_report
+    return generate_confidence_report({"lint": [{"outcome": "PASS"}] * 5})
+
+def test_batch_merges_worker_metrics():
+    """Test that metrics recorded in worker processes reach the parent registry once"""
+    import tempfile
+    scored = CHECKS_SCORED.value(classification="STABLE")
+    done = BATCH_JOB_RESULTS.value(outcome="done")
+    with tempfile.TemporaryDirectory() as tmp:
+        run_batch(BATCH_JOBS[:2], os.path.join(tmp, "q.db"), workers=2, analyze=_scoring_analyze)
+    
+    assert CHECKS_SCORED.value(classification="STABLE") == scored + 2
+    assert BATCH_JOB_RESULTS.value(outcome="done") == done + 2
+
+
+# ============================================================================
+# TRACING TESTS
+# ============================================================================
+
+class RecordingHook:
+    def __init__(self):
+        self.started = []
+        self.ended = []
+    
+    def on_span_start(self, span):
+        self.started.append(span.name)
+    
+    def on_span_end(self, span):
+        self.ended.append((span.name, dict(span.attributes)))
+
+def test_tracing_hooks_see_analysis_spans():
+    """Test that commit and report spans carry owner, repo, sha and status"""
+    hook = RecordingHook()
+    add_hook(hook)
+    try:
+        client = FakeClient({"lint": ["PASS", "FAIL", "PASS"]}, fail_shas=["sha1"])
+        analyze_ci_reliability(client, "o", "r", 1)
+    finally:
+        remove_hook(hook)
+    
+    commits = [attrs for name, attrs in hook.ended if name == "ci.commit"]
+    assert [c["sha"] for c in commits] == ["sha0", "sha1", "sha2"]
+    assert [c["status"] for c in commits] == ["ok", "error", "ok"]
+    assert commits[0]["owner"] == "o" and commits[0]["repo"] == "r"
+    assert [name for name, _ in hook.ended][-1] == "ci.confidence_report"
+    assert sorted(hook.started) == sorted(name for name, _ in hook.ended)
+
+def test_tracing_noop_without_hooks():
+    """Test that span() is a shared falsy no-op when nothing is registered"""
+    with span("github.request", endpoint="pulls") as s:
+        s.set("status", 200)
+    assert not s
+    assert span("ci.commit") is s
+
+def test_chrome_trace_export():
+    """Test that the exporter writes complete events per span"""
+    import tempfile
+    exporter = ChromeTraceExporter()
+    add_hook(exporter)
+    try:
+        with span("ci.commit", owner="o", repo="r", sha="abc"):
+            with span("github.request", endpoint="check-runs", status=200):
+                pass
+    finally:
+        remove_hook(exporter)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trace.json")
+        assert exporter.write(path) == 2
+        with open(path) as f:
+            events = json.load(f)["traceEvents"]
+    assert [e["name"] for e in events] == ["github.request", "ci.commit"]
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+    assert events[1]["args"] == {"owner": "o", "repo": "r", "sha": "abc"}
+
+
+# ============================================================================
+# STARTUP TESTS
+# ============================================================================
+
+def test_help_path_skips_heavy_imports():
+    """Test that importing cli does not load requests, dotenv or github.*"""
+    # Import time itself is checked by startup_budget.py, not here, since
+    # wall-clock budgets are unreliable on a loaded machine
+    from startup_budget import measure_imports, HELP_FORBIDDEN
+    _, imported = measure_imports(["cli"])
+    
+    leaked = [name for name in imported if name.split(".")[0] in HELP_FORBIDDEN]
+    assert not leaked, f"help path imported {leaked}"
+
 
 # ============================================================================
 # MAIN TEST RUNNER
@@ -293,6 +1787,172 @@ def main():
     runner.test("FLAKY: Alternating outcomes", test_flaky_alternating)
     runner.test("UNSTABLE: Consecutive failures", test_unstable_consecutive_failures)
     runner.test("UNKNOWN: Insufficient data", test_unknown_insufficient_data)
+    runner.test("Per-repo thresholds from scoring config", test_repo_thresholds_override_defaults)
+    runner.test("Legacy stability rule table", test_legacy_stability_rules)
+    
+    print()
+    
+    # Flakiness index tests
+    print("📦 Flakiness Index Tests")
+    print("-" * 70)
+    runner.test("Index merges outcomes across PRs", test_index_merges_across_prs)
+    runner.test("Index de-duplicates shas and windows runs", test_index_deduplicates_and_windows)
+    runner.test("Index save and load", test_index_save_and_load)
+    
+    print()
+    
+    # Time-decayed scoring tests
+    print("📦 Time-Decayed Scoring Tests")
+    print("-" * 70)
+    runner.test("Decay: Fresh runs match plain scoring", test_decay_matches_plain_scoring_for_fresh_runs)
+    runner.test("Decay: Old failures fade out", test_decay_forgets_old_failures)
+    runner.test("Window: Old runs excluded", test_window_excludes_old_runs)
+    runner.test("Window: Constant memory", test_decayed_summary_constant_memory)
+    runner.test("Decay: Non-positive periods rejected", test_decay_rejects_non_positive_periods)
+    runner.test("Decay: Effective counts rounded in reasons", test_decayed_reasons_round_effective_counts)
+    
+    print()
+    
+    # History building tests
+    print("📦 History Building Tests")
+    print("-" * 70)
+    runner.test("Concurrent fetch matches sequential", test_history_concurrent_matches_sequential)
+    runner.test("Lazy fetch stops at min sample", test_lazy_history_stops_at_min_sample)
+    runner.test("Lazy fetch keeps classification", test_lazy_history_matches_full_classification)
+    runner.test("Base cursor fetches only new commits", test_base_branch_cursor_fetches_only_new_commits)
+    runner.test("Base cursor ignores skipped checks", test_base_branch_cursor_skips_only_running_ci)
+    runner.test("Base history enriches small PRs", test_include_base_enriches_small_prs)
+    runner.test("Workflow-run history includes attempts", test_workflow_history_includes_attempts)
+    runner.test("Streaming report has a memory ceiling", test_streaming_report_memory_ceiling)
+    runner.test("Deadline scores partial history", test_deadline_scores_partial_history)
+    runner.test("Met deadline reports complete history", test_deadline_met_reports_complete_history)
+    runner.test("Expired deadline blocks requests", test_expired_deadline_blocks_requests)
+    runner.test("Multiplexed GraphQL histories match REST", test_multiplexed_histories_match_rest)
+    
+    print()
+    
+    # Lean payload tests
+    print("📦 Lean Payload Tests")
+    print("-" * 70)
+    runner.test("Lean check-run projection", test_lean_check_runs_projection)
+    runner.test("Lean status projection", test_lean_statuses_projection)
+    
+    print()
+    
+    # Token pool tests
+    print("📦 Token Pool Tests")
+    print("-" * 70)
+    runner.test("Pool prefers most remaining budget", test_token_pool_prefers_most_remaining)
+    runner.test("Pool skips exhausted tokens until reset", test_token_pool_skips_exhausted_until_reset)
+    runner.test("Pool usage keeps same-suffix tokens apart", test_token_pool_usage_keeps_same_suffix_tokens_apart)
+    runner.test("Stale rate-limit reset stops retrying", test_client_stops_when_limit_reset_is_stale)
+    runner.test("Client counts connection reuse", test_client_counts_connection_reuse)
+    
+    print()
+    
+    # Batch queue tests
+    print("📦 Batch Queue Tests")
+    print("-" * 70)
+    runner.test("Batch shards across processes", test_batch_runs_across_processes)
+    runner.test("Batch resumes from checkpoint", test_batch_resumes_from_checkpoint)
+    runner.test("Batch runs only the given jobs", test_batch_runs_only_given_jobs)
+    runner.test("Plan lowers depth to fit budget", test_plan_fits_budget_by_lowering_depth)
+    runner.test("Plan skips low-priority PRs", test_plan_skips_low_priority_prs)
+    
+    print()
+    
+    # Refresher tests
+    print("📦 Refresher Tests")
+    print("-" * 70)
+    runner.test("Refresher queues only active PRs", test_refresher_queues_only_active_prs)
+    runner.test("Refresher state round trip", test_refresher_state_round_trip)
+    runner.test("Refresher seeds branches from open PRs", test_refresher_seeds_branches_from_open_prs)
+    
+    print()
+    
+    # Repository scan tests
+    print("📦 Repository Scan Tests")
+    print("-" * 70)
+    runner.test("Scan re-analyzes only changed PRs", test_scan_reanalyzes_only_changed_prs)
+    
+    print()
+    
+    # Triage tests
+    print("📦 Triage Tests")
+    print("-" * 70)
+    runner.test("Triage analyzes only failing and pending PRs", test_triage_analyzes_only_failing_and_pending)
+    runner.test("GraphQL POST body and error mapping", test_graphql_posts_query_and_maps_errors)
+    runner.test("GraphQL rate limit tracked apart from core", test_graphql_rate_limit_tracked_apart_from_core)
+    
+    print()
+    
+    # Backfill tests
+    print("📦 Backfill Tests")
+    print("-" * 70)
+    runner.test("Backfill resumes within budget", test_backfill_resumes_within_budget)
+    runner.test("Backfill retries failures and catches up", test_backfill_retries_failures_and_catches_up)
+    
+    print()
+    
+    # Snapshot tests
+    print("📦 Snapshot Tests")
+    print("-" * 70)
+    runner.test("Snapshot round trip", test_snapshot_round_trip)
+    runner.test("Snapshot rejects other files", test_snapshot_rejects_other_files)
+    
+    print()
+    
+    # Payload store tests
+    print("📦 Payload Store Tests")
+    print("-" * 70)
+    runner.test("Payload store round trip and dedup", test_payload_store_round_trip_and_dedup)
+    runner.test("Payload store keeps reserved-looking objects", test_payload_store_keeps_reserved_looking_objects)
+    runner.test("Payload store compaction", test_payload_store_compaction)
+    runner.test("Payload store compaction blocks concurrent puts", test_payload_store_compaction_blocks_concurrent_puts)
+    
+    print()
+    
+    # Outcome matrix tests
+    print("📦 Outcome Matrix Tests")
+    print("-" * 70)
+    runner.test("Matrix row and column reductions", test_matrix_row_and_column_reductions)
+    runner.test("Infra failures excluded from flakiness", test_infra_failures_excluded_from_flakiness)
+    
+    print()
+    
+    # Change-point tests
+    print("📦 Change-Point Tests")
+    print("-" * 70)
+    runner.test("Finds regression sha", test_change_point_finds_regression_sha)
+    runner.test("Ignores steady flakiness", test_change_point_ignores_steady_flakiness)
+    runner.test("Constant memory per outcome", test_change_point_is_constant_memory)
+    
+    print()
+    
+    # Metrics tests
+    print("📦 Metrics Tests")
+    print("-" * 70)
+    runner.test("Metrics text exposition", test_metrics_text_exposition)
+    runner.test("Client latency split by outcome", test_client_latency_split_by_outcome)
+    runner.test("Metrics served over HTTP", test_metrics_served_over_http)
+    runner.test("Metrics drain and merge across registries", test_metrics_drain_and_merge)
+    runner.test("Batch merges worker-process metrics", test_batch_merges_worker_metrics)
+    
+    print()
+    
+    # Tracing tests
+    print("📦 Tracing Tests")
+    print("-" * 70)
+    runner.test("Hooks see analysis spans", test_tracing_hooks_see_analysis_spans)
+    runner.test("No-op span without hooks", test_tracing_noop_without_hooks)
+    runner.test("Chrome trace export", test_chrome_trace_export)
+    
+    print()
+    
+    # Startup tests
+    print("📦 Startup Tests")
+    print("-" * 70)
+    runner.test("Help path skips heavy imports", test_help_path_skips_heavy_imports)
     
     # Summary
     success = runner.summary()